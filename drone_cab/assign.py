@@ -7,8 +7,14 @@ Collection of functions that assign various entities to other entities.
 from __future__ import annotations
 
 import logging
+import math
+from itertools import pairwise
 from typing import TYPE_CHECKING
 
+import traci
+
+from drone_cab.events import log_event
+from drone_cab.tunables import VEHICLE_MAX_DETOUR
 from drone_cab.utils import euclidean_distance
 
 if TYPE_CHECKING:
@@ -44,12 +50,17 @@ def assign_package_pickup(package: Package, pickup_list: list[Pickup]) -> Pickup
     )
 
     for pickup in pickup_list:
-        if len(pickup.assigned_package_set) < pickup.capacity:
+        # Assigned packages will be stored on arrival, so they count towards capacity too
+        if (
+            len(pickup.assigned_package_set) + len(pickup.received_package_set)
+            < pickup.capacity
+        ):
             pickup.assign_package(package)
             package.set_pickup(pickup)
+            log_event("assign_pickup", package=package.destination_id, pickup=pickup.id)
             return pickup
 
-    logger.debug(f"Failed to assign pickup of {package} to any pickup")
+    logger.debug("Failed to assign pickup of %s to any pickup", package)
     return None
 
 
@@ -94,14 +105,319 @@ def assign_package_vehicle(
             in vehicle.get_route_edge_id_list()
         ):
             vehicle.add_package(package)
+            package.set_vehicle(vehicle)
             distance_to_pickup = vehicle.get_distance_along_road(
                 package.assigned_pickup.center
             ) - distance
             package.distance_vehicle += distance_to_pickup
             logger.debug(
-                f"Assigned vehicle of {package} to {vehicle} with {distance=} from warehouse and {distance_to_pickup=}"
+                "Assigned vehicle of %s to %s with distance=%s from warehouse and distance_to_pickup=%s",
+                package,
+                vehicle,
+                distance,
+                distance_to_pickup,
+            )
+            log_event(
+                "assign_vehicle",
+                package=package.destination_id,
+                vehicle=vehicle.id,
+                pickup=package.assigned_pickup.id,
+                distance_to_warehouse=distance,
+                distance_to_pickup=distance_to_pickup,
             )
             return vehicle
 
-    logger.debug(f"Failed to assign {package} to any vehicle")
+    logger.debug("Failed to assign %s to any vehicle", package)
+    return None
+
+
+class RouteCache:
+    """Cache of the TraCI routing queries of a simulation step, shared by all assignments in it.
+
+    Shortest routes between edges, and the routes and route indices of vehicles, are
+    queried at most once per step, however many packages are assigned in it, and the
+    routes of vehicles rerouted in the step are updated in place. Start points of edges
+    never change, so they are cached for the whole simulation.
+
+    Attributes:
+        route_dict: Edge IDs and length of the shortest route between two edges, by their SUMO IDs.
+        vehicle_route_dict: Route index and route edge IDs of vehicles, by their SUMO IDs.
+    """
+
+    edge_point_dict: dict[str, tuple[float, float]] = {}  #: Start point of the first lane of every edge, by edge SUMO ID.
+
+    def __init__(self) -> None:
+        self.route_dict: dict[tuple[str, str], tuple[tuple[str, ...], float]] = {}
+        self.vehicle_route_dict: dict[str, tuple[int, list[str]]] = {}
+
+    def __repr__(self) -> str:
+        return f"RouteCache({len(self.route_dict)} routes, {len(self.vehicle_route_dict)} vehicles)"
+
+    def find_route(self, from_edge_id: str, to_edge_id: str) -> tuple[tuple[str, ...], float]:
+        """Find the shortest route between two edges, including both of them.
+
+        Args:
+            from_edge_id: SUMO ID of the edge to start from.
+            to_edge_id: SUMO ID of the edge to end on.
+
+        Returns:
+            SUMO IDs of the edges of the route and its length, or no edges and infinity if there is none.
+        """
+        try:
+            return self.route_dict[(from_edge_id, to_edge_id)]
+        except KeyError:
+            try:
+                stage = traci.simulation.findRoute(from_edge_id, to_edge_id)
+                route = (tuple(stage.edges), stage.length if stage.edges else math.inf)
+            except traci.TraCIException:
+                # E.g. an edge that cars are not allowed on
+                route = ((), math.inf)
+            self.route_dict[(from_edge_id, to_edge_id)] = route
+            return route
+
+    def get_vehicle_route(self, vehicle: Vehicle) -> tuple[int, list[str]]:
+        """Get the route of a vehicle and the index in it of the edge that vehicle is on.
+
+        Args:
+            vehicle: Vehicle object to get the route of.
+
+        Returns:
+            Route index of vehicle and SUMO IDs of the edges of its route.
+        """
+        try:
+            return self.vehicle_route_dict[vehicle.id]
+        except KeyError:
+            vehicle_route = (vehicle.get_route_index(), list(vehicle.get_route_edge_id_list()))
+            self.vehicle_route_dict[vehicle.id] = vehicle_route
+            return vehicle_route
+
+    def set_vehicle_route(self, vehicle: Vehicle, edge_id_list: list[str]) -> None:
+        """Reroute a vehicle, starting from the edge that vehicle is on, and cache its new route.
+
+        Args:
+            vehicle: Vehicle object to reroute.
+            edge_id_list: SUMO IDs of the edges of vehicle's new route.
+
+        Raises:
+            traci.TraCIException: If the new route is not valid for vehicle.
+        """
+        vehicle.set_route(edge_id_list)
+        route_index, route_edge_id_list = self.get_vehicle_route(vehicle)
+        # SUMO keeps the edges already driven, so that the route index is unchanged
+        self.vehicle_route_dict[vehicle.id] = (
+            route_index,
+            route_edge_id_list[:route_index] + list(edge_id_list),
+        )
+
+    @staticmethod
+    def get_edge_point(edge_id: str) -> tuple[float, float]:
+        """Get the start point of the first lane of an edge.
+
+        Args:
+            edge_id: SUMO ID of the edge.
+
+        Returns:
+            2-D coordinates of the start point of the edge.
+        """
+        try:
+            return RouteCache.edge_point_dict[edge_id]
+        except KeyError:
+            edge_point = tuple(traci.lane.getShape(f"{edge_id}_0")[0])
+            RouteCache.edge_point_dict[edge_id] = edge_point
+            return edge_point
+
+
+def assign_package_vehicle_detour(
+    package: Package,
+    vehicle_list: list[Vehicle],
+    warehouse: Warehouse,
+    max_detour: float | None = None,
+    route_cache: RouteCache | None = None,
+) -> Vehicle | None:
+    """Attempt to assign a vehicle to the given package by rerouting it with the least detour.
+
+    Unlike assign_package_vehicle, vehicles do not need to already pass by the warehouse
+    and the package's pickup point. The remaining route of every vehicle with spare
+    capacity is seen as a chain of stops, from its current edge over the pickup points
+    of its carried packages to its destination. The warehouse, and later the package's
+    pickup point, are inserted into that chain wherever they add the least driving
+    distance, and the vehicle with the least detour is rerouted along the new chain.
+    Insertions whose straight-line lower bound of the detour exceeds max_detour are
+    skipped without routing them.
+
+    Args:
+        package: Package obejct to attenpt assignment of vehicle to.
+        vehicle_list: List of vehicle objects to choose the vehicle from.
+        warehouse: Warehouse object from where the vehicle will pick up the package.
+        max_detour (optional): Maximum extra driving distance of a vehicle. Defaults to tunable constant.
+        route_cache (optional): Routing queries of the current simulation step. Defaults to an empty cache.
+
+    Returns:
+        Assigned vehicle object if successful, else None.
+
+    Raises:
+        AssertionError: If given package does not have an assigned pickup point.
+    """
+    try:
+        assert (
+            package.assigned_pickup is not None
+        ), f"Attempted to assign vehicle to {package} with no assigned pickup"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    if max_detour is None:
+        max_detour = VEHICLE_MAX_DETOUR()
+    if route_cache is None:
+        route_cache = RouteCache()
+    warehouse_point = RouteCache.get_edge_point(warehouse.nearest_edge_id)
+    pickup_point = RouteCache.get_edge_point(package.assigned_pickup.nearest_edge_id)
+
+    candidate_list = []
+    for vehicle in vehicle_list:
+        if len(vehicle.carrying_package_set) >= vehicle.capacity:
+            continue
+
+        route_index, route_edge_id_list = route_cache.get_vehicle_route(vehicle)
+        if not 0 <= route_index < len(route_edge_id_list):
+            continue
+
+        stop_list: list[Package | None] = sorted(
+            filter(
+                lambda carried_package: carried_package.drop_route_index >= 0,
+                vehicle.carrying_package_set,
+            ),
+            key=lambda carried_package: carried_package.drop_route_index,
+        )
+        stop_edge_id_list = [stop.assigned_pickup.nearest_edge_id for stop in stop_list]
+        last_edge_id = route_edge_id_list[-1]
+        chain_edge_id_list = [route_edge_id_list[route_index], *stop_edge_id_list, last_edge_id]
+        segment_length_list = [
+            route_cache.find_route(from_edge_id, to_edge_id)[1]
+            for from_edge_id, to_edge_id in pairwise(chain_edge_id_list)
+        ]
+        # Routes include both their first and last edge, so stops are counted twice
+        base_length = sum(segment_length_list) - sum(
+            route_cache.find_route(edge_id, edge_id)[1] for edge_id in stop_edge_id_list
+        )
+        if not math.isfinite(base_length):
+            continue
+
+        # Routes pass by the start points of their edges, so that straight lines between these bound
+        # the detour of visiting the warehouse or the pickup point between two stops from below,
+        # up to lane widths, without routing
+        chain_point_list = [RouteCache.get_edge_point(edge_id) for edge_id in chain_edge_id_list]
+        warehouse_bound_list = []
+        pickup_bound_list = []
+        for (from_point, to_point), segment_length in zip(
+            pairwise(chain_point_list), segment_length_list
+        ):
+            warehouse_bound_list.append(
+                euclidean_distance(from_point, warehouse_point)
+                + euclidean_distance(warehouse_point, to_point)
+                - segment_length
+            )
+            pickup_bound_list.append(
+                euclidean_distance(from_point, pickup_point)
+                + euclidean_distance(pickup_point, to_point)
+                - segment_length
+            )
+
+        # None marks the warehouse, as it is no package's stop
+        for i in range(len(stop_list) + 1):
+            for j in range(i, len(stop_list) + 1):
+                if i == j:
+                    bound = (
+                        euclidean_distance(chain_point_list[i], warehouse_point)
+                        + euclidean_distance(warehouse_point, pickup_point)
+                        + euclidean_distance(pickup_point, chain_point_list[i + 1])
+                        - segment_length_list[i]
+                    )
+                else:
+                    bound = warehouse_bound_list[i] + pickup_bound_list[j]
+                if bound > max_detour:
+                    continue
+
+                new_stop_list = stop_list[:i] + [None] + stop_list[i:j] + [package] + stop_list[j:]
+                new_stop_edge_id_list = (
+                    stop_edge_id_list[:i]
+                    + [warehouse.nearest_edge_id]
+                    + stop_edge_id_list[i:j]
+                    + [package.assigned_pickup.nearest_edge_id]
+                    + stop_edge_id_list[j:]
+                )
+                new_chain_edge_id_list = [chain_edge_id_list[0], *new_stop_edge_id_list, last_edge_id]
+                detour = (
+                    sum(
+                        route_cache.find_route(from_edge_id, to_edge_id)[1]
+                        for from_edge_id, to_edge_id in pairwise(new_chain_edge_id_list)
+                    )
+                    - sum(
+                        route_cache.find_route(edge_id, edge_id)[1]
+                        for edge_id in new_stop_edge_id_list
+                    )
+                    - base_length
+                )
+                if math.isfinite(detour) and detour <= max_detour:
+                    candidate_list.append(
+                        (
+                            detour,
+                            vehicle,
+                            route_index,
+                            last_edge_id,
+                            new_stop_list,
+                            new_stop_edge_id_list,
+                        )
+                    )
+
+    candidate_list.sort(key=lambda candidate: candidate[0])
+    for detour, vehicle, route_index, last_edge_id, stop_list, stop_edge_id_list in candidate_list:
+        edge_id_list = [route_cache.get_vehicle_route(vehicle)[1][route_index]]
+        stop_route_index_list = []
+        distance_to_pickup = 0.0
+        visited_warehouse = visited_pickup = False
+        for stop, to_edge_id in zip(stop_list, stop_edge_id_list):
+            segment_edge_id_list, segment_length = route_cache.find_route(edge_id_list[-1], to_edge_id)
+            if visited_warehouse and not visited_pickup:
+                distance_to_pickup += (
+                    segment_length - route_cache.find_route(edge_id_list[-1], edge_id_list[-1])[1]
+                )
+            edge_id_list.extend(segment_edge_id_list[1:])
+            # SUMO keeps the edges already driven, so that the route index is unchanged
+            stop_route_index_list.append(route_index + len(edge_id_list) - 1)
+            visited_warehouse = visited_warehouse or stop is None
+            visited_pickup = visited_pickup or stop is package
+        edge_id_list.extend(route_cache.find_route(edge_id_list[-1], last_edge_id)[0][1:])
+
+        try:
+            route_cache.set_vehicle_route(vehicle, edge_id_list)
+        except traci.TraCIException:
+            logger.debug("Failed to reroute %s", vehicle, exc_info=True)
+            continue
+
+        for stop, stop_route_index in zip(stop_list, stop_route_index_list):
+            if stop is package:
+                vehicle.add_package(package, drop_route_index=stop_route_index)
+            elif stop is not None:
+                stop.drop_route_index = stop_route_index
+        package.set_vehicle(vehicle)
+        package.distance_vehicle += distance_to_pickup
+        logger.debug(
+            "Assigned vehicle of %s to %s with detour=%s and distance_to_pickup=%s",
+            package,
+            vehicle,
+            detour,
+            distance_to_pickup,
+        )
+        log_event(
+            "assign_vehicle",
+            package=package.destination_id,
+            vehicle=vehicle.id,
+            pickup=package.assigned_pickup.id,
+            detour=detour,
+            distance_to_pickup=distance_to_pickup,
+        )
+        return vehicle
+
+    logger.debug("Failed to assign %s to any vehicle within max_detour=%s", package, max_detour)
     return None
@@ -0,0 +1,155 @@
+"""BuildingTable class.
+
+This class implements a table of the geometry of all residences,
+preloaded once at startup so that packages can look up the centroid
+of their destination without any TraCI round trips.
+
+"""
+
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+import traci
+
+from drone_cab.mapdata import load_polygons
+from drone_cab.utils import shape2area, shape2centroid
+
+logger = logging.getLogger(__name__)
+
+
+class BuildingTable:
+    """Table of SUMO IDs, centroids and (optionally) areas of residence polygons.
+
+    Args:
+        id_list: SUMO IDs of residence polygons.
+        center_array: 2-D coordinates of centroids of residence polygons, of shape (n, 2).
+        area_array (optional): Areas of residence polygons, of shape (n,). Defaults to None.
+
+    Attributes:
+        id_list: SUMO IDs of residence polygons.
+        center_array: 2-D coordinates of centroids of residence polygons, of shape (n, 2).
+        area_array: Areas of residence polygons, of shape (n,), if loaded.
+        index_dict: Row index in this table of every residence SUMO ID.
+    """
+
+    def __init__(
+        self,
+        id_list: list[str],
+        center_array: np.ndarray,
+        area_array: np.ndarray | None = None,
+    ) -> None:
+        self.id_list: list[str] = id_list
+        self.center_array: np.ndarray = np.asarray(center_array, dtype=float).reshape(-1, 2)
+        self.area_array: np.ndarray | None = (
+            np.asarray(area_array, dtype=float) if area_array is not None else None
+        )
+
+        try:
+            assert len(self.id_list) == len(
+                self.center_array
+            ), f"Expected {len(self.id_list)} centroids, got {len(self.center_array)}"
+        except AssertionError as e:
+            logger.error("AssertionError", exc_info=True)
+            raise e
+
+        self.index_dict: dict[str, int] = {
+            building_id: index for index, building_id in enumerate(self.id_list)
+        }
+        self._center_list: list[tuple[float, float]] = list(
+            map(tuple, self.center_array.tolist())
+        )
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"BuildingTable({len(self.id_list)} buildings)"
+
+    def __len__(self) -> int:
+        return len(self.id_list)
+
+    def __contains__(self, building_id: str) -> bool:
+        return building_id in self.index_dict
+
+    def get_center(self, building_id: str) -> tuple[float, float]:
+        """Get the centroid of a residence polygon.
+
+        Args:
+            building_id: SUMO ID of residence polygon.
+
+        Returns:
+            2-D coordinates of the centroid of the residence polygon.
+        """
+        return self._center_list[self.index_dict[building_id]]
+
+    def get_area(self, building_id: str) -> float:
+        """Get the area of a residence polygon.
+
+        Args:
+            building_id: SUMO ID of residence polygon.
+
+        Returns:
+            Area of the residence polygon.
+
+        Raises:
+            AssertionError: If areas were not loaded into this table.
+        """
+        try:
+            assert self.area_array is not None, f"Areas were not loaded into {self}"
+        except AssertionError as e:
+            logger.error("AssertionError", exc_info=True)
+            raise e
+        return float(self.area_array[self.index_dict[building_id]])
+
+    @staticmethod
+    def from_traci(polygon_type: str = "building", with_area: bool = False) -> BuildingTable:
+        """Build the table from the polygons of the current simulation.
+
+        Args:
+            polygon_type (optional): SUMO type of residence polygons. Defaults to "building".
+            with_area (optional): Whether to calculate areas of residence polygons. Defaults to False.
+
+        Returns:
+            BuildingTable object of all residence polygons in the current simulation.
+        """
+        id_list = []
+        center_list = []
+        area_list = []
+        for polygon_id in traci.polygon.getIDList():
+            if traci.polygon.getType(polygon_id) != polygon_type:
+                continue
+            shape = traci.polygon.getShape(polygon_id)
+            id_list.append(polygon_id)
+            center_list.append(shape2centroid(shape))
+            if with_area:
+                area_list.append(shape2area(shape))
+
+        return BuildingTable(
+            id_list,
+            np.array(center_list, dtype=float),
+            np.array(area_list, dtype=float) if with_area else None,
+        )
+
+    @staticmethod
+    def from_poly_file(
+        path: str, polygon_type: str = "building", with_area: bool = False
+    ) -> BuildingTable:
+        """Build the table from a SUMO polygon file, streaming it without TraCI.
+
+        Args:
+            path: Path of the polygon file, e.g. map.poly.xml.
+            polygon_type (optional): SUMO type of residence polygons. Defaults to "building".
+            with_area (optional): Whether to calculate areas of residence polygons. Defaults to False.
+
+        Returns:
+            BuildingTable object of all residence polygons in the polygon file.
+        """
+        shape_table = load_polygons(path, {polygon_type}).get(polygon_type)
+        if shape_table is None:
+            return BuildingTable([], np.empty((0, 2)), np.empty(0) if with_area else None)
+
+        return BuildingTable(
+            shape_table.id_list,
+            shape_table.centroid_array(),
+            shape_table.area_array() if with_area else None,
+        )
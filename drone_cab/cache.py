@@ -0,0 +1,202 @@
+"""ResultCache class.
+
+This class implements a content-addressed cache of the results of
+simulation runs, keyed by a digest of all inputs of a scenario, so that
+identical scenarios are only ever simulated once, and bounded in size by
+evicting the least recently used results.
+
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import xml.etree.ElementTree as ET
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+#: Default bound of the total size of the results in a cache, in bytes.
+DEFAULT_MAX_BYTES: int = 1 << 30
+
+#: Options of a SUMO configuration file that list input files.
+SUMOCFG_INPUT_OPTION_LIST: list[str] = ["net-file", "route-files", "additional-files"]
+
+
+def get_sumocfg_path_list(sumocfg_path: str) -> list[str]:
+    """Get the paths of a SUMO configuration file and of all input files it lists.
+
+    Args:
+        sumocfg_path: Path of the SUMO configuration file.
+
+    Returns:
+        Paths of the configuration file and its input files, in order of listing.
+    """
+    path_list = [sumocfg_path]
+    for element in ET.parse(sumocfg_path).getroot().iter():
+        if element.tag in SUMOCFG_INPUT_OPTION_LIST:
+            for file_name in element.get("value", "").replace(",", " ").split():
+                path_list.append(os.path.join(os.path.dirname(sumocfg_path), file_name))
+    return path_list
+
+
+def get_code_path_list() -> list[str]:
+    """Get the paths of the source files of drone_cab, whose contents version the results.
+
+    Returns:
+        Sorted paths of the source files of drone_cab.
+    """
+    return sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py")))
+
+
+def get_sumo_version(sumo_binary: str = "sumo") -> str:
+    """Get the version of a SUMO binary, which may differ from that of the installed TraCI client.
+
+    Args:
+        sumo_binary (optional): Name or path of the SUMO binary. Defaults to "sumo".
+
+    Returns:
+        First line of the output of the binary with --version, e.g. "Eclipse SUMO sumo 1.20.0".
+    """
+    completed = subprocess.run([sumo_binary, "--version"], capture_output=True, text=True, check=True)
+    return completed.stdout.splitlines()[0].strip()
+
+
+def scenario_key(path_list: list[str], parameter_dict: dict[str, Any]) -> str:
+    """Compute the key of a scenario as a digest of the contents of its input files and its parameters.
+
+    Args:
+        path_list: Paths of input files, in a fixed order.
+        parameter_dict: JSON serializable parameters of the scenario.
+
+    Returns:
+        Hexadecimal SHA-256 digest of the scenario.
+    """
+    digest = hashlib.sha256()
+    for path in path_list:
+        # Lengths delimit the contents, so that no two lists of files digest alike
+        digest.update(f"{os.path.getsize(path)}:".encode())
+        with open(path, "rb") as input_file:
+            for chunk in iter(lambda: input_file.read(1 << 20), b""):
+                digest.update(chunk)
+    digest.update(json.dumps(parameter_dict, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Directory of result files of simulation runs, named by the keys of their scenarios.
+
+    Results are evicted least recently used first once their total size exceeds max_bytes,
+    using modification times, which are refreshed on every hit, as times of last use.
+
+    Args:
+        cache_dir: Path of the cache directory, created if missing.
+        max_bytes (optional): Bound of the total size of the results in bytes. Defaults to DEFAULT_MAX_BYTES.
+
+    Attributes:
+        cache_dir: Path of the cache directory.
+        max_bytes: Bound of the total size of the results in bytes.
+        hit_count: Number of lookups that found a result.
+        miss_count: Number of lookups that did not find a result.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.cache_dir: str = cache_dir
+        self.max_bytes: int = max_bytes
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __repr__(self) -> str:
+        return f"ResultCache({self.cache_dir}, {self.max_bytes})"
+
+    def __len__(self) -> int:
+        return len(self._entry_path_list())
+
+    def _entry_path_list(self) -> list[str]:
+        return [
+            entry.path
+            for entry in os.scandir(self.cache_dir)
+            if entry.is_file() and not entry.name.startswith(".")
+        ]
+
+    def get(self, key: str, extension: str) -> str | None:
+        """Look up the result of a scenario, marking it as recently used.
+
+        Args:
+            key: Key of the scenario, as computed by scenario_key.
+            extension: Lower case extension of the result file, e.g. ".npz".
+
+        Returns:
+            Path of the cached result file if there is one, else None.
+        """
+        path = os.path.join(self.cache_dir, key + extension)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.miss_count += 1
+            logger.debug("Cache miss of %s in %s", key, self)
+            return None
+        self.hit_count += 1
+        logger.debug("Cache hit of %s in %s", key, self)
+        return path
+
+    def put(self, key: str, result_path: str) -> str:
+        """Store the result file of a scenario, evicting least recently used results if need be.
+
+        Args:
+            key: Key of the scenario, as computed by scenario_key.
+            result_path: Path of the result file to copy into the cache.
+
+        Returns:
+            Path of the cached result file.
+        """
+        path = os.path.join(self.cache_dir, key + os.path.splitext(result_path)[1].lower())
+        # Copying to a hidden temporary file first, so that concurrent runs never see partial results
+        file_descriptor, temporary_path = tempfile.mkstemp(prefix=".", dir=self.cache_dir)
+        os.close(file_descriptor)
+        try:
+            shutil.copyfile(result_path, temporary_path)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        logger.debug("Stored %s in %s", key, self)
+        self.evict()
+        return path
+
+    def evict(self) -> int:
+        """Evict least recently used results until their total size is within max_bytes.
+
+        Returns:
+            Number of evicted results.
+        """
+        entry_list = []
+        for path in self._entry_path_list():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entry_list.append((stat.st_mtime, stat.st_size, path))
+        entry_list.sort()
+
+        total_bytes = sum(size for _, size, _ in entry_list)
+        evicted_count = 0
+        for _, size, path in entry_list:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            evicted_count += 1
+        if evicted_count:
+            logger.info("Evicted %d results from %s", evicted_count, self)
+        return evicted_count
@@ -0,0 +1,142 @@
+"""Simulation checkpoints.
+
+This module pairs SUMO's own simulation state snapshots with a snapshot
+of the drone-cab state, so that many scenarios can be branched off one
+warmed-up simulation instead of re-running its warm-up every time.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import pickle
+from typing import TYPE_CHECKING
+
+import traci
+
+from drone_cab.clock import Clock
+from drone_cab.package import Package
+from drone_cab.vehicle import Vehicle
+from drone_cab.writebuffer import WriteBuffer
+
+if TYPE_CHECKING:
+    from drone_cab.scheduler import OrderScheduler
+
+logger = logging.getLogger(__name__)
+
+#: Version of the layout of the drone-cab state, bumped on incompatible changes.
+CHECKPOINT_VERSION: int = 4
+
+#: Name of the SUMO simulation state file of a checkpoint.
+SUMO_STATE_FILE: str = "sumo_state.xml"
+
+#: Name of the drone-cab state file of a checkpoint.
+DRONE_CAB_STATE_FILE: str = "drone_cab_state.pickle"
+
+
+def save_checkpoint(checkpoint_dir: str, scheduler: OrderScheduler) -> None:
+    """Save the SUMO simulation state and the drone-cab state to a checkpoint directory.
+
+    The drone-cab state comprises the clock, the package store, all vehicles with their
+    carried packages, and the order scheduler with its pending packages, its warehouse,
+    and its pickup points with their assigned and received packages and their drones
+    (including route cursor, position and carried packages). Demand generators, metrics sinks and profilers are
+    not part of a checkpoint, so that every branch can bring its own.
+
+    Args:
+        checkpoint_dir: Path of the directory to save the checkpoint to, created if missing.
+        scheduler: Order scheduler of the simulation.
+    """
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    traci.simulation.saveState(os.path.join(checkpoint_dir, SUMO_STATE_FILE))
+
+    state = {
+        "version": CHECKPOINT_VERSION,
+        "clock": (
+            Clock.current_step,
+            Clock.current_time,
+            Clock.start_time,
+            Clock.step_length,
+        ),
+        "package_store": Package.store,
+        "vehicle_list": Vehicle.vehicle_list,
+        "scheduler": scheduler,
+    }
+    with open(os.path.join(checkpoint_dir, DRONE_CAB_STATE_FILE), "wb") as state_file:
+        pickle.dump(state, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    logger.info("Saved checkpoint at step=%d to %s", Clock.current_step, checkpoint_dir)
+
+
+def load_checkpoint(checkpoint_dir: str, highlight: bool = False) -> OrderScheduler:
+    """Load the SUMO simulation state and the drone-cab state from a checkpoint directory.
+
+    SUMO has to be running with the same configuration that the checkpoint was saved
+    with. Polygons of pickup points and drones are added to the simulation if missing
+    (e.g. in a freshly started SUMO), and the warehouse polygon is colored again, as are
+    polygons of destinations of undelivered packages if highlighting.
+
+    Note:
+        Step listeners are not restored; the caller has to add the Clock, and every
+        pickup's drone and pickup, as step listeners in the usual order.
+
+    Args:
+        checkpoint_dir: Path of the directory to load the checkpoint from.
+        highlight (optional): Whether to color destinations of undelivered packages again. Defaults to False.
+
+    Returns:
+        Order scheduler of the simulation, with its warehouse and pickup points.
+
+    Raises:
+        AssertionError: If the checkpoint was saved with an incompatible version of drone-cab.
+    """
+    with open(os.path.join(checkpoint_dir, DRONE_CAB_STATE_FILE), "rb") as state_file:
+        state = pickle.load(state_file)
+
+    try:
+        assert (
+            state["version"] == CHECKPOINT_VERSION
+        ), f"Checkpoint version={state['version']} is incompatible with version={CHECKPOINT_VERSION}"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    traci.simulation.loadState(os.path.join(checkpoint_dir, SUMO_STATE_FILE))
+    WriteBuffer.reset()
+
+    (
+        Clock.current_step,
+        Clock.current_time,
+        Clock.start_time,
+        Clock.step_length,
+    ) = state["clock"]
+    Package.store = state["package_store"]
+    Vehicle.vehicle_list[:] = state["vehicle_list"]
+    scheduler: OrderScheduler = state["scheduler"]
+
+    polygon_id_set = set(traci.polygon.getIDList())
+    scheduler.warehouse.highlight()
+    if highlight:
+        for package in scheduler.ready_queue:
+            package.highlight()
+        for waitlist in scheduler.waitlist_dict.values():
+            for package in waitlist:
+                package.highlight()
+    for pickup in scheduler.pickup_list:
+        if pickup.id not in polygon_id_set:
+            pickup.add_polygon()
+        if pickup.drone.polygon_id in polygon_id_set:
+            WriteBuffer.write("polygon", "setShape", pickup.drone.polygon_id, pickup.drone.get_shape())
+        else:
+            pickup.drone.add_polygon()
+        if highlight:
+            for package in (
+                pickup.assigned_package_set
+                | pickup.received_package_set
+                | pickup.drone.carrying_package_set
+            ):
+                package.highlight()
+
+    logger.info("Loaded checkpoint at step=%d from %s", Clock.current_step, checkpoint_dir)
+    return scheduler
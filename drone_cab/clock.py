@@ -0,0 +1,56 @@
+"""Clock class.
+
+This class implements the simulation clock that keeps track of
+the current simulation step and time without any TraCI round trips.
+
+"""
+
+from __future__ import annotations
+
+import logging
+
+import traci
+
+logger = logging.getLogger(__name__)
+
+
+class Clock(traci.StepListener):
+    """Simulation clock, advanced once after every simulation step.
+
+    Note:
+        The clock has to be the first step listener that is added, so that
+        other step listeners observe the already-advanced clock.
+    """
+
+    current_step: int = 0  #: Number of simulation steps taken so far.
+    current_time: float = 0.0  #: Current simulation time in seconds.
+    start_time: float = 0.0  #: Simulation time in seconds at which the clock was started.
+    step_length: float = 1.0  #: Length of a simulation step in seconds.
+
+    def __init__(self) -> None:
+        Clock.reset(traci.simulation.getTime(), traci.simulation.getDeltaT())
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"Clock({Clock.current_step}, {Clock.current_time})"
+
+    def step(self, t: int = 0):
+        t += 0
+
+        Clock.current_step += 1
+        Clock.current_time = Clock.start_time + Clock.current_step * Clock.step_length
+
+        return True
+
+    @staticmethod
+    def reset(start_time: float = 0.0, step_length: float = 1.0) -> None:
+        """Reset the clock to the start of the simulation.
+
+        Args:
+            start_time (optional): Simulation time in seconds at the start. Defaults to 0.
+            step_length (optional): Length of a simulation step in seconds. Defaults to 1.
+        """
+        Clock.current_step = 0
+        Clock.start_time = start_time
+        Clock.current_time = start_time
+        Clock.step_length = step_length
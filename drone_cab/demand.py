@@ -0,0 +1,135 @@
+"""Demand generation utilities.
+
+Collection of generators that stream stochastic package demand over
+the residences of the simulation, one simulation step at a time.
+
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Callable, Iterator, Sequence
+
+import numpy as np
+
+from drone_cab.package import Package
+
+logger = logging.getLogger(__name__)
+
+
+def hourly_rate(rate_list: Sequence[float]) -> Callable[[float], float]:
+    """Build a time-varying demand rate that repeats a profile of hourly rates.
+
+    Args:
+        rate_list: Demand rates in orders per simulated hour, for consecutive hours of the profile.
+
+    Returns:
+        Function from simulation time in seconds to demand rate in orders per simulated hour.
+    """
+    rate_array = np.asarray(rate_list, dtype=float)
+    return lambda time: float(rate_array[int(time // 3600) % len(rate_array)])
+
+
+def hotspot_weights(
+    center_list: Sequence[tuple[float, float]],
+    hotspot_list: Sequence[tuple[float, float, float, float]],
+    base_weight: float = 1.0,
+) -> np.ndarray:
+    """Calculate spatial demand weights of residences with Gaussian hotspots.
+
+    Args:
+        center_list: 2-D coordinates of centroids of residence polygons.
+        hotspot_list: Hotspots as (x, y, sigma, weight), adding weight * exp(-d^2 / (2 sigma^2)) at distance d.
+        base_weight (optional): Demand weight of every residence outside of hotspots. Defaults to 1.
+
+    Returns:
+        Unnormalized demand weight of every residence.
+    """
+    center_array = np.asarray(center_list, dtype=float).reshape(-1, 2)
+    weight_array = np.full(len(center_array), base_weight)
+    for x, y, sigma, weight in hotspot_list:
+        distance2_array = ((center_array - (x, y)) ** 2).sum(axis=1)
+        weight_array += weight * np.exp(-distance2_array / (2 * sigma**2))
+    return weight_array
+
+
+def poisson_destinations(
+    building_id_list: Sequence[str],
+    rate: float | Callable[[float], float],
+    step_length: float = 1.0,
+    start_time: float = 0.0,
+    weight_list: Sequence[float] | None = None,
+    seed: int | None = None,
+) -> Iterator[list[str]]:
+    """Stream destinations of Poisson-distributed orders, one simulation step at a time.
+
+    Args:
+        building_id_list: SUMO IDs of residences that may order packages.
+        rate: Demand rate in orders per simulated hour, or a function from simulation time in seconds to one.
+        step_length (optional): Length of a simulation step in seconds. Defaults to 1.
+        start_time (optional): Simulation time in seconds of the first step. Defaults to 0.
+        weight_list (optional): Spatial demand weight of every residence. Defaults to uniform demand.
+        seed (optional): Seed of the random number generator. Defaults to a random seed.
+
+    Yields:
+        SUMO IDs of destination residences of the orders placed in each step.
+    """
+    try:
+        assert len(building_id_list) > 0, "Attempted to generate demand over no residences"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    rng = np.random.default_rng(seed)
+    cumulative_weight_array = None
+    if weight_list is not None:
+        cumulative_weight_array = np.cumsum(np.asarray(weight_list, dtype=float))
+        cumulative_weight_array /= cumulative_weight_array[-1]
+
+    time = start_time
+    while True:
+        current_rate = rate(time) if callable(rate) else rate
+        count = rng.poisson(current_rate * step_length / 3600)
+
+        if cumulative_weight_array is None:
+            index_array = rng.integers(len(building_id_list), size=count)
+        else:
+            index_array = np.searchsorted(cumulative_weight_array, rng.random(count), side="right")
+
+        yield [building_id_list[index] for index in index_array]
+        time += step_length
+
+
+def poisson_demand(
+    building_id_list: Sequence[str],
+    rate: float | Callable[[float], float],
+    step_length: float = 1.0,
+    start_time: float = 0.0,
+    weight_list: Sequence[float] | None = None,
+    seed: int | None = None,
+    highlight: bool = False,
+) -> Iterator[list[Package]]:
+    """Stream packages of Poisson-distributed orders, one simulation step at a time.
+
+    Package objects are only created for the step that is being consumed, so that
+    no future orders are held in memory.
+
+    Args:
+        building_id_list: SUMO IDs of residences that may order packages.
+        rate: Demand rate in orders per simulated hour, or a function from simulation time in seconds to one.
+        step_length (optional): Length of a simulation step in seconds. Defaults to 1.
+        start_time (optional): Simulation time in seconds of the first step. Defaults to 0.
+        weight_list (optional): Spatial demand weight of every residence. Defaults to uniform demand.
+        seed (optional): Seed of the random number generator. Defaults to a random seed.
+        highlight (optional): Whether to color destination residence polygons in the simulation. Defaults to False.
+
+    Yields:
+        Packages ordered in each step.
+    """
+    for destination_id_list in poisson_destinations(
+        building_id_list, rate, step_length, start_time, weight_list, seed
+    ):
+        yield [
+            Package(destination_id, highlight=highlight)
+            for destination_id in destination_id_list
+        ]
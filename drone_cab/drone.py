@@ -17,6 +17,7 @@ import traci
 from drone_cab.package import Package
 from drone_cab.tunables import DRONE_CAPACITY, DRONE_RANGE, DRONE_SPEED
 from drone_cab.utils import euclidean_distance, shape2centroid
+from drone_cab.writebuffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -49,17 +50,17 @@ class Drone(traci.StepListener):
     def __init__(
         self,
         pickup_id: str,
-        drone_capacity: int = DRONE_CAPACITY(),
-        drone_speed: float = DRONE_SPEED(),
-        drone_range: float = DRONE_RANGE(),
+        drone_capacity: int | None = None,
+        drone_speed: float | None = None,
+        drone_range: float | None = None,
     ) -> None:
         self.pickup_id: str = pickup_id
         self.center: tuple[float, float] = shape2centroid(
             traci.polygon.getShape(self.pickup_id)
         )
-        self.capacity: int = drone_capacity
-        self.speed: float = drone_speed
-        self.range: float = drone_range
+        self.capacity: int = DRONE_CAPACITY() if drone_capacity is None else drone_capacity
+        self.speed: float = DRONE_SPEED() if drone_speed is None else drone_speed
+        self.range: float = DRONE_RANGE() if drone_range is None else drone_range
         self.parked: bool = True
         self.distance_travelled: float = 0.0
         self.distance_travelled_per_flight: float = 0.0
@@ -69,51 +70,62 @@ class Drone(traci.StepListener):
         self.current_position: tuple[float, float] = self.center
         self.carrying_package_set: set[Package] = set()
 
+        self.polygon_id: str = f"drone#{self.pickup_id}"
+        self.add_polygon()
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"Drone({self.center}, {self.capacity})"
+
+    def get_shape(self) -> list[tuple[float, float]]:
+        """Get the shape of the polygon that depicts this drone at its current position.
+
+        Returns:
+            List of 2-D coordinates of vertices of the drone polygon.
+        """
+        return [
+            # - +
+            (self.current_position[0] - 1, self.current_position[1] + 0.5),
+            (self.current_position[0] - 4, self.current_position[1] + 4),
+            (self.current_position[0] - 6, self.current_position[1] + 3),
+            (self.current_position[0] - 3, self.current_position[1] + 6),
+            (self.current_position[0] - 4, self.current_position[1] + 4),
+            (self.current_position[0] - 0.5, self.current_position[1] + 1),
+            # + +
+            (self.current_position[0] + 0.5, self.current_position[1] + 1),
+            (self.current_position[0] + 4, self.current_position[1] + 4),
+            (self.current_position[0] + 3, self.current_position[1] + 6),
+            (self.current_position[0] + 6, self.current_position[1] + 3),
+            (self.current_position[0] + 4, self.current_position[1] + 4),
+            (self.current_position[0] + 1, self.current_position[1] + 0.5),
+            # + -
+            (self.current_position[0] + 1, self.current_position[1] - 0.5),
+            (self.current_position[0] + 4, self.current_position[1] - 4),
+            (self.current_position[0] + 6, self.current_position[1] - 3),
+            (self.current_position[0] + 3, self.current_position[1] - 6),
+            (self.current_position[0] + 4, self.current_position[1] - 4),
+            (self.current_position[0] + 0.5, self.current_position[1] - 1),
+            # - -
+            (self.current_position[0] - 0.5, self.current_position[1] - 1),
+            (self.current_position[0] - 4, self.current_position[1] - 4),
+            (self.current_position[0] - 3, self.current_position[1] - 6),
+            (self.current_position[0] - 6, self.current_position[1] - 3),
+            (self.current_position[0] - 4, self.current_position[1] - 4),
+            (self.current_position[0] - 1, self.current_position[1] - 0.5),
+            # - +
+            (self.current_position[0] - 1, self.current_position[1] + 0.5),
+        ]
+
+    def add_polygon(self) -> None:
+        """Add the polygon that depicts this drone at its current position to the simulation."""
         traci.polygon.add(
-            polygonID=f"drone#{self.pickup_id}",
-            shape=[
-                # - +
-                (self.current_position[0] - 1, self.current_position[1] + 0.5),
-                (self.current_position[0] - 4, self.current_position[1] + 4),
-                (self.current_position[0] - 6, self.current_position[1] + 3),
-                (self.current_position[0] - 3, self.current_position[1] + 6),
-                (self.current_position[0] - 4, self.current_position[1] + 4),
-                (self.current_position[0] - 0.5, self.current_position[1] + 1),
-                # + +
-                (self.current_position[0] + 0.5, self.current_position[1] + 1),
-                (self.current_position[0] + 4, self.current_position[1] + 4),
-                (self.current_position[0] + 3, self.current_position[1] + 6),
-                (self.current_position[0] + 6, self.current_position[1] + 3),
-                (self.current_position[0] + 4, self.current_position[1] + 4),
-                (self.current_position[0] + 1, self.current_position[1] + 0.5),
-                # + -
-                (self.current_position[0] + 1, self.current_position[1] - 0.5),
-                (self.current_position[0] + 4, self.current_position[1] - 4),
-                (self.current_position[0] + 6, self.current_position[1] - 3),
-                (self.current_position[0] + 3, self.current_position[1] - 6),
-                (self.current_position[0] + 4, self.current_position[1] - 4),
-                (self.current_position[0] + 0.5, self.current_position[1] - 1),
-                # - -
-                (self.current_position[0] - 0.5, self.current_position[1] - 1),
-                (self.current_position[0] - 4, self.current_position[1] - 4),
-                (self.current_position[0] - 3, self.current_position[1] - 6),
-                (self.current_position[0] - 6, self.current_position[1] - 3),
-                (self.current_position[0] - 4, self.current_position[1] - 4),
-                (self.current_position[0] - 1, self.current_position[1] - 0.5),
-                # - +
-                (self.current_position[0] - 1, self.current_position[1] + 0.5),
-            ],
+            polygonID=self.polygon_id,
+            shape=self.get_shape(),
             color=(0, 0, 128),
             polygonType="drone",
             fill=True,
         )
 
-        self.polygon_id = f"drone#{self.pickup_id}"
-        logger.debug(f"Created {self}")
-
-    def __repr__(self) -> str:
-        return f"Drone({self.center}, {self.capacity})"
-
     def assign_package(self, package: Package) -> None:
         """Assign a package to this drone for being transported to its destination residence.
 
@@ -129,7 +141,7 @@ class Drone(traci.StepListener):
             return
 
         self.carrying_package_set.add(package)
-        logger.debug(f"Assigned drone of {package}: {self}")
+        logger.debug("Assigned drone of %s: %s", package, self)
 
     def christofides_route(self) -> list[Drone | Package]:
         """Find the drone route to follow as per Christofides approximation of TSP.
@@ -155,7 +167,9 @@ class Drone(traci.StepListener):
     def start_tsp(self) -> None:
         """Start the TSP route of the drone to start delivery of carrying_package_set."""
         self.route = iter(self.christofides_route())
-        logger.debug(f"Drone carrying packages: {self.carrying_package_set}")
+        logger.debug("Drone carrying packages: %s", self.carrying_package_set)
+        for package in self.carrying_package_set:
+            package.mark_departed()
         self.current_position = next(self.route).center
         self.current_target = next(self.route)
         self.parked = False
@@ -186,11 +200,12 @@ class Drone(traci.StepListener):
 
         self.carrying_package_set.remove(package)
         package.mark_delivered(distance_drone=self.distance_travelled_per_flight)
-        logger.debug(f"Delivered {package} by {self}")
+        logger.debug("Delivered %s by %s", package, self)
+        package.release()
 
     def fly_along_route(self):
         if self.current_position == self.current_target.center:
-            logger.debug(f"{self} reached target {self.current_target}")
+            logger.debug("%s reached target %s", self, self.current_target)
             if isinstance(self.current_target, Package):
                 self.drop_package(self.current_target)
             try:
@@ -212,44 +227,10 @@ class Drone(traci.StepListener):
             x + distance_step * math.cos(theta),
             y + distance_step * math.sin(theta),
         )
-        traci.polygon.setShape(
-            polygonID=self.polygon_id,
-            shape=[
-                # - +
-                (self.current_position[0] - 1, self.current_position[1] + 0.5),
-                (self.current_position[0] - 4, self.current_position[1] + 4),
-                (self.current_position[0] - 6, self.current_position[1] + 3),
-                (self.current_position[0] - 3, self.current_position[1] + 6),
-                (self.current_position[0] - 4, self.current_position[1] + 4),
-                (self.current_position[0] - 0.5, self.current_position[1] + 1),
-                # + +
-                (self.current_position[0] + 0.5, self.current_position[1] + 1),
-                (self.current_position[0] + 4, self.current_position[1] + 4),
-                (self.current_position[0] + 3, self.current_position[1] + 6),
-                (self.current_position[0] + 6, self.current_position[1] + 3),
-                (self.current_position[0] + 4, self.current_position[1] + 4),
-                (self.current_position[0] + 1, self.current_position[1] + 0.5),
-                # + -
-                (self.current_position[0] + 1, self.current_position[1] - 0.5),
-                (self.current_position[0] + 4, self.current_position[1] - 4),
-                (self.current_position[0] + 6, self.current_position[1] - 3),
-                (self.current_position[0] + 3, self.current_position[1] - 6),
-                (self.current_position[0] + 4, self.current_position[1] - 4),
-                (self.current_position[0] + 0.5, self.current_position[1] - 1),
-                # - -
-                (self.current_position[0] - 0.5, self.current_position[1] - 1),
-                (self.current_position[0] - 4, self.current_position[1] - 4),
-                (self.current_position[0] - 3, self.current_position[1] - 6),
-                (self.current_position[0] - 6, self.current_position[1] - 3),
-                (self.current_position[0] - 4, self.current_position[1] - 4),
-                (self.current_position[0] - 1, self.current_position[1] - 0.5),
-                # - +
-                (self.current_position[0] - 1, self.current_position[1] + 0.5),
-            ],
-        )
+        WriteBuffer.write("polygon", "setShape", self.polygon_id, self.get_shape())
         self.distance_travelled_per_flight += distance_step
         logger.debug(
-            f"{self} travelled by {distance_step} towards {self.current_target}"
+            "%s travelled by %s towards %s", self, distance_step, self.current_target
         )
 
     def step(self, t: int = 0):
@@ -0,0 +1,101 @@
+"""Structured event logging.
+
+Collection of functions that log structured simulation events (deliveries,
+assignments, dispatches and drops) as JSON lines, and that move all log
+file I/O onto a background thread.
+
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+
+logger = logging.getLogger(__name__)
+
+
+def is_event_logging_enabled() -> bool:
+    """Whether structured simulation events are logged at all.
+
+    Returns:
+        True if log_event would log, so that costly fields are worth computing.
+    """
+    return logger.isEnabledFor(logging.INFO)
+
+
+def log_event(event: str, **fields) -> None:
+    """Log a structured simulation event.
+
+    Note:
+        Field values should be plain (JSON-serializable) values rather than drone-cab objects,
+        since they are only serialized on the background logging thread.
+
+    Args:
+        event: Name of the event, e.g. "delivery".
+        **fields: Named values describing the event.
+    """
+    if is_event_logging_enabled():
+        logger.info(event, extra={"event_fields": fields})
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Formatter that renders event records as compact JSON lines."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(
+            {
+                "time": record.created,
+                "event": record.getMessage(),
+                **getattr(record, "event_fields", {}),
+            },
+            separators=(",", ":"),
+            default=str,
+        )
+
+
+def start_logging(
+    log_file: str,
+    level: int = logging.INFO,
+    event_log_file: str | None = None,
+    max_bytes: int = 1024 * 1024 * 256,
+) -> QueueListener:
+    """Configure logging so that log records are written to files from a background thread.
+
+    Regular log records are written to a rotating text log file, while event records
+    logged with log_event() are written to a separate JSON lines file, if any.
+
+    Args:
+        log_file: Path of the rotating text log file.
+        level (optional): Level of the root logger. Defaults to logging.INFO.
+        event_log_file (optional): Path of the JSON lines event log file. Defaults to no event log.
+        max_bytes (optional): Maximum size of the text log file before rollover. Defaults to 256 MiB.
+
+    Returns:
+        Started queue listener, which must be stopped to flush all pending records at exit.
+    """
+    text_handler = RotatingFileHandler(log_file, mode="w", maxBytes=max_bytes, backupCount=1)
+    text_handler.setFormatter(
+        logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    )
+    text_handler.addFilter(lambda record: record.name != logger.name)
+    handler_list: list[logging.Handler] = [text_handler]
+
+    if event_log_file is not None:
+        event_handler = logging.FileHandler(event_log_file, mode="w")
+        event_handler.setFormatter(JsonLinesFormatter())
+        event_handler.addFilter(logging.Filter(logger.name))
+        handler_list.append(event_handler)
+        logger.setLevel(logging.INFO)
+    else:
+        logger.setLevel(logging.WARNING)
+
+    queue: SimpleQueue = SimpleQueue()
+    logging.basicConfig(
+        handlers=[QueueHandler(queue)], format="%(message)s", level=level, force=True
+    )
+
+    listener = QueueListener(queue, *handler_list, respect_handler_level=True)
+    listener.start()
+    return listener
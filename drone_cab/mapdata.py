@@ -0,0 +1,376 @@
+"""Map file loaders.
+
+Collection of streaming loaders that read SUMO polygon (map.poly.xml) and
+network (map.net.xml) files into compact arrays, without TraCI and without
+building a DOM, so that memory stays constant with the size of the file.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Iterator
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shape(shape: str) -> list[tuple[float, float]]:
+    """Parse the shape attribute of a SUMO XML element.
+
+    Args:
+        shape: Space-separated "x,y" (or "x,y,z") coordinates of vertices.
+
+    Returns:
+        List of 2-D coordinates of vertices, dropping any elevation.
+    """
+    return [
+        (float(point[0]), float(point[1]))
+        for point in (point.split(",") for point in shape.split())
+    ]
+
+
+def iterparse_elements(path: str, tag_set: set[str]) -> Iterator[ET.Element]:
+    """Stream the elements of given tags of a SUMO XML file, freeing them once consumed.
+
+    Elements are yielded once fully parsed (including their children). Once the
+    consumer moves on, the element and everything parsed before it is cleared, so
+    only one top-level element is held in memory at a time.
+
+    Args:
+        path: Path of the XML file.
+        tag_set: Tags of the elements to yield.
+
+    Yields:
+        Elements of given tags, in document order.
+    """
+    context = ET.iterparse(path, events=("start", "end"))
+    _, root = next(context)
+    depth = 0
+    for event, element in context:
+        if event == "start":
+            depth += 1
+            continue
+
+        depth -= 1
+        if element.tag in tag_set:
+            yield element
+        if depth == 0:
+            root.clear()
+
+
+class ShapeTable:
+    """Compact table of shapes, stored as one coordinate array with per-shape offsets.
+
+    The vertices of the i-th shape are coordinate_array[offset_array[i]:offset_array[i + 1]].
+
+    Args:
+        id_list: SUMO IDs of the shapes.
+        offset_array: Start offsets of every shape into coordinate_array, plus the end, of shape (n + 1,).
+        coordinate_array: 2-D coordinates of vertices of all shapes, of shape (m, 2).
+
+    Attributes:
+        id_list: SUMO IDs of the shapes.
+        offset_array: Start offsets of every shape into coordinate_array, plus the end, of shape (n + 1,).
+        coordinate_array: 2-D coordinates of vertices of all shapes, of shape (m, 2).
+        index_dict: Row index in this table of every shape SUMO ID.
+    """
+
+    def __init__(
+        self,
+        id_list: list[str],
+        offset_array: np.ndarray,
+        coordinate_array: np.ndarray,
+    ) -> None:
+        self.id_list: list[str] = id_list
+        self.offset_array: np.ndarray = offset_array
+        self.coordinate_array: np.ndarray = coordinate_array.reshape(-1, 2)
+        self.index_dict: dict[str, int] = {
+            shape_id: index for index, shape_id in enumerate(self.id_list)
+        }
+
+    def __repr__(self) -> str:
+        return f"ShapeTable({len(self.id_list)} shapes)"
+
+    def __len__(self) -> int:
+        return len(self.id_list)
+
+    def get_shape(self, shape_id: str) -> np.ndarray:
+        """Get the vertices of a shape.
+
+        Args:
+            shape_id: SUMO ID of the shape.
+
+        Returns:
+            2-D coordinates of vertices of the shape, of shape (k, 2).
+        """
+        index = self.index_dict[shape_id]
+        return self.coordinate_array[self.offset_array[index] : self.offset_array[index + 1]]
+
+    def centroid_array(self) -> np.ndarray:
+        """Calculate the centroid (mean of vertices) of every shape, like shape2centroid.
+
+        Returns:
+            2-D coordinates of centroids of all shapes, of shape (n, 2).
+        """
+        count_array = np.diff(self.offset_array)
+        sum_array = np.add.reduceat(self.coordinate_array, self.offset_array[:-1], axis=0)
+        return sum_array / count_array[:, np.newaxis]
+
+    def area_array(self) -> np.ndarray:
+        """Calculate the area of every shape with the shoelace formula, like shape2area.
+
+        Returns:
+            Areas of all shapes, of shape (n,).
+        """
+        x_array, y_array = self.coordinate_array[:, 0], self.coordinate_array[:, 1]
+        next_index_array = np.arange(1, len(self.coordinate_array) + 1)
+        next_index_array[self.offset_array[1:] - 1] = self.offset_array[:-1]
+        cross_array = x_array * y_array[next_index_array] - x_array[next_index_array] * y_array
+        return np.abs(np.add.reduceat(cross_array, self.offset_array[:-1])) / 2
+
+
+def load_polygons(path: str, polygon_type_set: set[str] | None = None) -> dict[str, ShapeTable]:
+    """Load the polygons of a SUMO polygon file, grouped by type.
+
+    Note:
+        Shapes are read as they are written; polygons in geo-coordinates (geo="1") are not projected.
+        Polygons with fewer than 3 vertices are skipped, as they have neither a centroid nor an area.
+
+    Args:
+        path: Path of the polygon file, e.g. map.poly.xml.
+        polygon_type_set (optional): Types of polygons to load. Defaults to all types.
+
+    Returns:
+        ShapeTable of polygons per polygon type.
+    """
+    builder_dict: dict[str, tuple[list[str], array, array]] = {}
+    degenerate_id_list: list[str] = []
+    for element in iterparse_elements(path, {"poly"}):
+        polygon_type = element.get("type", "")
+        if polygon_type_set is not None and polygon_type not in polygon_type_set:
+            continue
+        shape = parse_shape(element.get("shape", ""))
+        if len(shape) < 3:
+            degenerate_id_list.append(element.get("id"))
+            continue
+
+        try:
+            id_list, offset_array, coordinate_array = builder_dict[polygon_type]
+        except KeyError:
+            id_list, offset_array, coordinate_array = [], array("q", [0]), array("d")
+            builder_dict[polygon_type] = (id_list, offset_array, coordinate_array)
+
+        id_list.append(element.get("id"))
+        for point in shape:
+            coordinate_array.extend(point)
+        offset_array.append(len(coordinate_array) // 2)
+
+    if degenerate_id_list:
+        logger.warning(
+            "Skipped %d polygons with fewer than 3 vertices in %s, e.g. %s",
+            len(degenerate_id_list),
+            path,
+            degenerate_id_list[0],
+        )
+    logger.debug("Loaded polygons of types %s from %s", sorted(builder_dict), path)
+    return {
+        polygon_type: ShapeTable(
+            id_list,
+            np.frombuffer(offset_array, dtype=np.int64),
+            np.frombuffer(coordinate_array, dtype=float),
+        )
+        for polygon_type, (id_list, offset_array, coordinate_array) in builder_dict.items()
+    }
+
+
+class NetworkTable:
+    """Compact table of the lanes, edges and edge connectivity of a SUMO network.
+
+    Args:
+        lane_table: Shapes of lanes.
+        lane_edge_index_array: Index of the edge of every lane, of shape (n_lanes,).
+        lane_length_array: Length of every lane, of shape (n_lanes,).
+        lane_allow_list: Allowed vehicle classes of every lane, as in the network file.
+        lane_disallow_list: Disallowed vehicle classes of every lane, as in the network file.
+        edge_id_list: SUMO IDs of edges.
+        edge_length_array: Length of every edge (its first lane), of shape (n_edges,).
+        successor_offset_array: Start offsets of every edge into successor_index_array, plus the end.
+        successor_index_array: Indices of successor edges of all edges, by connections.
+
+    Attributes:
+        lane_table: Shapes of lanes.
+        lane_edge_index_array: Index of the edge of every lane.
+        lane_length_array: Length of every lane.
+        lane_allow_list: Allowed vehicle classes of every lane, as in the network file.
+        lane_disallow_list: Disallowed vehicle classes of every lane, as in the network file.
+        edge_id_list: SUMO IDs of edges.
+        edge_index_dict: Index of every edge SUMO ID.
+        edge_length_array: Length of every edge (its first lane).
+        successor_offset_array: Start offsets of every edge into successor_index_array, plus the end.
+        successor_index_array: Indices of successor edges of all edges, by connections.
+    """
+
+    def __init__(
+        self,
+        lane_table: ShapeTable,
+        lane_edge_index_array: np.ndarray,
+        lane_length_array: np.ndarray,
+        lane_allow_list: list[str],
+        lane_disallow_list: list[str],
+        edge_id_list: list[str],
+        edge_length_array: np.ndarray,
+        successor_offset_array: np.ndarray,
+        successor_index_array: np.ndarray,
+    ) -> None:
+        self.lane_table: ShapeTable = lane_table
+        self.lane_edge_index_array: np.ndarray = lane_edge_index_array
+        self.lane_length_array: np.ndarray = lane_length_array
+        self.lane_allow_list: list[str] = lane_allow_list
+        self.lane_disallow_list: list[str] = lane_disallow_list
+        self.edge_id_list: list[str] = edge_id_list
+        self.edge_index_dict: dict[str, int] = {
+            edge_id: index for index, edge_id in enumerate(self.edge_id_list)
+        }
+        self.edge_length_array: np.ndarray = edge_length_array
+        self.successor_offset_array: np.ndarray = successor_offset_array
+        self.successor_index_array: np.ndarray = successor_index_array
+
+    def __repr__(self) -> str:
+        return f"NetworkTable({len(self.edge_id_list)} edges, {len(self.lane_table)} lanes)"
+
+    def get_lane_edge_id(self, lane_id: str) -> str:
+        """Get SUMO ID of the edge of a lane.
+
+        Args:
+            lane_id: SUMO ID of the lane.
+
+        Returns:
+            SUMO ID of the edge of the lane.
+        """
+        return self.edge_id_list[self.lane_edge_index_array[self.lane_table.index_dict[lane_id]]]
+
+    def get_successor_edge_id_list(self, edge_id: str) -> list[str]:
+        """Get SUMO IDs of edges that can be reached directly from an edge.
+
+        Args:
+            edge_id: SUMO ID of the edge.
+
+        Returns:
+            SUMO IDs of successor edges of the edge.
+        """
+        index = self.edge_index_dict[edge_id]
+        return [
+            self.edge_id_list[successor_index]
+            for successor_index in self.successor_index_array[
+                self.successor_offset_array[index] : self.successor_offset_array[index + 1]
+            ]
+        ]
+
+    def lane_allows(self, lane_id: str, vehicle_class: str) -> bool:
+        """Whether a lane allows a vehicle class, as per its allow and disallow attributes.
+
+        Args:
+            lane_id: SUMO ID of the lane.
+            vehicle_class: SUMO vehicle class, e.g. "passenger".
+
+        Returns:
+            True if the vehicle class may drive on the lane.
+        """
+        index = self.lane_table.index_dict[lane_id]
+        allow_list = self.lane_allow_list[index].split()
+        if allow_list:
+            return "all" in allow_list or vehicle_class in allow_list
+        disallow_list = self.lane_disallow_list[index].split()
+        return "all" not in disallow_list and vehicle_class not in disallow_list
+
+    @staticmethod
+    def from_net_file(path: str, include_internal: bool = False) -> NetworkTable:
+        """Load the network of a SUMO network file.
+
+        Args:
+            path: Path of the network file, e.g. map.net.xml.
+            include_internal (optional): Whether to load internal (junction) edges and lanes. Defaults to False.
+
+        Returns:
+            NetworkTable object of the network.
+        """
+        lane_id_list: list[str] = []
+        lane_offset_array = array("q", [0])
+        lane_coordinate_array = array("d")
+        lane_edge_index_array = array("q")
+        lane_length_array = array("d")
+        lane_allow_list: list[str] = []
+        lane_disallow_list: list[str] = []
+        edge_id_list: list[str] = []
+        edge_index_dict: dict[str, int] = {}
+        edge_length_array = array("d")
+        connection_from_array = array("q")
+        connection_to_array = array("q")
+        connection_set: set[tuple[int, int]] = set()
+
+        for element in iterparse_elements(path, {"edge", "connection"}):
+            if element.tag == "connection":
+                try:
+                    connection = (
+                        edge_index_dict[element.get("from")],
+                        edge_index_dict[element.get("to")],
+                    )
+                except KeyError:
+                    # Connection from or to an internal edge that was not loaded
+                    continue
+                if connection not in connection_set:
+                    connection_set.add(connection)
+                    connection_from_array.append(connection[0])
+                    connection_to_array.append(connection[1])
+                continue
+
+            if element.get("function") == "internal" and not include_internal:
+                continue
+
+            edge_index = len(edge_id_list)
+            edge_id_list.append(element.get("id"))
+            edge_index_dict[edge_id_list[-1]] = edge_index
+            lane_element_list = element.findall("lane")
+            edge_length_array.append(
+                float(lane_element_list[0].get("length")) if lane_element_list else 0.0
+            )
+            for lane_element in lane_element_list:
+                lane_id_list.append(lane_element.get("id"))
+                lane_edge_index_array.append(edge_index)
+                lane_length_array.append(float(lane_element.get("length")))
+                lane_allow_list.append(lane_element.get("allow", ""))
+                lane_disallow_list.append(lane_element.get("disallow", ""))
+                for point in parse_shape(lane_element.get("shape", "")):
+                    lane_coordinate_array.extend(point)
+                lane_offset_array.append(len(lane_coordinate_array) // 2)
+
+        connection_from = np.frombuffer(connection_from_array, dtype=np.int64)
+        connection_to = np.frombuffer(connection_to_array, dtype=np.int64)
+        order_array = np.argsort(connection_from, kind="stable")
+        successor_offset_array = np.zeros(len(edge_id_list) + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(connection_from, minlength=len(edge_id_list)),
+            out=successor_offset_array[1:],
+        )
+
+        network_table = NetworkTable(
+            ShapeTable(
+                lane_id_list,
+                np.frombuffer(lane_offset_array, dtype=np.int64),
+                np.frombuffer(lane_coordinate_array, dtype=float),
+            ),
+            np.frombuffer(lane_edge_index_array, dtype=np.int64),
+            np.frombuffer(lane_length_array, dtype=float),
+            lane_allow_list,
+            lane_disallow_list,
+            edge_id_list,
+            np.frombuffer(edge_length_array, dtype=float),
+            successor_offset_array,
+            connection_to[order_array],
+        )
+        logger.debug("Loaded %s from %s", network_table, path)
+        return network_table
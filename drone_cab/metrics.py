@@ -0,0 +1,317 @@
+"""Delivery metrics.
+
+This module implements a columnar sink that collects per-package
+delivery records and writes them out in batches as CSV, NPZ or Parquet.
+
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import math
+import os
+import zipfile
+from array import array
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from drone_cab.package import Package
+
+logger = logging.getLogger(__name__)
+
+#: Names of the string columns of a delivery record.
+STRING_COLUMN_LIST: list[str] = ["destination_id", "pickup_id", "vehicle_id"]
+
+#: Names of the lifecycle timestamp columns of a delivery record.
+TIME_COLUMN_LIST: list[str] = [
+    "created_time",
+    "assigned_time",
+    "pickup_time",
+    "departed_time",
+    "delivered_time",
+]
+
+#: Names and array typecodes of the numeric columns of a delivery record.
+NUMERIC_COLUMN_DICT: dict[str, str] = {
+    "created_step": "q",
+    "pickup_step": "q",
+    "delivered_step": "q",
+    "distance_vehicle": "d",
+    "distance_drone": "d",
+    **{name: "d" for name in TIME_COLUMN_LIST},
+}
+
+#: Names of the lifecycle stages of a package and the timestamps that they span.
+STAGE_DICT: dict[str, tuple[str, str]] = {
+    "queue": ("created_time", "assigned_time"),
+    "vehicle": ("assigned_time", "pickup_time"),
+    "pickup": ("pickup_time", "departed_time"),
+    "drone": ("departed_time", "delivered_time"),
+    "total": ("created_time", "delivered_time"),
+}
+
+
+class DeliveryMetrics:
+    """Sink that buffers delivery records of packages column-wise and flushes them in batches.
+
+    The output format is chosen by the extension of the given path: ".csv" appends rows to
+    a CSV file, ".npz" appends one array per column and batch to a NumPy archive, and
+    ".parquet" appends one row group per batch to a Parquet file (requires pyarrow).
+
+    Args:
+        path: Path of the output file.
+        batch_size (optional): Number of records to buffer before flushing them. Defaults to 4096.
+
+    Attributes:
+        path: Path of the output file.
+        format: Output format, one of "csv", "npz" or "parquet".
+        batch_size: Number of records to buffer before flushing them.
+        column_dict: Buffered column values of records that are yet to be flushed.
+        batch_count: Number of batches flushed so far.
+        record_count: Number of records recorded so far.
+    """
+
+    def __init__(self, path: str, batch_size: int = 4096) -> None:
+        self.path: str = path
+        self.format: str = os.path.splitext(path)[1].lstrip(".").lower()
+        try:
+            assert self.format in (
+                "csv",
+                "npz",
+                "parquet",
+            ), f"Unsupported delivery metrics format of {path=}"
+        except AssertionError as e:
+            logger.error("AssertionError", exc_info=True)
+            raise e
+
+        self.batch_size: int = batch_size
+        self.column_dict: dict[str, list | array] = {}
+        self.batch_count: int = 0
+        self.record_count: int = 0
+        self._parquet_writer = None
+        self._clear()
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"DeliveryMetrics({self.path})"
+
+    def __enter__(self) -> DeliveryMetrics:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _clear(self) -> None:
+        for name in STRING_COLUMN_LIST:
+            self.column_dict[name] = []
+        for name, typecode in NUMERIC_COLUMN_DICT.items():
+            self.column_dict[name] = array(typecode)
+
+    def record(self, package: Package) -> None:
+        """Buffer the delivery record of a package, flushing the buffer when it is full.
+
+        Args:
+            package: Package object to record, usually delivered.
+        """
+        column_dict = self.column_dict
+        column_dict["destination_id"].append(package.destination_id)
+        column_dict["pickup_id"].append(
+            package.assigned_pickup.id if package.assigned_pickup is not None else ""
+        )
+        column_dict["vehicle_id"].append(
+            package.assigned_vehicle.id if package.assigned_vehicle is not None else ""
+        )
+        column_dict["created_step"].append(package.created_step)
+        column_dict["pickup_step"].append(package.pickup_step)
+        column_dict["delivered_step"].append(package.delivered_step)
+        column_dict["distance_vehicle"].append(package.distance_vehicle)
+        column_dict["distance_drone"].append(package.distance_drone)
+        for name in TIME_COLUMN_LIST:
+            column_dict[name].append(getattr(package, name))
+        self.record_count += 1
+
+        if len(column_dict["destination_id"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all buffered records to the output file."""
+        if not self.column_dict["destination_id"]:
+            return
+        self._write_batch()
+
+    def _write_batch(self) -> None:
+        batch_dict: dict[str, np.ndarray] = {}
+        for name, values in self.column_dict.items():
+            if isinstance(values, array):
+                batch_dict[name] = np.array(values, dtype=values.typecode)
+            else:
+                batch_dict[name] = np.asarray(values, dtype=str)
+
+        if self.format == "csv":
+            write_header = not os.path.exists(self.path)
+            with open(self.path, "a", newline="") as csv_file:
+                writer = csv.writer(csv_file)
+                if write_header:
+                    writer.writerow(batch_dict.keys())
+                writer.writerows(zip(*(column.tolist() for column in batch_dict.values())))
+        elif self.format == "npz":
+            with zipfile.ZipFile(self.path, mode="a") as npz_file:
+                for name, column in batch_dict.items():
+                    with npz_file.open(f"{name}.{self.batch_count:06d}.npy", mode="w") as npy_file:
+                        np.lib.format.write_array(npy_file, column, allow_pickle=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.table(batch_dict)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+
+        logger.debug("Flushed %d records of %s", len(batch_dict["destination_id"]), self)
+        self.batch_count += 1
+        self._clear()
+
+    def close(self) -> None:
+        """Flush all buffered records and close the output file, which is written even if empty."""
+        if self.batch_count == 0:
+            # Writing the columns without records, so that runs without deliveries leave a result too
+            self._write_batch()
+        else:
+            self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+
+class LatencyReport:
+    """Collection of per-stage latencies of delivered packages, reported as percentiles.
+
+    The lifecycle of a package is split into the stages of STAGE_DICT: waiting in the
+    order queue for a vehicle, riding the vehicle, waiting at the pickup point for a
+    drone, flying on the drone, and the end-to-end total.
+
+    Args:
+        percentile_list (optional): Percentiles to report. Defaults to the 50th, 90th and 99th.
+
+    Attributes:
+        percentile_list: Percentiles to report.
+        latency_dict: Latencies in seconds per pickup point SUMO ID and per stage.
+    """
+
+    def __init__(self, percentile_list: list[float] | None = None) -> None:
+        self.percentile_list: list[float] = (
+            percentile_list if percentile_list is not None else [50.0, 90.0, 99.0]
+        )
+        self.latency_dict: dict[str, dict[str, array]] = {}
+
+    def __repr__(self) -> str:
+        return f"LatencyReport({len(self.latency_dict)} pickups)"
+
+    def record(self, package: Package) -> None:
+        """Record the stage latencies of a delivered package.
+
+        Args:
+            package: Delivered package object to record.
+        """
+        pickup_id = package.assigned_pickup.id if package.assigned_pickup is not None else ""
+        try:
+            stage_latency_dict = self.latency_dict[pickup_id]
+        except KeyError:
+            stage_latency_dict = {stage: array("d") for stage in STAGE_DICT}
+            self.latency_dict[pickup_id] = stage_latency_dict
+
+        for stage, (start, end) in STAGE_DICT.items():
+            stage_latency_dict[stage].append(getattr(package, end) - getattr(package, start))
+
+    def summary(self) -> dict[str, dict[str, dict[str, float]]]:
+        """Summarize the recorded latencies.
+
+        Returns:
+            Count, mean and percentiles of latencies per pickup point SUMO ID (and "all") and per stage.
+        """
+        summary_dict = {}
+        for pickup_id in sorted(self.latency_dict) + ["all"]:
+            summary_dict[pickup_id] = {}
+            for stage in STAGE_DICT:
+                if pickup_id == "all":
+                    latency_array = np.concatenate(
+                        [
+                            np.array(stage_latency_dict[stage], dtype=float)
+                            for stage_latency_dict in self.latency_dict.values()
+                        ]
+                        or [np.empty(0)]
+                    )
+                else:
+                    latency_array = np.array(self.latency_dict[pickup_id][stage], dtype=float)
+                latency_array = latency_array[~np.isnan(latency_array)]
+
+                stage_summary_dict = {"count": float(len(latency_array))}
+                if len(latency_array):
+                    stage_summary_dict["mean"] = float(latency_array.mean())
+                    for percentile, value in zip(
+                        self.percentile_list,
+                        np.percentile(latency_array, self.percentile_list),
+                    ):
+                        stage_summary_dict[f"p{percentile:g}"] = float(value)
+                summary_dict[pickup_id][stage] = stage_summary_dict
+
+        return summary_dict
+
+    def format(self) -> str:
+        """Format the summary of the recorded latencies as a table.
+
+        Returns:
+            Multi-line table of latency percentiles in seconds per pickup point and per stage.
+        """
+        column_list = ["count", "mean"] + [f"p{percentile:g}" for percentile in self.percentile_list]
+        lines = [f"{'pickup':<28} {'stage':<8}" + "".join(f" {column:>10}" for column in column_list)]
+        for pickup_id, stage_summary_dict in self.summary().items():
+            for stage, stage_summary in stage_summary_dict.items():
+                lines.append(
+                    f"{pickup_id:<28} {stage:<8}"
+                    + "".join(f" {stage_summary.get(column, math.nan):>10.1f}" for column in column_list)
+                )
+        return "\n".join(lines)
+
+
+def load_delivery_metrics(path: str) -> dict[str, np.ndarray]:
+    """Load delivery records written by a DeliveryMetrics sink.
+
+    Args:
+        path: Path of the CSV, NPZ or Parquet file to load.
+
+    Returns:
+        Dictionary of column names to column arrays.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".csv":
+        with open(path, newline="") as csv_file:
+            row_list = list(csv.reader(csv_file))
+        header, row_list = row_list[0], row_list[1:]
+        column_dict = {name: [row[i] for row in row_list] for i, name in enumerate(header)}
+        return {
+            name: np.asarray(values, dtype=NUMERIC_COLUMN_DICT.get(name, str))
+            for name, values in column_dict.items()
+        }
+
+    if extension == ".npz":
+        with np.load(path) as npz_file:
+            return {
+                name: np.concatenate(
+                    [npz_file[key] for key in sorted(npz_file.files) if key.split(".")[0] == name]
+                )
+                for name in STRING_COLUMN_LIST + list(NUMERIC_COLUMN_DICT)
+            }
+
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    return {name: table.column(name).to_numpy() for name in table.column_names}
@@ -11,64 +11,234 @@ import logging
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from drone_cab.building import BuildingTable
+    from drone_cab.metrics import DeliveryMetrics, LatencyReport
     from drone_cab.pickup import Pickup
+    from drone_cab.trace import TraceRecorder
+    from drone_cab.vehicle import Vehicle
 
 import traci
 
+from drone_cab.clock import Clock
+from drone_cab.events import log_event
+from drone_cab.store import (
+    STATUS_ASSIGNED,
+    STATUS_AT_PICKUP,
+    STATUS_DELIVERED,
+    STATUS_IN_FLIGHT,
+    PackageStore,
+)
 from drone_cab.utils import shape2centroid
+from drone_cab.writebuffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
 
+def _column_property(name: str, doc: str) -> property:
+    def getter(self: Package):
+        return Package.store.column_dict[name].item(self.index)
+
+    def setter(self: Package, value) -> None:
+        Package.store.column_dict[name][self.index] = value
+
+    return property(getter, setter, doc=doc)
+
+
 class Package:
     """Packages (or parcels) that get transported by cabs (vehicles) and drones.
 
+    A package is a lightweight handle into a row of Package.store, which holds the
+    state of all packages column-wise; the attributes below are views of that row.
+
     Args:
         destination_id: SUMO ID of residence where this package needs to be delivered.
+        highlight (optional): Whether to color the destination residence polygon in the simulation. Defaults to False, since colors only show in the GUI.
 
     Note:
         self.center has to be named this way to be compatiple with drone.center for christofides_route()
 
+    Note:
+        A package must not be used after release(), since its row may be recycled.
+
     Attributes:
+        index: Row index of this package in Package.store.
         destination_id: SUMO ID of destination residence.
         center: 2-D coordinates of the centroid of destination residence's polygon.
+        status: Lifecycle status of this package, one of the STATUS_* constants of drone_cab.store.
         assigned_pickup: Pickup object that this package has been assigned to.
+        assigned_vehicle: Vehicle object that this package has been assigned to.
+        drop_route_index: Index in assigned vehicle's route of the edge closest to assigned pickup point, or -1.
         reached_pickup: True if package has reached its assigned pickup point.
         reached_destination: True if package has reached its destination residence.
         distance_drone: Total distance by drone that this package has travelled.
         distance_vehicle: Total distance by vehicle (cab) that this package has travelled.
+        created_step: Simulation step at which this package was created.
+        pickup_step: Simulation step at which this package reached its pickup point, or -1.
+        delivered_step: Simulation step at which this package reached its destination, or -1.
+        created_time: Simulation time at which this package was created.
+        assigned_time: Simulation time at which this package was assigned to a vehicle, or NaN.
+        pickup_time: Simulation time at which this package was dropped off at its pickup point, or NaN.
+        departed_time: Simulation time at which this package departed from its pickup point by drone, or NaN.
+        delivered_time: Simulation time at which this package reached its destination, or NaN.
     """
 
-    def __init__(self, destination_id: str) -> None:
-        self.destination_id: str = destination_id
-        traci.polygon.setColor(self.destination_id, (222, 52, 235))
-        self.center: tuple[float, float] = shape2centroid(
-            traci.polygon.getShape(self.destination_id)
+    __slots__ = ("index",)
+
+    delivery_metrics: DeliveryMetrics | None = None  #: Sink that records every delivered package, if any.
+    latency_report: LatencyReport | None = None  #: Report that collects latencies of every delivered package, if any.
+    trace_recorder: TraceRecorder | None = None  #: Recorder of every package status transition, if any.
+    building_table: BuildingTable | None = None  #: Preloaded residence geometry to look up centroids in, if any.
+    store: PackageStore = PackageStore()  #: Columnar storage of the state of all packages.
+
+    status = _column_property("status", "Lifecycle status of this package.")
+    drop_route_index = _column_property(
+        "drop_route_index", "Index in assigned vehicle's route of the edge to drop off at, or -1."
+    )
+    distance_drone = _column_property("distance_drone", "Total distance by drone.")
+    distance_vehicle = _column_property("distance_vehicle", "Total distance by vehicle.")
+    created_step = _column_property("created_step", "Step of creation.")
+    pickup_step = _column_property("pickup_step", "Step of reaching pickup point, or -1.")
+    delivered_step = _column_property("delivered_step", "Step of reaching destination, or -1.")
+    created_time = _column_property("created_time", "Time of creation.")
+    assigned_time = _column_property("assigned_time", "Time of vehicle assignment, or NaN.")
+    pickup_time = _column_property("pickup_time", "Time of reaching pickup point, or NaN.")
+    departed_time = _column_property("departed_time", "Time of departing by drone, or NaN.")
+    delivered_time = _column_property("delivered_time", "Time of reaching destination, or NaN.")
+
+    def __init__(self, destination_id: str, highlight: bool = False) -> None:
+        if Package.building_table is not None:
+            center = Package.building_table.get_center(destination_id)
+        else:
+            center = shape2centroid(traci.polygon.getShape(destination_id))
+        self.index: int = Package.store.allocate(
+            self, destination_id, center, Clock.current_step, Clock.current_time
         )
-        self.assigned_pickup: Pickup | None = None
-        self.reached_pickup: bool = False
-        self.reached_destination: bool = False
-        self.distance_drone: float = 0.0
-        self.distance_vehicle: float = 0.0
-        logger.debug(f"Created {self} with center {self.center}")
+        if highlight:
+            self.highlight()
+        if Package.trace_recorder is not None:
+            Package.trace_recorder.record_package(self)
+        logger.debug("Created %s with center %s", self, self.center)
 
     def __repr__(self) -> str:
         return f"Package({self.destination_id})"
 
+    @property
+    def destination_id(self) -> str:
+        """SUMO ID of destination residence."""
+        store = Package.store
+        return store.destination_id_list[store.column_dict["destination_index"].item(self.index)]
+
+    @property
+    def center(self) -> tuple[float, float]:
+        """2-D coordinates of the centroid of destination residence's polygon."""
+        column_dict = Package.store.column_dict
+        return (
+            column_dict["center_x"].item(self.index),
+            column_dict["center_y"].item(self.index),
+        )
+
+    @property
+    def assigned_pickup(self) -> Pickup | None:
+        """Pickup object that this package has been assigned to, if any."""
+        pickup_index = Package.store.column_dict["pickup_index"].item(self.index)
+        return Package.store.pickup_list[pickup_index] if pickup_index >= 0 else None
+
+    @property
+    def assigned_vehicle(self) -> Vehicle | None:
+        """Vehicle object that this package has been assigned to, if any."""
+        vehicle_index = Package.store.column_dict["vehicle_index"].item(self.index)
+        return Package.store.vehicle_list[vehicle_index] if vehicle_index >= 0 else None
+
+    @property
+    def reached_pickup(self) -> bool:
+        """True if package has reached its assigned pickup point."""
+        return self.status in (STATUS_AT_PICKUP, STATUS_IN_FLIGHT, STATUS_DELIVERED)
+
+    @property
+    def reached_destination(self) -> bool:
+        """True if package has reached its destination residence."""
+        return self.status == STATUS_DELIVERED
+
+    def highlight(self) -> None:
+        """Color this package's destination residence polygon in the simulation."""
+        WriteBuffer.write("polygon", "setColor", self.destination_id, (222, 52, 235))
+
     def set_pickup(self, pickup: Pickup) -> None:
         """Set assigned pickup point for this package.
 
         Args:
             pickup: Pickup object that this package has been assigned to.
         """
-        self.assigned_pickup = pickup
-        logger.debug(f"Assigned pickup of {self} to {pickup}")
+        Package.store.column_dict["pickup_index"][self.index] = Package.store.register_pickup(
+            pickup
+        )
+        logger.debug("Assigned pickup of %s to %s", self, pickup)
+
+    def set_vehicle(self, vehicle: Vehicle) -> None:
+        """Set assigned vehicle for this package.
+
+        Args:
+            vehicle: Vehicle object that this package has been assigned to.
+        """
+        Package.store.column_dict["vehicle_index"][self.index] = Package.store.register_vehicle(
+            vehicle
+        )
+        self.status = STATUS_ASSIGNED
+        self.assigned_time = Clock.current_time
+        if Package.trace_recorder is not None:
+            Package.trace_recorder.record_package(self)
+        logger.debug("Assigned vehicle of %s to %s", self, vehicle)
+
+    def mark_reached_pickup(self) -> None:
+        """Mark package as dropped off at its assigned pickup point."""
+        self.status = STATUS_AT_PICKUP
+        self.pickup_step = Clock.current_step
+        self.pickup_time = Clock.current_time
+        if Package.trace_recorder is not None:
+            Package.trace_recorder.record_package(self)
+        logger.debug("%s reached pickup", self)
+
+    def mark_departed(self) -> None:
+        """Mark package as departed from its assigned pickup point by drone."""
+        self.status = STATUS_IN_FLIGHT
+        self.departed_time = Clock.current_time
+        if Package.trace_recorder is not None:
+            Package.trace_recorder.record_package(self)
+        logger.debug("%s departed from pickup", self)
 
     def mark_delivered(self, distance_drone: float):
-        """Mark package as delivered to destination residence."""
-        self.reached_destination = True
+        """Mark package as delivered to destination residence.
+
+        Args:
+            distance_drone: Total distance by drone that this package has travelled.
+        """
+        self.status = STATUS_DELIVERED
         self.distance_drone = distance_drone
-        logger.debug(f"{self} reached destination")
-        print(
-            f"{self} delivered through {self.assigned_pickup} with vehicle distance {self.distance_vehicle:.2f} m and drone distance {self.distance_drone:.2f} m"
+        self.delivered_step = Clock.current_step
+        self.delivered_time = Clock.current_time
+        logger.debug("%s reached destination", self)
+        log_event(
+            "delivery",
+            package=self.destination_id,
+            pickup=self.assigned_pickup.id if self.assigned_pickup is not None else None,
+            distance_vehicle=self.distance_vehicle,
+            distance_drone=self.distance_drone,
+        )
+        logger.info(
+            "%s delivered through %s with vehicle distance %.2f m and drone distance %.2f m",
+            self,
+            self.assigned_pickup,
+            self.distance_vehicle,
+            self.distance_drone,
         )
+        if Package.delivery_metrics is not None:
+            Package.delivery_metrics.record(self)
+        if Package.latency_report is not None:
+            Package.latency_report.record(self)
+        if Package.trace_recorder is not None:
+            Package.trace_recorder.record_package(self)
+
+    def release(self) -> None:
+        """Release this package's row in Package.store for recycling, once nothing needs it anymore."""
+        logger.debug("Released %s", self)
+        Package.store.release(self.index)
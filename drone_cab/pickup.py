@@ -16,6 +16,8 @@ import traci
 from matplotlib.patches import Wedge
 
 from drone_cab.drone import Drone
+from drone_cab.events import is_event_logging_enabled, log_event
+from drone_cab.placement import load_layout
 from drone_cab.tunables import PICKUP_CAPACITY, PICKUP_CENTER_LIST, DRONE_MAX_IDLE_STEPS
 from drone_cab.utils import euclidean_distance, get_nearest_edge_id
 
@@ -31,6 +33,7 @@ class Pickup(traci.StepListener):
     Args:
         pickup_center: 2-D coordinates of the center of the pickup point polyon.
         pickup_capacity (optional): Maximum number of packages that this pikcup point can store. Defaults to tunable constant.
+        nearest_edge_id (optional): SUMO ID of the road edge closest to this pickup point, if known. Defaults to searching all lanes.
 
     Attributes:
         center: 2-D coordinates of the center of the pickup point polyon.
@@ -45,14 +48,29 @@ class Pickup(traci.StepListener):
     def __init__(
         self,
         pickup_center: tuple[float, float],
-        pickup_capacity: int = PICKUP_CAPACITY(),
+        pickup_capacity: int | None = None,
+        nearest_edge_id: str | None = None,
     ) -> None:
         self.center: tuple[float, float] = pickup_center
-        self.capacity: int = pickup_capacity
+        self.capacity: int = PICKUP_CAPACITY() if pickup_capacity is None else pickup_capacity
         self.id: str = f"pickup#{hash(self.center)}"
         self.assigned_package_set: set[Package] = set()
         self.received_package_set: set[Package] = set()
 
+        self.add_polygon()
+
+        self.drone: Drone = Drone(self.id)
+        self.nearest_edge_id: str = (
+            nearest_edge_id if nearest_edge_id is not None else get_nearest_edge_id(self.id)
+        )
+
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"Pickup({self.center}, {self.capacity})"
+
+    def add_polygon(self) -> None:
+        """Add the polygon that depicts this pickup point to the simulation."""
         traci.polygon.add(
             polygonID=self.id,
             shape=[
@@ -67,14 +85,6 @@ class Pickup(traci.StepListener):
             fill=True,
         )
 
-        self.drone: Drone = Drone(self.id)
-        self.nearest_edge_id: str = get_nearest_edge_id(self.id)
-
-        logger.debug(f"Created {self}")
-
-    def __repr__(self) -> str:
-        return f"Pickup({self.center}, {self.capacity})"
-
     def assign_package(self, package: Package) -> None:
         """Assign a package to this pickup point for storage after being dropped off by a vehicle.
 
@@ -90,7 +100,7 @@ class Pickup(traci.StepListener):
             return
 
         self.assigned_package_set.add(package)
-        logger.debug(f"Assigned pickup of {package} to {self}")
+        logger.debug("Assigned pickup of %s to %s", package, self)
 
     def add_package(self, package: Package) -> None:
         """Add a package to this pickup point's storage.
@@ -119,19 +129,23 @@ class Pickup(traci.StepListener):
 
         self.assigned_package_set.remove(package)
         self.received_package_set.add(package)
-        logger.debug(f"Dropped {package} at {self}")
+        logger.debug("Dropped %s at %s", package, self)
 
     def init_tsp(self):
-        logger.debug(f"Starting TSP of {self.drone}")
+        logger.debug("Starting TSP of %s", self.drone)
 
         farthest_package = max(
             self.received_package_set,
             key=lambda package: euclidean_distance(self.center, package.center),
         )
-        for i in self.received_package_set:
-            logger.debug(
-                f"{i} at distance {euclidean_distance(self.center, i.center)} from {self}"
-            )
+        if logger.isEnabledFor(logging.DEBUG):
+            for i in self.received_package_set:
+                logger.debug(
+                    "%s at distance %s from %s",
+                    i,
+                    euclidean_distance(self.center, i.center),
+                    self,
+                )
 
         radius = euclidean_distance(self.center, farthest_package.center)
         theta = self.drone.range / radius - 2
@@ -154,10 +168,11 @@ class Pickup(traci.StepListener):
             theta2=theta2,
         )
 
-        logger.debug(f"sector: {self.sector}")
+        logger.debug("sector: %s", self.sector)
 
-        for i in self.received_package_set:
-            logger.debug(f"{i}, in sector: {self.sector.contains_point(i.center)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            for i in self.received_package_set:
+                logger.debug("%s, in sector: %s", i, self.sector.contains_point(i.center))
 
         delivery_packages = set(
             [
@@ -166,7 +181,12 @@ class Pickup(traci.StepListener):
                 if self.sector.contains_point(package.center)
             ]
         )
-        logger.debug(f"{delivery_packages=}")
+        logger.debug("delivery_packages=%s", delivery_packages)
+
+        if not delivery_packages:
+            # Sector is degenerate when the farthest package lies far beyond drone range
+            delivery_packages.add(farthest_package)
+            logger.debug("Falling back to %s since sector of %s is empty", farthest_package, self)
 
         while len(delivery_packages) > self.drone.capacity:
             package_to_remove = min(
@@ -175,13 +195,16 @@ class Pickup(traci.StepListener):
             )
             delivery_packages.remove(package_to_remove)
             logger.debug(
-                f"Removed {package_to_remove} from {self.drone} due to capacity being at {len(delivery_packages)}"
+                "Removed %s from %s due to capacity being at %d",
+                package_to_remove,
+                self.drone,
+                len(delivery_packages),
             )
 
         for package in delivery_packages:
             self.received_package_set.remove(package)
-            logger.debug(f"Removed {package} from {self}")
-            logger.debug(f"Added {package} to {self.drone}")
+            logger.debug("Removed %s from %s", package, self)
+            logger.debug("Added %s to %s", package, self.drone)
             self.drone.assign_package(package)
 
         try:
@@ -190,6 +213,13 @@ class Pickup(traci.StepListener):
             logger.error("AssertionError", exc_info=True)
             raise e
 
+        if is_event_logging_enabled():
+            log_event(
+                "dispatch",
+                pickup=self.id,
+                package_list=[package.destination_id for package in self.drone.carrying_package_set],
+                waiting=len(self.received_package_set),
+            )
         self.drone.start_tsp()
 
     def step(self, t: int = 0):
@@ -204,10 +234,18 @@ class Pickup(traci.StepListener):
         return True
 
     @staticmethod
-    def create_pickup_list() -> list[Pickup]:
-        """Produce pickup object list created with preset tunable pickup_center values.
+    def create_pickup_list(layout_path: str | None = None) -> list[Pickup]:
+        """Produce pickup object list created with preset tunable pickup_center values, or from a layout file.
+
+        Args:
+            layout_path (optional): Path of a pickup layout file, as written by drone_cab.placement. Defaults to None, i.e. PICKUP_CENTER_LIST.
 
         Returns:
             List of pickup objects.
         """
-        return [Pickup(pickup_center) for pickup_center in PICKUP_CENTER_LIST()]
+        if layout_path is None:
+            return [Pickup(pickup_center) for pickup_center in PICKUP_CENTER_LIST()]
+        return [
+            Pickup(pickup_center, nearest_edge_id=nearest_edge_id)
+            for pickup_center, nearest_edge_id in load_layout(layout_path)
+        ]
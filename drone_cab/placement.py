@@ -0,0 +1,369 @@
+"""Pickup placement.
+
+This module computes the locations of pickup points for any map, as a set
+cover of building centroids by candidate sites sampled along drivable
+edges, and reads and writes the resulting pickup layout files. A layout
+for a new map can be computed with:
+
+    python -m drone_cab.placement --net-file map.net.xml --poly-file map.poly.xml -o layout.json
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+
+from drone_cab.building import BuildingTable
+from drone_cab.mapdata import NetworkTable
+from drone_cab.tunables import DRONE_RANGE, PLACEMENT_SITE_SPACING, load_tunable_overrides
+
+logger = logging.getLogger(__name__)
+
+#: Version of the layout file format, bumped on incompatible changes.
+LAYOUT_VERSION: int = 1
+
+
+def sample_candidate_sites(
+    network_table: NetworkTable,
+    spacing: float | None = None,
+    vehicle_class: str = "passenger",
+) -> tuple[np.ndarray, list[str]]:
+    """Sample candidate pickup sites at regular intervals along the edges that vehicles may drive on.
+
+    Sites are sampled along the first lane of every edge that allows the vehicle
+    class, at distances spacing / 2, 3 * spacing / 2, ... from its start, and at
+    its midpoint if it is shorter than that.
+
+    Args:
+        network_table: Network of the map.
+        spacing (optional): Distance between consecutive sites along a lane. Defaults to tunable constant.
+        vehicle_class (optional): SUMO vehicle class of vehicles. Defaults to "passenger".
+
+    Returns:
+        2-D coordinates of sites, of shape (n, 2), and SUMO IDs of their edges.
+    """
+    if spacing is None:
+        spacing = PLACEMENT_SITE_SPACING()
+    lane_table = network_table.lane_table
+    site_array_list: list[np.ndarray] = []
+    edge_id_list: list[str] = []
+    sampled_edge_index_set: set[int] = set()
+
+    for lane_index, lane_id in enumerate(lane_table.id_list):
+        edge_index = int(network_table.lane_edge_index_array[lane_index])
+        if edge_index in sampled_edge_index_set or not network_table.lane_allows(
+            lane_id, vehicle_class
+        ):
+            continue
+        sampled_edge_index_set.add(edge_index)
+
+        shape = lane_table.coordinate_array[
+            lane_table.offset_array[lane_index] : lane_table.offset_array[lane_index + 1]
+        ]
+        distance_array = np.concatenate(
+            ([0.0], np.cumsum(np.hypot(*np.diff(shape, axis=0).T)))
+        )
+        sample_distance_array = np.arange(spacing / 2, distance_array[-1], spacing)
+        if not len(sample_distance_array):
+            sample_distance_array = distance_array[-1:] / 2
+
+        site_array_list.append(
+            np.column_stack(
+                (
+                    np.interp(sample_distance_array, distance_array, shape[:, 0]),
+                    np.interp(sample_distance_array, distance_array, shape[:, 1]),
+                )
+            )
+        )
+        edge_id_list.extend(
+            [network_table.edge_id_list[edge_index]] * len(sample_distance_array)
+        )
+
+    site_array = np.concatenate(site_array_list) if site_array_list else np.empty((0, 2))
+    logger.debug(
+        "Sampled %d candidate sites along %d edges", len(site_array), len(sampled_edge_index_set)
+    )
+    return site_array, edge_id_list
+
+
+def get_coverage_matrix(
+    site_array: np.ndarray, center_array: np.ndarray, radius: float
+) -> csr_matrix:
+    """Find which candidate sites cover which buildings, i.e. lie within radius of their centroids.
+
+    Args:
+        site_array: 2-D coordinates of candidate sites, of shape (n_sites, 2).
+        center_array: 2-D coordinates of centroids of buildings, of shape (n_buildings, 2).
+        radius: Maximum distance between a site and a building that it covers.
+
+    Returns:
+        Sparse boolean matrix of shape (n_buildings, n_sites), True where the site covers the building.
+    """
+    site_index_list_array = cKDTree(site_array).query_ball_point(center_array, radius)
+    indptr = np.zeros(len(center_array) + 1, dtype=np.int64)
+    np.cumsum([len(site_index_list) for site_index_list in site_index_list_array], out=indptr[1:])
+    indices = (
+        np.concatenate(site_index_list_array).astype(np.int64)
+        if indptr[-1]
+        else np.empty(0, dtype=np.int64)
+    )
+    return csr_matrix(
+        (np.ones(len(indices), dtype=bool), indices, indptr),
+        shape=(len(center_array), len(site_array)),
+    )
+
+
+def greedy_set_cover(coverage_matrix: csr_matrix) -> list[int]:
+    """Choose sites that cover every coverable building, greedily by number of newly covered buildings.
+
+    The greedy choice covers all buildings with at most H(k) (about ln k) times the
+    optimal number of sites, where k is the most buildings covered by any site.
+
+    Args:
+        coverage_matrix: Sparse boolean matrix of shape (n_buildings, n_sites), as per get_coverage_matrix.
+
+    Returns:
+        Indices of chosen sites, in order of choice.
+    """
+    coverage_matrix = coverage_matrix.tocsr()
+    site_building_matrix = coverage_matrix.T.tocsr()
+    uncovered = np.diff(coverage_matrix.indptr) > 0
+    gain_array = np.bincount(coverage_matrix.indices, minlength=coverage_matrix.shape[1])
+
+    chosen_site_index_list: list[int] = []
+    while len(gain_array) and gain_array.max() > 0:
+        site_index = int(np.argmax(gain_array))
+        chosen_site_index_list.append(site_index)
+
+        building_index_array = site_building_matrix.indices[
+            site_building_matrix.indptr[site_index] : site_building_matrix.indptr[site_index + 1]
+        ]
+        building_index_array = building_index_array[uncovered[building_index_array]]
+        uncovered[building_index_array] = False
+        gain_array -= np.bincount(
+            coverage_matrix[building_index_array].indices, minlength=len(gain_array)
+        )
+
+    return chosen_site_index_list
+
+
+def ilp_set_cover(coverage_matrix: csr_matrix, time_limit: float | None = None) -> list[int]:
+    """Choose the fewest sites that cover every coverable building, by solving the set cover ILP.
+
+    Note:
+        Requires PuLP (and its bundled CBC solver), which is not a dependency of drone-cab.
+
+    Args:
+        coverage_matrix: Sparse boolean matrix of shape (n_buildings, n_sites), as per get_coverage_matrix.
+        time_limit (optional): Time limit of the solver in seconds. Defaults to None, i.e. no limit.
+
+    Returns:
+        Indices of chosen sites.
+
+    Raises:
+        AssertionError: If the solver did not find a feasible solution.
+    """
+    import pulp as pl
+
+    coverage_matrix = coverage_matrix.tocsr()
+    site_index_array = np.unique(coverage_matrix.indices)
+    problem = pl.LpProblem("pickup_placement", pl.LpMinimize)
+    x = {
+        site_index: pl.LpVariable(f"x_{site_index}", cat=pl.LpBinary)
+        for site_index in site_index_array.tolist()
+    }
+    problem += pl.lpSum(x.values())
+    for building_index in range(coverage_matrix.shape[0]):
+        row = coverage_matrix.indices[
+            coverage_matrix.indptr[building_index] : coverage_matrix.indptr[building_index + 1]
+        ]
+        if len(row):
+            problem += pl.lpSum(x[site_index] for site_index in row.tolist()) >= 1
+
+    problem.solve(pl.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    try:
+        assert problem.sol_status in (
+            pl.LpSolutionOptimal,
+            pl.LpSolutionIntegerFeasible,
+        ), f"Set cover ILP has no feasible solution, status={pl.LpStatus[problem.status]}"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    return [site_index for site_index, variable in x.items() if variable.value() > 0.5]
+
+
+def place_pickups(
+    network_table: NetworkTable,
+    building_table: BuildingTable,
+    drone_range: float | None = None,
+    spacing: float | None = None,
+    vehicle_class: str = "passenger",
+    method: str = "greedy",
+) -> dict:
+    """Compute a pickup layout that brings every building within a round trip of a drone.
+
+    A building is covered by a pickup point if its centroid lies within half the
+    drone range of it. Buildings that no candidate site covers are left out, and
+    listed in the layout.
+
+    Args:
+        network_table: Network of the map.
+        building_table: Residences of the map.
+        drone_range (optional): Maximum flying range of drones. Defaults to tunable constant.
+        spacing (optional): Distance between consecutive candidate sites along a lane. Defaults to tunable constant.
+        vehicle_class (optional): SUMO vehicle class of vehicles. Defaults to "passenger".
+        method (optional): Set cover method, "greedy" or "ilp" (requires PuLP). Defaults to "greedy".
+
+    Returns:
+        Pickup layout, as read and written by load_layout and save_layout.
+    """
+    if drone_range is None:
+        drone_range = DRONE_RANGE()
+    site_array, site_edge_id_list = sample_candidate_sites(network_table, spacing, vehicle_class)
+    coverage_matrix = get_coverage_matrix(site_array, building_table.center_array, drone_range / 2)
+
+    if method == "ilp":
+        site_index_list = ilp_set_cover(coverage_matrix)
+    else:
+        site_index_list = greedy_set_cover(coverage_matrix)
+
+    uncovered_building_id_list = [
+        building_table.id_list[building_index]
+        for building_index in np.flatnonzero(np.diff(coverage_matrix.indptr) == 0).tolist()
+    ]
+    if uncovered_building_id_list:
+        logger.warning(
+            "%d of %d buildings are out of drone range of every candidate site",
+            len(uncovered_building_id_list),
+            len(building_table),
+        )
+    logger.info(
+        "Placed %d pickups out of %d candidate sites with method=%s",
+        len(site_index_list),
+        len(site_array),
+        method,
+    )
+
+    return {
+        "version": LAYOUT_VERSION,
+        "drone_range": drone_range,
+        "spacing": spacing,
+        "vehicle_class": vehicle_class,
+        "method": method,
+        "pickup_list": [
+            {
+                "center": site_array[site_index].tolist(),
+                "edge_id": site_edge_id_list[site_index],
+            }
+            for site_index in site_index_list
+        ],
+        "uncovered_building_id_list": uncovered_building_id_list,
+    }
+
+
+def save_layout(layout_path: str, layout: dict) -> None:
+    """Save a pickup layout to a JSON file.
+
+    Args:
+        layout_path: Path of the layout file.
+        layout: Pickup layout, as per place_pickups.
+    """
+    with open(layout_path, "w") as layout_file:
+        json.dump(layout, layout_file, indent=2)
+    logger.info("Saved %d pickups to %s", len(layout["pickup_list"]), layout_path)
+
+
+def load_layout(layout_path: str) -> list[tuple[tuple[float, float], str | None]]:
+    """Load the pickup points of a pickup layout JSON file.
+
+    Args:
+        layout_path: Path of the layout file.
+
+    Returns:
+        List of 2-D coordinates of centers of pickup points, with SUMO IDs of their edges if known.
+
+    Raises:
+        AssertionError: If the layout file was written with an incompatible version of drone-cab.
+    """
+    with open(layout_path) as layout_file:
+        layout = json.load(layout_file)
+
+    try:
+        assert (
+            layout.get("version") == LAYOUT_VERSION
+        ), f"Layout version={layout.get('version')} is incompatible with version={LAYOUT_VERSION}"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    return [
+        ((float(pickup["center"][0]), float(pickup["center"][1])), pickup.get("edge_id"))
+        for pickup in layout["pickup_list"]
+    ]
+
+
+def main() -> None:
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    parser = argparse.ArgumentParser(description="Compute the pickup layout of a map.")
+    parser.add_argument(
+        "--net-file", default=os.path.join(data_dir, "map.net.xml"), help="path of the SUMO network file"
+    )
+    parser.add_argument(
+        "--poly-file", default=os.path.join(data_dir, "map.poly.xml"), help="path of the SUMO polygon file"
+    )
+    parser.add_argument(
+        "-o", "--output", default="pickup_layout.json", help="path of the pickup layout file to write"
+    )
+    parser.add_argument(
+        "--drone-range",
+        type=float,
+        default=None,
+        help="maximum flying range of drones; defaults to the DRONE_RANGE tunable",
+    )
+    parser.add_argument(
+        "--spacing",
+        type=float,
+        default=None,
+        help="distance between consecutive candidate sites along a lane; "
+        "defaults to the PLACEMENT_SITE_SPACING tunable",
+    )
+    parser.add_argument(
+        "--vehicle-class", default="passenger", help="SUMO vehicle class of vehicles"
+    )
+    parser.add_argument(
+        "--method",
+        default="greedy",
+        choices=["greedy", "ilp"],
+        help="set cover method; ilp finds the fewest pickups but requires PuLP",
+    )
+    parser.add_argument(
+        "--tunables",
+        default=None,
+        help="path of the JSON file of overridden tunables, as found by python -m drone_cab.tuning",
+    )
+    args = parser.parse_args()
+    if args.tunables is not None:
+        load_tunable_overrides(args.tunables)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    layout = place_pickups(
+        NetworkTable.from_net_file(args.net_file),
+        BuildingTable.from_poly_file(args.poly_file),
+        args.drone_range,
+        args.spacing,
+        args.vehicle_class,
+        args.method,
+    )
+    save_layout(args.output, layout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""TraCI profiling utilities.
+
+This module implements an optional proxy around the traci module that
+accounts for the number of TraCI calls and their latency, both per
+domain method and per calling drone-cab function.
+
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Callable
+
+import traci
+
+logger = logging.getLogger(__name__)
+
+
+#: Names of traci domains that are wrapped by the profiler.
+TRACI_DOMAIN_LIST: list[str] = [
+    "edge",
+    "lane",
+    "poi",
+    "polygon",
+    "route",
+    "simulation",
+    "vehicle",
+    "vehicletype",
+]
+
+
+def find_caller() -> str:
+    """Find the innermost drone-cab function on the current call stack.
+
+    Returns:
+        Qualified name of the innermost drone-cab function, or "<external>" if there is none.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module_name = frame.f_globals.get("__name__", "")
+        if module_name.startswith("drone_cab") and module_name != __name__:
+            return f"{module_name}.{frame.f_code.co_qualname}"
+        frame = frame.f_back
+    return "<external>"
+
+
+class _DomainProxy:
+    """Stand-in for a traci domain that forwards every call through the profiler."""
+
+    def __init__(self, domain_name: str, domain: Any, profiler: TraciProfiler) -> None:
+        self._domain_name = domain_name
+        self._domain = domain
+        self._profiler = profiler
+        self._wrapper_dict: dict[str, Callable] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._domain, name)
+        if not callable(attribute) or name.startswith("_"):
+            return attribute
+
+        try:
+            return self._wrapper_dict[name]
+        except KeyError:
+            pass
+
+        key = f"{self._domain_name}.{name}"
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                self._profiler.record(key, time.perf_counter() - start)
+
+        self._wrapper_dict[name] = wrapper
+        return wrapper
+
+
+class TraciProfiler(traci.StepListener):
+    """Proxy around the traci module that counts calls and their latency.
+
+    The profiler replaces the traci domain modules (traci.polygon, traci.vehicle, ...)
+    with proxies for as long as it is installed, so that no drone-cab code has to change.
+    It must be installed after traci.start() and before any other step listener is added,
+    since simulationStep() latency is measured up to the first step listener being called.
+
+    Args:
+        top (optional): Number of top offenders to report. Defaults to 10.
+        log_steps (optional): Whether to log the top offenders of every simulation step. Defaults to True.
+
+    Attributes:
+        top: Number of top offenders to report.
+        log_steps: Whether to log the top offenders of every simulation step.
+        step_count: Number of simulation steps taken so far, calls before the first step being accounted to step 0.
+        method_stats: Call count and total latency (seconds) per traci domain method over the run.
+        caller_stats: Call count and total latency (seconds) per calling drone-cab function over the run.
+        step_stats: Call count and total latency (seconds) per traci domain method in the current step.
+        slowest_step_heap: Min-heap of (latency, step, calls) of the slowest steps so far.
+    """
+
+    def __init__(self, top: int = 10, log_steps: bool = True) -> None:
+        self.top: int = top
+        self.log_steps: bool = log_steps
+        self.step_count: int = 0
+        self.method_stats: defaultdict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.caller_stats: defaultdict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.step_stats: defaultdict[str, list] = defaultdict(lambda: [0, 0.0])
+        self.slowest_step_heap: list[tuple[float, int, int]] = []
+        self._original_dict: dict[str, Any] = {}
+        self._step_start: float | None = None
+        self._listener_id: int | None = None
+
+    def __repr__(self) -> str:
+        return f"TraciProfiler({self.step_count} steps)"
+
+    def __enter__(self) -> TraciProfiler:
+        self.install()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.uninstall()
+
+    def install(self) -> None:
+        """Replace traci domains and simulationStep() with profiling proxies."""
+        try:
+            assert not self._original_dict, f"Attempted to install already-installed {self}"
+        except AssertionError:
+            logger.warning("AssertionError", exc_info=True)
+            return
+
+        for domain_name in TRACI_DOMAIN_LIST:
+            domain = getattr(traci, domain_name)
+            self._original_dict[domain_name] = domain
+            setattr(traci, domain_name, _DomainProxy(domain_name, domain, self))
+
+        simulation_step = traci.simulationStep
+        self._original_dict["simulationStep"] = simulation_step
+
+        def wrapper(step: float = 0):
+            self.end_step()
+            self.step_count += 1
+            self._step_start = time.perf_counter()
+            return simulation_step(step)
+
+        traci.simulationStep = wrapper
+        self._listener_id = traci.addStepListener(self)
+        logger.debug("Installed %s", self)
+
+    def uninstall(self) -> None:
+        """Restore the original traci domains and simulationStep()."""
+        self.end_step()
+        if self._listener_id is not None:
+            traci.removeStepListener(self._listener_id)
+            self._listener_id = None
+        for name, original in self._original_dict.items():
+            setattr(traci, name, original)
+        self._original_dict.clear()
+        logger.debug("Uninstalled %s", self)
+
+    def record(self, key: str, latency: float, caller: str | None = None) -> None:
+        """Account for a single TraCI call.
+
+        Args:
+            key: Name of the called traci domain method, e.g. "polygon.getShape".
+            latency: Wall time spent in the call, in seconds.
+            caller (optional): Name of the calling drone-cab function. Defaults to the innermost one on the stack.
+        """
+        if caller is None:
+            caller = find_caller()
+        for stats in (self.method_stats[key], self.step_stats[key], self.caller_stats[caller]):
+            stats[0] += 1
+            stats[1] += latency
+
+    def end_step(self) -> None:
+        """Close accounting of the current step and log its top offenders."""
+        if not self.step_stats:
+            return
+
+        calls = sum(stats[0] for stats in self.step_stats.values())
+        latency = sum(stats[1] for stats in self.step_stats.values())
+        heapq.heappush(self.slowest_step_heap, (latency, self.step_count, calls))
+        if len(self.slowest_step_heap) > self.top:
+            heapq.heappop(self.slowest_step_heap)
+
+        if self.log_steps and logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "TraCI step=%d calls=%d latency=%.3f ms top: %s",
+                self.step_count,
+                calls,
+                latency * 1e3,
+                ", ".join(
+                    f"{key} {count}x {total * 1e3:.3f} ms"
+                    for key, (count, total) in self._top_items(self.step_stats)
+                ),
+            )
+
+        self.step_stats.clear()
+
+    def step(self, t: int = 0):
+        t += 0
+
+        if self._step_start is not None:
+            self.record("simulationStep", time.perf_counter() - self._step_start, "<simulation>")
+            self._step_start = None
+
+        return True
+
+    def _top_items(self, stats_dict: dict[str, list]) -> list[tuple[str, list]]:
+        return sorted(stats_dict.items(), key=lambda item: item[1][1], reverse=True)[: self.top]
+
+    def report(self) -> str:
+        """Produce a report of the top offenders over the whole run.
+
+        Returns:
+            Multi-line report of the top traci methods, drone-cab callers and slowest steps.
+        """
+        self.end_step()
+        total_calls = sum(stats[0] for stats in self.method_stats.values())
+        total_latency = sum(stats[1] for stats in self.method_stats.values())
+
+        lines = [
+            f"TraCI calls: {total_calls} in {total_latency:.3f} s over {self.step_count} steps",
+            f"{'method':<40} {'calls':>10} {'total ms':>12} {'mean us':>10}",
+        ]
+        for key, (count, total) in self._top_items(self.method_stats):
+            lines.append(f"{key:<40} {count:>10} {total * 1e3:>12.3f} {total / count * 1e6:>10.1f}")
+
+        lines.append(f"{'caller':<72} {'calls':>10} {'total ms':>12}")
+        for key, (count, total) in self._top_items(self.caller_stats):
+            lines.append(f"{key:<72} {count:>10} {total * 1e3:>12.3f}")
+
+        lines.append(f"{'slowest step':<12} {'calls':>10} {'total ms':>12}")
+        for latency, step, calls in sorted(self.slowest_step_heap, reverse=True):
+            lines.append(f"{step:<12} {calls:>10} {latency * 1e3:>12.3f}")
+
+        return "\n".join(lines)
@@ -0,0 +1,204 @@
+"""OrderScheduler class.
+
+This class implements the scheduler of pending orders, which assigns
+packages to pickup points and vehicles, and parks the ones that cannot
+be assigned until an event makes their assignment possible again.
+
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import deque
+from typing import TYPE_CHECKING, Iterable
+
+import traci
+
+from drone_cab.assign import (
+    RouteCache,
+    assign_package_pickup,
+    assign_package_vehicle,
+    assign_package_vehicle_detour,
+)
+from drone_cab.tunables import ASSIGNMENT_BUDGET
+from drone_cab.vehicle import Vehicle
+
+if TYPE_CHECKING:
+    from drone_cab.package import Package
+    from drone_cab.pickup import Pickup
+    from drone_cab.warehouse import Warehouse
+
+logger = logging.getLogger(__name__)
+
+#: Reasons for which a package can be waitlisted.
+WAIT_REASON_LIST: list[str] = ["no_pickup", "no_vehicle"]
+
+
+class OrderScheduler:
+    """Scheduler of pending orders with per-reason waitlists and a per-step assignment budget.
+
+    Packages that cannot be assigned are parked in the waitlist of the reason why:
+    "no_pickup" if every pickup point is at capacity, and "no_vehicle" if no vehicle
+    with spare capacity passes by both the warehouse and the package's pickup point.
+    A waitlist is only retried once an event occurs that may resolve its reason:
+    a pickup point with fewer assigned and stored packages than before (i.e. its
+    drone departed) for "no_pickup", and a newly departed vehicle or a vehicle
+    carrying fewer packages than before for "no_vehicle". Since assignments only ever consume capacity, these events are
+    the only ways in which a failed assignment can succeed later. In detour mode, vehicles
+    are rerouted to the warehouse and pickup points, so "no_vehicle" is also woken after
+    every step with a successful assignment, as rerouted vehicles may now pass by others,
+    and whenever a vehicle moves on to the next edge of its route, as detours are measured
+    from where vehicles are and may thus fall within the maximum detour later.
+
+    Args:
+        pickup_list: List of pickup objects to assign packages to.
+        warehouse: Warehouse object from where vehicles pick up packages.
+        assignment_budget (optional): Maximum number of assignments attempted per step. Defaults to tunable constant.
+        detour (optional): Whether to reroute vehicles with the least detour instead of only
+            assigning vehicles already passing by. Defaults to False.
+
+    Attributes:
+        pickup_list: List of pickup objects to assign packages to.
+        warehouse: Warehouse object from where vehicles pick up packages.
+        assignment_budget: Maximum number of assignments attempted per step.
+        detour: Whether to reroute vehicles with the least detour.
+        ready_queue: Packages to be attempted, oldest first.
+        waitlist_dict: Parked packages per reason of failed assignment, oldest first.
+    """
+
+    def __init__(
+        self,
+        pickup_list: list[Pickup],
+        warehouse: Warehouse,
+        assignment_budget: int | None = None,
+        detour: bool = False,
+    ) -> None:
+        self.pickup_list: list[Pickup] = pickup_list
+        self.warehouse: Warehouse = warehouse
+        self.assignment_budget: int = (
+            ASSIGNMENT_BUDGET() if assignment_budget is None else assignment_budget
+        )
+        self.detour: bool = detour
+        self.ready_queue: deque[Package] = deque()
+        self.waitlist_dict: dict[str, deque[Package]] = {
+            reason: deque() for reason in WAIT_REASON_LIST
+        }
+        self._pickup_package_count_dict: dict[str, int] = {}
+        self._vehicle_carrying_count_dict: dict[str, int] = {}
+        self._vehicle_route_index_dict: dict[str, int] = {}
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"OrderScheduler({len(self.pickup_list)} pickups, {self.assignment_budget}, detour={self.detour})"
+
+    def __len__(self) -> int:
+        return len(self.ready_queue) + sum(map(len, self.waitlist_dict.values()))
+
+    def submit(self, package_list: Iterable[Package]) -> None:
+        """Submit newly ordered packages for assignment.
+
+        Args:
+            package_list: Packages to assign, in order of creation.
+        """
+        self.ready_queue.extend(package_list)
+
+    def wake(self, reason: str) -> None:
+        """Move all packages of a waitlist ahead of the ready queue, keeping them oldest first.
+
+        Args:
+            reason: Reason of the waitlist to wake, one of WAIT_REASON_LIST.
+        """
+        waitlist = self.waitlist_dict[reason]
+        if waitlist:
+            logger.debug("Waking %d packages waiting for reason=%s", len(waitlist), reason)
+            self.ready_queue.extendleft(reversed(waitlist))
+            waitlist.clear()
+
+    def _detect_events(self) -> None:
+        pickup_freed = False
+        for pickup in self.pickup_list:
+            package_count = len(pickup.assigned_package_set) + len(pickup.received_package_set)
+            if package_count < self._pickup_package_count_dict.get(pickup.id, 0):
+                pickup_freed = True
+            self._pickup_package_count_dict[pickup.id] = package_count
+        if pickup_freed:
+            self.wake("no_pickup")
+
+        vehicle_freed = bool(traci.simulation.getDepartedIDList())
+        for vehicle in Vehicle.vehicle_list:
+            carrying_count = len(vehicle.carrying_package_set)
+            if carrying_count < self._vehicle_carrying_count_dict.get(vehicle.id, 0):
+                vehicle_freed = True
+            self._vehicle_carrying_count_dict[vehicle.id] = carrying_count
+            if self.detour:
+                route_index = vehicle.get_route_index()
+                if route_index != self._vehicle_route_index_dict.get(vehicle.id, route_index):
+                    vehicle_freed = True
+                self._vehicle_route_index_dict[vehicle.id] = route_index
+        if vehicle_freed:
+            self.wake("no_vehicle")
+
+    def schedule(self) -> int:
+        """Attempt to assign pending packages, within the assignment budget of a step.
+
+        Returns:
+            Number of packages assigned to a vehicle in this step.
+        """
+        self._detect_events()
+        if not self.ready_queue:
+            return 0
+
+        vehicle_list = Vehicle.get_vehicle_list()
+        # Retried packages share the routing queries of the step
+        route_cache = RouteCache()
+        pickup_full = False
+        failed_pickup_id_set: set[str] = set()
+        budget = self.assignment_budget
+        assigned_count = 0
+
+        while self.ready_queue and budget > 0:
+            package = self.ready_queue.popleft()
+
+            if package.assigned_pickup is None:
+                if pickup_full or assign_package_pickup(package, self.pickup_list) is None:
+                    # Pickups only fill up within a step, so the rest would fail as well
+                    pickup_full = True
+                    self.waitlist_dict["no_pickup"].append(package)
+                    continue
+
+            if package.assigned_pickup.id in failed_pickup_id_set:
+                self.waitlist_dict["no_vehicle"].append(package)
+                continue
+
+            budget -= 1
+            if self.detour:
+                vehicle = assign_package_vehicle_detour(
+                    package, vehicle_list, self.warehouse, route_cache=route_cache
+                )
+            else:
+                vehicle = assign_package_vehicle(package, vehicle_list, self.warehouse)
+            if vehicle is None:
+                failed_pickup_id_set.add(package.assigned_pickup.id)
+                self.waitlist_dict["no_vehicle"].append(package)
+                continue
+            assigned_count += 1
+            if self.detour:
+                # A rerouted vehicle may now pass by pickup points that failed before
+                failed_pickup_id_set.clear()
+
+        for pickup in self.pickup_list:
+            self._pickup_package_count_dict[pickup.id] = len(pickup.assigned_package_set) + len(
+                pickup.received_package_set
+            )
+        for vehicle in vehicle_list:
+            self._vehicle_carrying_count_dict[vehicle.id] = len(vehicle.carrying_package_set)
+        if self.detour and assigned_count:
+            self.wake("no_vehicle")
+
+        logger.debug(
+            "Assigned %d packages, %d ready and %s waiting",
+            assigned_count,
+            len(self.ready_queue),
+            {reason: len(waitlist) for reason, waitlist in self.waitlist_dict.items()},
+        )
+        return assigned_count
@@ -0,0 +1,259 @@
+"""PackageStore class.
+
+This class implements the columnar storage of the state of all packages
+in the simulation, so that packages are cheap handles into NumPy columns,
+rows of delivered packages get recycled, and queries run vectorized.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from drone_cab.package import Package
+    from drone_cab.pickup import Pickup
+    from drone_cab.vehicle import Vehicle
+
+logger = logging.getLogger(__name__)
+
+STATUS_FREE: int = 0  #: Row is unused and may be recycled.
+STATUS_QUEUED: int = 1  #: Package is waiting for a vehicle, possibly with an assigned pickup point.
+STATUS_ASSIGNED: int = 2  #: Package is assigned to (or carried by) a vehicle.
+STATUS_AT_PICKUP: int = 3  #: Package is stored at its pickup point, waiting for a drone.
+STATUS_IN_FLIGHT: int = 4  #: Package is carried by a drone to its destination.
+STATUS_DELIVERED: int = 5  #: Package has reached its destination.
+
+#: Names of package statuses, indexed by status.
+STATUS_NAME_LIST: list[str] = ["free", "queued", "assigned", "at_pickup", "in_flight", "delivered"]
+
+#: Names, dtypes and initial values of the columns of a package store.
+COLUMN_DICT: dict[str, tuple[str, int | float]] = {
+    "status": ("i1", STATUS_FREE),
+    "destination_index": ("i4", -1),
+    "center_x": ("f8", math.nan),
+    "center_y": ("f8", math.nan),
+    "pickup_index": ("i4", -1),
+    "vehicle_index": ("i4", -1),
+    "drop_route_index": ("i4", -1),
+    "distance_vehicle": ("f8", 0.0),
+    "distance_drone": ("f8", 0.0),
+    "created_step": ("i8", 0),
+    "pickup_step": ("i8", -1),
+    "delivered_step": ("i8", -1),
+    "created_time": ("f8", math.nan),
+    "assigned_time": ("f8", math.nan),
+    "pickup_time": ("f8", math.nan),
+    "departed_time": ("f8", math.nan),
+    "delivered_time": ("f8", math.nan),
+}
+
+
+class PackageStore:
+    """Columnar storage of the state of packages, addressed by integer row indices.
+
+    Destination residence IDs are interned into destination_id_list, and assigned
+    pickup points and vehicles into registries, so that every column is a fixed-width
+    NumPy array. Rows of released packages are recycled through a free list, so that
+    memory stays bounded by the number of packages in flight rather than ever created.
+
+    Args:
+        capacity (optional): Initial number of rows, doubled whenever exhausted. Defaults to 1024.
+
+    Attributes:
+        column_dict: NumPy column of every package attribute, with one row per package.
+        handle_list: Package handle of every allocated row, or None for free rows.
+        free_index_list: Indices of free rows, recycled before growing.
+        size: Number of rows ever used, i.e. the high-water mark of allocated rows.
+        destination_id_list: Interned SUMO IDs of destination residences.
+        pickup_list: Registry of pickup objects that packages have been assigned to.
+        vehicle_list: Registry of vehicle objects that packages have been assigned to.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.column_dict: dict[str, np.ndarray] = {
+            name: np.full(capacity, value, dtype=dtype)
+            for name, (dtype, value) in COLUMN_DICT.items()
+        }
+        self.handle_list: list[Package | None] = []
+        self.free_index_list: list[int] = []
+        self.size: int = 0
+        self.destination_id_list: list[str] = []
+        self.pickup_list: list[Pickup] = []
+        self.vehicle_list: list[Vehicle] = []
+        self._destination_index_dict: dict[str, int] = {}
+        self._pickup_index_dict: dict[str, int] = {}
+        self._vehicle_index_dict: dict[str, int] = {}
+
+    def __repr__(self) -> str:
+        return f"PackageStore({len(self)} packages, {len(self.column_dict['status'])} rows)"
+
+    def __len__(self) -> int:
+        return self.size - len(self.free_index_list)
+
+    def _grow(self) -> None:
+        capacity = len(self.column_dict["status"])
+        for name, (dtype, value) in COLUMN_DICT.items():
+            column = np.full(2 * capacity, value, dtype=dtype)
+            column[:capacity] = self.column_dict[name]
+            self.column_dict[name] = column
+        logger.debug("Grew %s", self)
+
+    def allocate(
+        self,
+        package: Package,
+        destination_id: str,
+        center: tuple[float, float],
+        created_step: int,
+        created_time: float,
+    ) -> int:
+        """Allocate a row for a new package, recycling a free row if there is one.
+
+        Args:
+            package: Package handle of the new row.
+            destination_id: SUMO ID of destination residence of the package.
+            center: 2-D coordinates of the centroid of destination residence's polygon.
+            created_step: Simulation step at which the package was created.
+            created_time: Simulation time at which the package was created.
+
+        Returns:
+            Row index of the package.
+        """
+        if self.free_index_list:
+            index = self.free_index_list.pop()
+            self.handle_list[index] = package
+        else:
+            if self.size == len(self.column_dict["status"]):
+                self._grow()
+            index = self.size
+            self.size += 1
+            self.handle_list.append(package)
+
+        try:
+            destination_index = self._destination_index_dict[destination_id]
+        except KeyError:
+            destination_index = len(self.destination_id_list)
+            self.destination_id_list.append(destination_id)
+            self._destination_index_dict[destination_id] = destination_index
+
+        for name, (_, value) in COLUMN_DICT.items():
+            self.column_dict[name][index] = value
+        column_dict = self.column_dict
+        column_dict["status"][index] = STATUS_QUEUED
+        column_dict["destination_index"][index] = destination_index
+        column_dict["center_x"][index], column_dict["center_y"][index] = center
+        column_dict["created_step"][index] = created_step
+        column_dict["created_time"][index] = created_time
+        return index
+
+    def release(self, index: int) -> None:
+        """Release the row of a package that is no longer needed, for recycling.
+
+        Args:
+            index: Row index of the package.
+        """
+        self.column_dict["status"][index] = STATUS_FREE
+        self.handle_list[index] = None
+        self.free_index_list.append(index)
+
+    def register_pickup(self, pickup: Pickup) -> int:
+        """Get the registry index of a pickup point, registering it if new.
+
+        Args:
+            pickup: Pickup object to register.
+
+        Returns:
+            Index of the pickup point in pickup_list.
+        """
+        try:
+            return self._pickup_index_dict[pickup.id]
+        except KeyError:
+            self.pickup_list.append(pickup)
+            self._pickup_index_dict[pickup.id] = len(self.pickup_list) - 1
+            return len(self.pickup_list) - 1
+
+    def register_vehicle(self, vehicle: Vehicle) -> int:
+        """Get the registry index of a vehicle, registering it if new.
+
+        Args:
+            vehicle: Vehicle object to register.
+
+        Returns:
+            Index of the vehicle in vehicle_list.
+        """
+        try:
+            return self._vehicle_index_dict[vehicle.id]
+        except KeyError:
+            self.vehicle_list.append(vehicle)
+            self._vehicle_index_dict[vehicle.id] = len(self.vehicle_list) - 1
+            return len(self.vehicle_list) - 1
+
+    def find_index_array(
+        self,
+        status: int | None = None,
+        pickup: Pickup | None = None,
+        vehicle: Vehicle | None = None,
+    ) -> np.ndarray:
+        """Find the row indices of packages matching all given criteria.
+
+        Args:
+            status (optional): Status of packages to find. Defaults to any allocated status.
+            pickup (optional): Assigned pickup point of packages to find. Defaults to any.
+            vehicle (optional): Assigned vehicle of packages to find. Defaults to any.
+
+        Returns:
+            Row indices of matching packages.
+        """
+        status_column = self.column_dict["status"][: self.size]
+        if status is None:
+            mask = status_column != STATUS_FREE
+        else:
+            mask = status_column == status
+        if pickup is not None:
+            mask &= self.column_dict["pickup_index"][: self.size] == self._pickup_index_dict.get(
+                pickup.id, -2
+            )
+        if vehicle is not None:
+            mask &= self.column_dict["vehicle_index"][: self.size] == self._vehicle_index_dict.get(
+                vehicle.id, -2
+            )
+        return np.flatnonzero(mask)
+
+    def find(
+        self,
+        status: int | None = None,
+        pickup: Pickup | None = None,
+        vehicle: Vehicle | None = None,
+    ) -> list[Package]:
+        """Find the packages matching all given criteria, e.g. all packages waiting at a pickup point.
+
+        Args:
+            status (optional): Status of packages to find. Defaults to any allocated status.
+            pickup (optional): Assigned pickup point of packages to find. Defaults to any.
+            vehicle (optional): Assigned vehicle of packages to find. Defaults to any.
+
+        Returns:
+            List of matching package handles.
+        """
+        return [
+            self.handle_list[index]
+            for index in self.find_index_array(status, pickup, vehicle).tolist()
+        ]
+
+    def count_by_status(self) -> dict[str, int]:
+        """Count the allocated packages per status.
+
+        Returns:
+            Number of packages per status name, excluding free rows.
+        """
+        count_array = np.bincount(
+            self.column_dict["status"][: self.size], minlength=len(STATUS_NAME_LIST)
+        )
+        return {
+            name: int(count)
+            for name, count in zip(STATUS_NAME_LIST[1:], count_array[1:].tolist())
+        }
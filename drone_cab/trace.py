@@ -0,0 +1,519 @@
+"""TraceRecorder and TraceReader classes.
+
+These classes implement the compact binary trace of a simulation run,
+which records drone positions, vehicle positions and package status
+transitions every step, and its memory-mapped reader that seeks to any
+step without replaying the ones before it.
+
+Run as ``python -m drone_cab.trace DIR`` to replay a trace recorded
+with ``main.py --trace DIR``.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+from typing import TYPE_CHECKING
+
+import numpy as np
+import traci
+import traci.constants as tc
+
+from drone_cab.clock import Clock
+from drone_cab.store import STATUS_NAME_LIST, STATUS_QUEUED
+from drone_cab.vehicle import Vehicle
+
+if TYPE_CHECKING:
+    from drone_cab.package import Package
+    from drone_cab.pickup import Pickup
+
+logger = logging.getLogger(__name__)
+
+#: Version of the layout of a trace, bumped on incompatible changes.
+TRACE_VERSION: int = 1
+
+#: Name of the file of fixed-size records of a trace.
+RECORD_FILE: str = "records.bin"
+
+#: Name of the file of the index by step of a trace.
+INDEX_FILE: str = "index.bin"
+
+#: Name of the JSON file of the SUMO IDs that records refer to by index.
+META_FILE: str = "meta.json"
+
+KIND_DRONE: int = 0  #: Record of the position of a drone, with status 1 while flying and 0 while parked.
+KIND_VEHICLE: int = 1  #: Record of the position of a vehicle, with the number of carried packages as status.
+KIND_PACKAGE: int = 2  #: Record of a package entering a status, at the centroid of its destination.
+
+#: Layout of a record, little-endian and without padding.
+RECORD_DTYPE: np.dtype = np.dtype(
+    [("kind", "u1"), ("status", "u1"), ("object_index", "<u4"), ("x", "<f4"), ("y", "<f4")]
+)
+
+#: Layout of an index entry, locating the records of a step.
+INDEX_DTYPE: np.dtype = np.dtype([("step", "<i8"), ("time", "<f8"), ("offset", "<i8")])
+
+
+class TraceRecorder:
+    """Recorder that appends the state of every step to a binary trace directory.
+
+    The records of a step form one block, located by an entry of the index file: first one
+    record per drone, in the order of the pickup points, then one per vehicle, then one per
+    package status transition since the previous block. Records refer to drones, vehicles
+    and packages by index into the ID lists of the meta file, which is written on close.
+    Vehicle positions are read from subscriptions.
+
+    Args:
+        trace_dir: Path of the directory to record the trace to, created if missing.
+        pickup_list: Pickup points whose drones are recorded.
+
+    Attributes:
+        trace_dir: Path of the directory to record the trace to.
+        pickup_list: Pickup points whose drones are recorded.
+        vehicle_id_list: SUMO IDs of recorded vehicles, by vehicle index.
+        package_destination_id_list: SUMO IDs of destination residences of recorded packages, by package index.
+        step_count: Number of steps recorded so far.
+        record_count: Number of records recorded so far.
+    """
+
+    def __init__(self, trace_dir: str, pickup_list: list[Pickup]) -> None:
+        self.trace_dir: str = trace_dir
+        self.pickup_list: list[Pickup] = pickup_list
+        self.vehicle_id_list: list[str] = []
+        self.package_destination_id_list: list[str] = []
+        self.step_count: int = 0
+        self.record_count: int = 0
+        self._vehicle_index_dict: dict[str, int] = {}
+        self._package_index_dict: dict[int, int] = {}
+        self._package_record_list: list[tuple] = []
+        self._last_step: int | None = None
+
+        os.makedirs(self.trace_dir, exist_ok=True)
+        self._record_file = open(os.path.join(self.trace_dir, RECORD_FILE), "wb")
+        self._index_file = open(os.path.join(self.trace_dir, INDEX_FILE), "wb")
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"TraceRecorder({self.trace_dir})"
+
+    def __enter__(self) -> TraceRecorder:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get_vehicle_position(self, vehicle_id: str) -> tuple[float, float] | None:
+        position = traci.vehicle.getSubscriptionResults(vehicle_id).get(tc.VAR_POSITION)
+        if position is None:
+            try:
+                traci.vehicle.subscribe(vehicle_id, [tc.VAR_POSITION])
+            except traci.TraCIException:
+                # Vehicle has already left the simulation
+                return None
+            position = traci.vehicle.getSubscriptionResults(vehicle_id)[tc.VAR_POSITION]
+        return position
+
+    def record_package(self, package: Package) -> None:
+        """Record a package entering its current status.
+
+        A package gets a new package index when it is queued, or when it is first seen
+        otherwise, e.g. when it was created before a checkpoint that was resumed from.
+
+        Args:
+            package: Package that has entered its current status.
+        """
+        status = package.status
+        package_index = self._package_index_dict.get(package.index)
+        if package_index is None or status == STATUS_QUEUED:
+            package_index = len(self.package_destination_id_list)
+            self.package_destination_id_list.append(package.destination_id)
+            # Rows of delivered packages get recycled, so the row maps to its latest package
+            self._package_index_dict[package.index] = package_index
+        self._package_record_list.append((KIND_PACKAGE, status, package_index, *package.center))
+
+    def record_step(self) -> None:
+        """Record the drones, the vehicles and the pending package status transitions of the current step."""
+        record_list = [
+            (KIND_DRONE, 0 if pickup.drone.parked else 1, drone_index, *pickup.drone.current_position)
+            for drone_index, pickup in enumerate(self.pickup_list)
+        ]
+        for vehicle in Vehicle.vehicle_list:
+            position = self._get_vehicle_position(vehicle.id)
+            if position is None:
+                continue
+            vehicle_index = self._vehicle_index_dict.get(vehicle.id)
+            if vehicle_index is None:
+                vehicle_index = len(self.vehicle_id_list)
+                self.vehicle_id_list.append(vehicle.id)
+                self._vehicle_index_dict[vehicle.id] = vehicle_index
+            record_list.append(
+                (KIND_VEHICLE, min(len(vehicle.carrying_package_set), 255), vehicle_index, *position)
+            )
+        record_list.extend(self._package_record_list)
+        self._package_record_list.clear()
+
+        self._index_file.write(
+            np.array([(Clock.current_step, Clock.current_time, self.record_count)], dtype=INDEX_DTYPE).tobytes()
+        )
+        self._record_file.write(np.array(record_list, dtype=RECORD_DTYPE).tobytes())
+        self.record_count += len(record_list)
+        self.step_count += 1
+        self._last_step = Clock.current_step
+
+    def close(self) -> None:
+        """Record the final step, if not recorded yet, and write the meta file."""
+        if self._record_file.closed:
+            return
+        if self._last_step != Clock.current_step:
+            self.record_step()
+        self._record_file.close()
+        self._index_file.close()
+
+        with open(os.path.join(self.trace_dir, META_FILE), "w") as meta_file:
+            json.dump(
+                {
+                    "version": TRACE_VERSION,
+                    "step_length": Clock.step_length,
+                    "drone_id_list": [pickup.id for pickup in self.pickup_list],
+                    "drone_center_list": [pickup.drone.center for pickup in self.pickup_list],
+                    "vehicle_id_list": self.vehicle_id_list,
+                    "package_destination_id_list": self.package_destination_id_list,
+                },
+                meta_file,
+            )
+        logger.info("Recorded %d steps of %d records to %s", self.step_count, self.record_count, self)
+
+
+class TraceReader:
+    """Reader of a binary trace directory, which memory-maps its records.
+
+    Seeking is a binary search of the index. Drone records sit at the start of every block,
+    so that drone trails are gathered directly, and the step at which every package entered
+    every status is tabulated once on opening, so that package statuses at any step are
+    a vectorized comparison.
+
+    Args:
+        trace_dir: Path of the directory of the trace, as recorded by TraceRecorder.
+
+    Attributes:
+        trace_dir: Path of the directory of the trace.
+        record_array: Memory-mapped records.
+        step_array: Recorded simulation steps, in ascending order.
+        time_array: Simulation time of every recorded step.
+        offset_array: Index of the first record of every recorded step, followed by the number of records.
+        drone_id_list: SUMO IDs of pickup points of drones, by drone index.
+        drone_center_list: 2-D coordinates of pickup points of drones, by drone index.
+        vehicle_id_list: SUMO IDs of vehicles, by vehicle index.
+        package_destination_id_list: SUMO IDs of destination residences of packages, by package index.
+        status_index_array: Index of the block in which every package entered every status,
+            or the number of blocks if never, of shape (n_packages, n_statuses).
+        bounds: Bounding box of all recorded positions, as (xmin, ymin, xmax, ymax).
+
+    Raises:
+        AssertionError: If the trace was recorded with an incompatible layout.
+    """
+
+    def __init__(self, trace_dir: str) -> None:
+        self.trace_dir: str = trace_dir
+        with open(os.path.join(self.trace_dir, META_FILE)) as meta_file:
+            meta_dict = json.load(meta_file)
+        try:
+            assert (
+                meta_dict["version"] == TRACE_VERSION
+            ), f"Trace version {meta_dict['version']} of {trace_dir} is not {TRACE_VERSION}"
+        except AssertionError as e:
+            logger.error("AssertionError", exc_info=True)
+            raise e
+
+        self.record_array: np.ndarray = self._memmap(RECORD_FILE, RECORD_DTYPE)
+        index_array = self._memmap(INDEX_FILE, INDEX_DTYPE)
+        self.step_array: np.ndarray = np.asarray(index_array["step"])
+        self.time_array: np.ndarray = np.asarray(index_array["time"])
+        self.offset_array: np.ndarray = np.append(index_array["offset"], len(self.record_array))
+        self.drone_id_list: list[str] = meta_dict["drone_id_list"]
+        self.drone_center_list: list[tuple[float, float]] = [
+            tuple(center) for center in meta_dict["drone_center_list"]
+        ]
+        self.vehicle_id_list: list[str] = meta_dict["vehicle_id_list"]
+        self.package_destination_id_list: list[str] = meta_dict["package_destination_id_list"]
+
+        package_position_array = np.flatnonzero(self.record_array["kind"] == KIND_PACKAGE)
+        package_record_array = self.record_array[package_position_array]
+        self.status_index_array: np.ndarray = np.full(
+            (len(self.package_destination_id_list), len(STATUS_NAME_LIST)), len(self), dtype=np.int64
+        )
+        np.minimum.at(
+            self.status_index_array,
+            (package_record_array["object_index"], package_record_array["status"]),
+            np.searchsorted(self.offset_array, package_position_array, side="right") - 1,
+        )
+
+        if len(self.record_array):
+            self.bounds: tuple[float, float, float, float] = (
+                float(self.record_array["x"].min()),
+                float(self.record_array["y"].min()),
+                float(self.record_array["x"].max()),
+                float(self.record_array["y"].max()),
+            )
+        else:
+            self.bounds = (0.0, 0.0, 1.0, 1.0)
+        logger.debug("Created %s", self)
+
+    def __repr__(self) -> str:
+        return f"TraceReader({self.trace_dir}, {len(self)} steps)"
+
+    def __len__(self) -> int:
+        return len(self.step_array)
+
+    def _memmap(self, file_name: str, dtype: np.dtype) -> np.ndarray:
+        path = os.path.join(self.trace_dir, file_name)
+        if os.path.getsize(path) == 0:
+            # NumPy cannot memory-map empty files
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode="r")
+
+    def seek(self, step: int) -> int:
+        """Find the block of the latest recorded step up to a simulation step.
+
+        Args:
+            step: Simulation step to seek to.
+
+        Returns:
+            Index of the block, clipped to the first one.
+        """
+        return max(int(np.searchsorted(self.step_array, step, side="right")) - 1, 0)
+
+    def get_block(self, block_index: int, kind: int | None = None) -> np.ndarray:
+        """Get the records of a block, possibly only those of one kind.
+
+        Args:
+            block_index: Index of the block.
+            kind (optional): Kind of the records to get, one of the KIND_* constants. Defaults to None, i.e. all.
+
+        Returns:
+            Records of the block, as a view of the memory map if all are returned.
+        """
+        block = self.record_array[self.offset_array[block_index] : self.offset_array[block_index + 1]]
+        return block if kind is None else block[block["kind"] == kind]
+
+    def get_package_status(self, block_index: int) -> np.ndarray:
+        """Get the status of every package at a block.
+
+        Args:
+            block_index: Index of the block.
+
+        Returns:
+            Latest status entered by every package up to the block, by package index,
+            with STATUS_FREE for packages that were not created yet.
+        """
+        reached_array = self.status_index_array <= block_index
+        return (reached_array * np.arange(len(STATUS_NAME_LIST))).max(axis=1, initial=0)
+
+    def get_drone_trail(self, block_index: int, length: int) -> np.ndarray:
+        """Get the latest positions of every drone up to a block.
+
+        Args:
+            block_index: Index of the last block of the trail.
+            length: Maximum number of blocks of the trail.
+
+        Returns:
+            Positions of drones, of shape (n_blocks, n_drones, 2).
+        """
+        first_index = max(block_index - length + 1, 0)
+        position_array = (
+            self.offset_array[first_index : block_index + 1, np.newaxis]
+            + np.arange(len(self.drone_id_list))
+        )
+        drone_record_array = self.record_array[position_array]
+        return np.stack([drone_record_array["x"], drone_record_array["y"]], axis=-1)
+
+
+#: Colors of packages by status, as matplotlib RGB tuples.
+STATUS_COLOR_DICT: dict[int, tuple[float, float, float]] = {
+    STATUS_QUEUED: (222 / 255, 52 / 255, 235 / 255),
+    STATUS_NAME_LIST.index("assigned"): (0.0, 0.6, 0.0),
+    STATUS_NAME_LIST.index("at_pickup"): (1.0, 0.55, 0.0),
+    STATUS_NAME_LIST.index("in_flight"): (0.0, 0.0, 0.5),
+    STATUS_NAME_LIST.index("delivered"): (0.7, 0.7, 0.7),
+}
+
+
+def replay(
+    trace_dir: str,
+    net_file: str | None = None,
+    poly_file: str | None = None,
+    start_step: int = 0,
+    speed: int = 1,
+    trail: int = 30,
+    interval: float = 0.05,
+) -> None:
+    """Replay a trace in a matplotlib animation with blitting, which can be paused and seeked.
+
+    Space pauses and resumes, the arrow keys step back and forth, and the slider seeks.
+
+    Args:
+        trace_dir: Path of the directory of the trace.
+        net_file (optional): Path of the SUMO network file to draw lanes from. Defaults to None, i.e. no lanes.
+        poly_file (optional): Path of the SUMO polygon file to draw buildings from. Defaults to None, i.e. no buildings.
+        start_step (optional): Simulation step to start at. Defaults to 0.
+        speed (optional): Number of recorded steps advanced per frame. Defaults to 1.
+        trail (optional): Number of recorded steps of drone trails. Defaults to 30.
+        interval (optional): Seconds between frames. Defaults to 0.05.
+    """
+    import matplotlib.animation as animation
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    from matplotlib.widgets import Slider
+
+    reader = TraceReader(trace_dir)
+    try:
+        assert len(reader), f"Trace {trace_dir} has no recorded steps"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    #
+    # Matplotlib plot setup
+    #
+
+    xmin, ymin, xmax, ymax = reader.bounds
+    margin = 0.05 * max(xmax - xmin, ymax - ymin)
+    fig = plt.figure(figsize=(10, 10))
+    ax = fig.add_subplot(
+        autoscale_on=False,
+        xlim=(xmin - margin, xmax + margin),
+        ylim=(ymin - margin, ymax + margin),
+    )
+    ax.set_aspect("equal")
+    ax.grid()
+    if net_file is not None and poly_file is not None:
+        from drone_cab.viewer import draw_map
+
+        draw_map(ax, net_file, poly_file)
+
+    time_text = ax.text(x=0.01, y=0.97, s="", transform=ax.transAxes)
+    delivery_text = ax.text(x=0.01, y=0.94, s="", transform=ax.transAxes)
+
+    #
+    # Plot objects setup
+    #
+
+    for center in reader.drone_center_list:
+        ax.add_patch(plt.Circle(xy=center, radius=2, color="red"))
+
+    package_center_array = np.zeros((len(reader.package_destination_id_list), 2))
+    package_record_array = reader.record_array[reader.record_array["kind"] == KIND_PACKAGE]
+    package_center_array[package_record_array["object_index"]] = np.stack(
+        [package_record_array["x"], package_record_array["y"]], axis=-1
+    )
+    package_scatter = ax.scatter([], [], s=16, zorder=3)
+    vehicle_scatter = ax.scatter([], [], s=24, marker="s", edgecolors="black", linewidths=0.5, zorder=4)
+    trail_collection = ax.add_collection(LineCollection([], lw=1, color="black", zorder=5))
+    drone_scatter = ax.scatter([], [], s=48, marker="X", color=(0.0, 0.0, 0.5), zorder=6)
+
+    slider = Slider(
+        fig.add_axes([0.15, 0.02, 0.7, 0.03]),
+        "step",
+        valmin=reader.step_array[0],
+        valmax=reader.step_array[-1],
+        valinit=reader.step_array[reader.seek(start_step)],
+        valstep=reader.step_array,
+    )
+    # Redrawn by blitting instead of redrawing the whole figure
+    slider.drawon = False
+    state = {"block_index": reader.seek(start_step), "playing": True}
+
+    def on_slider_changed(step: float) -> None:
+        state["block_index"] = reader.seek(int(step))
+
+    def on_key_press(event) -> None:
+        if event.key == " ":
+            state["playing"] = not state["playing"]
+        elif event.key in ("left", "right"):
+            state["playing"] = False
+            state["block_index"] = int(
+                np.clip(state["block_index"] + (1 if event.key == "right" else -1), 0, len(reader) - 1)
+            )
+
+    slider.on_changed(on_slider_changed)
+    fig.canvas.mpl_connect("key_press_event", on_key_press)
+
+    #
+    # Frame update function
+    #
+
+    def update(_):
+        if state["playing"]:
+            state["block_index"] = min(state["block_index"] + speed, len(reader) - 1)
+        block_index = state["block_index"]
+
+        status_array = reader.get_package_status(block_index)
+        shown_array = np.flatnonzero(status_array)
+        package_scatter.set_offsets(package_center_array[shown_array].reshape(-1, 2))
+        package_scatter.set_facecolors([STATUS_COLOR_DICT[status] for status in status_array[shown_array]])
+
+        vehicle_record_array = reader.get_block(block_index, KIND_VEHICLE)
+        vehicle_scatter.set_offsets(np.stack([vehicle_record_array["x"], vehicle_record_array["y"]], axis=-1))
+        vehicle_scatter.set_facecolors(
+            [(0.0, 1.0, 0.0) if status else (1.0, 1.0, 0.0) for status in vehicle_record_array["status"]]
+        )
+
+        trail_array = reader.get_drone_trail(block_index, trail)
+        trail_collection.set_segments(list(trail_array.transpose(1, 0, 2)))
+        drone_scatter.set_offsets(trail_array[-1])
+
+        time_text.set_text(f"time = {reader.time_array[block_index]:.2f}s")
+        delivery_text.set_text(
+            f"delivered = {np.count_nonzero(status_array == STATUS_NAME_LIST.index('delivered'))}"
+            f" / {len(shown_array)}"
+        )
+        slider.eventson = False
+        slider.set_val(reader.step_array[block_index])
+        slider.eventson = True
+
+        return (
+            package_scatter,
+            vehicle_scatter,
+            trail_collection,
+            drone_scatter,
+            time_text,
+            delivery_text,
+            slider.poly,
+            slider.valtext,
+        )
+
+    anim = animation.FuncAnimation(
+        fig, update, interval=interval * 1000, blit=True, cache_frame_data=False
+    )
+    plt.show()
+
+
+def main() -> None:
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    parser = argparse.ArgumentParser(description="Replay a binary trace recorded with main.py --trace.")
+    parser.add_argument("trace_dir", help="directory of the trace")
+    parser.add_argument("--start", type=int, default=0, help="simulation step to start at")
+    parser.add_argument("--speed", type=int, default=1, help="number of recorded steps advanced per frame")
+    parser.add_argument("--trail", type=int, default=30, help="number of recorded steps of drone trails")
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between frames")
+    parser.add_argument("--net-file", default=os.path.join(data_dir, "map.net.xml"), help="SUMO network file")
+    parser.add_argument("--poly-file", default=os.path.join(data_dir, "map.poly.xml"), help="SUMO polygon file")
+    parser.add_argument("--no-map", action="store_true", help="do not draw lanes and buildings")
+    args = parser.parse_args()
+
+    replay(
+        args.trace_dir,
+        None if args.no_map else args.net_file,
+        None if args.no_map else args.poly_file,
+        start_step=args.start,
+        speed=args.speed,
+        trail=args.trail,
+        interval=args.interval,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,87 @@
 """Tunable parameters.
 
-Collection of various tunable constants and functions.
+Collection of various tunable constants and functions, whose values
+can be overridden at runtime, e.g. by the configurations found by
+drone_cab.tuning.
 
 """
 
 from __future__ import annotations
 
+import functools
+import json
 import logging
+from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
+#: Tunable functions by name.
+TUNABLE_DICT: dict[str, Callable[[], Any]] = {}
 
+#: Overridden values of tunables by name, returned instead of their hard-coded values.
+TUNABLE_OVERRIDE_DICT: dict[str, Any] = {}
+
+
+def tunable(function: Callable[[], Any]) -> Callable[[], Any]:
+    """Register a tunable function, and make it return its overridden value if there is one.
+
+    Args:
+        function: Tunable function returning the hard-coded value.
+
+    Returns:
+        Tunable function returning the overridden value, if any, else the hard-coded value.
+    """
+
+    @functools.wraps(function)
+    def wrapper() -> Any:
+        try:
+            return TUNABLE_OVERRIDE_DICT[function.__name__]
+        except KeyError:
+            return function()
+
+    TUNABLE_DICT[function.__name__] = wrapper
+    return wrapper
+
+
+def set_tunable_overrides(override_dict: dict[str, Any]) -> None:
+    """Override the values of tunables, replacing all previous overrides.
+
+    Only constructor defaults evaluated after this call pick up the overridden values.
+
+    Args:
+        override_dict: Values of tunables by name.
+
+    Raises:
+        AssertionError: If a name is not that of a tunable.
+    """
+    try:
+        unknown_name_list = sorted(set(override_dict) - set(TUNABLE_DICT))
+        assert not unknown_name_list, f"Unknown tunables {unknown_name_list}"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    TUNABLE_OVERRIDE_DICT.clear()
+    TUNABLE_OVERRIDE_DICT.update(override_dict)
+    logger.info("Overriding tunables %s", TUNABLE_OVERRIDE_DICT)
+
+
+def load_tunable_overrides(path: str) -> dict[str, Any]:
+    """Load overridden values of tunables from a JSON file, and apply them.
+
+    Args:
+        path: Path of the JSON object of values of tunables by name, as written by drone_cab.tuning.
+
+    Returns:
+        Values of tunables by name.
+    """
+    with open(path) as override_file:
+        override_dict = json.load(override_file)
+    set_tunable_overrides(override_dict)
+    return override_dict
+
+
+@tunable
 def WAREHOUSE_ID() -> str:
     """Get hard-coded SUMO ID of chosen warehouse.
 
@@ -20,6 +91,7 @@ def WAREHOUSE_ID() -> str:
     return "239796134"
 
 
+@tunable
 def PICKUP_CENTER_LIST() -> list[tuple[float, float]]:
     """Get hard-coded list of 2-D coordinates of centers of chosen pickup points.
 
@@ -41,6 +113,7 @@ def PICKUP_CENTER_LIST() -> list[tuple[float, float]]:
     ]
 
 
+@tunable
 def VEHICLE_CAPACITY():
     """Generate capacities for vehicles.
 
@@ -50,6 +123,7 @@ def VEHICLE_CAPACITY():
     return 2  # random.randint(5, 15)
 
 
+@tunable
 def DRONE_CAPACITY() -> int:
     """Generate capacities for drones.
 
@@ -59,6 +133,7 @@ def DRONE_CAPACITY() -> int:
     return 2  # random.randint(5, 15)
 
 
+@tunable
 def DRONE_MAX_IDLE_STEPS() -> int:
     """Get hard-coded maximum number of allowed idle steps for drones.
 
@@ -68,6 +143,7 @@ def DRONE_MAX_IDLE_STEPS() -> int:
     return 30
 
 
+@tunable
 def DRONE_RANGE() -> float:
     """Generate flying range for drones.
 
@@ -77,6 +153,7 @@ def DRONE_RANGE() -> float:
     return 500.0
 
 
+@tunable
 def DRONE_SPEED() -> float:
     """Generate flying speed for drones.
 
@@ -86,6 +163,7 @@ def DRONE_SPEED() -> float:
     return 2.0
 
 
+@tunable
 def PICKUP_CAPACITY() -> int:
     """Generate capacities for pickups.
 
@@ -93,3 +171,33 @@ def PICKUP_CAPACITY() -> int:
         A (possibly random) capacity for a pickup.
     """
     return 2  # random.randint(5, 15)
+
+
+@tunable
+def ASSIGNMENT_BUDGET() -> int:
+    """Get hard-coded maximum number of package assignments attempted per simulation step.
+
+    Returns:
+        Maximum number of package assignments attempted per simulation step.
+    """
+    return 50
+
+
+@tunable
+def VEHICLE_MAX_DETOUR() -> float:
+    """Get hard-coded maximum extra driving distance for a vehicle to pick up and drop off a package.
+
+    Returns:
+        Maximum detour of a vehicle in meters.
+    """
+    return 2000.0
+
+
+@tunable
+def PLACEMENT_SITE_SPACING() -> float:
+    """Get hard-coded distance between consecutive candidate pickup sites along a road.
+
+    Returns:
+        Distance between candidate pickup sites in meters.
+    """
+    return 20.0
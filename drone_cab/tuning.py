@@ -0,0 +1,334 @@
+"""Tuning engine.
+
+This module implements the search for the values of tunables that
+optimize an objective of the simulation, e.g. mean delivery latency,
+by successive halving: all sampled configurations are simulated over a
+short horizon first, and only the most promising ones over longer ones.
+
+Run as ``python -m drone_cab.tuning``, which writes the best
+configuration as overrides that main.py loads with ``--tunables``.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+import numpy as np
+
+from drone_cab.metrics import load_delivery_metrics
+from drone_cab.tunables import TUNABLE_DICT
+
+logger = logging.getLogger(__name__)
+
+#: Default candidate values of the tunables searched over, by name.
+SEARCH_SPACE_DICT: dict[str, list[Any]] = {
+    "VEHICLE_CAPACITY": [1, 2, 4, 8],
+    "DRONE_CAPACITY": [1, 2, 4],
+    "DRONE_SPEED": [2.0, 5.0, 10.0],
+    "DRONE_RANGE": [300.0, 500.0, 800.0],
+    "DRONE_MAX_IDLE_STEPS": [10, 30, 100],
+    "PICKUP_CAPACITY": [1, 2, 4, 8],
+}
+
+
+def _mean_or_inf(value_array: np.ndarray) -> float:
+    return float(value_array.mean()) if len(value_array) else math.inf
+
+
+def _delivered(column_dict: dict[str, np.ndarray], name: str) -> np.ndarray:
+    return column_dict[name][column_dict["delivered_step"] >= 0]
+
+
+#: Objectives to minimize by name, as functions of the package records and the horizon of a simulation.
+#: Latency is in simulation steps and counts packages undelivered at the horizon as delivered at it,
+#: so that configurations delivering only the quickest packages do not score best.
+OBJECTIVE_DICT: dict[str, Callable[[dict[str, np.ndarray], int], float]] = {
+    "latency": lambda column_dict, steps: _mean_or_inf(
+        np.where(column_dict["delivered_step"] >= 0, column_dict["delivered_step"], steps)
+        - column_dict["created_step"]
+    ),
+    "drone_distance": lambda column_dict, steps: _mean_or_inf(
+        _delivered(column_dict, "distance_drone")
+    ),
+    "vehicle_distance": lambda column_dict, steps: _mean_or_inf(
+        _delivered(column_dict, "distance_vehicle")
+    ),
+    "deliveries": lambda column_dict, steps: -float(len(_delivered(column_dict, "delivered_step"))),
+}
+
+
+def sample_configurations(
+    search_space_dict: dict[str, list[Any]], count: int, seed: int | None = None
+) -> list[dict[str, Any]]:
+    """Sample distinct configurations of tunables from a grid of candidate values.
+
+    Args:
+        search_space_dict: Candidate values of the tunables searched over, by name.
+        count: Number of configurations to sample, or the whole grid if it is smaller.
+        seed (optional): Seed of the sampler. Defaults to None, i.e. random.
+
+    Returns:
+        Configurations as values of tunables by name.
+    """
+    name_list = list(search_space_dict)
+    value_list_list = [search_space_dict[name] for name in name_list]
+    grid_size = math.prod(map(len, value_list_list))
+    if count >= grid_size:
+        return [dict(zip(name_list, values)) for values in itertools.product(*value_list_list)]
+
+    configuration_list = []
+    for grid_index in random.Random(seed).sample(range(grid_size), count):
+        configuration = {}
+        # Decoding the grid index in the mixed radix of the numbers of candidate values
+        for name, value_list in zip(reversed(name_list), reversed(value_list_list)):
+            grid_index, value_index = divmod(grid_index, len(value_list))
+            configuration[name] = value_list[value_index]
+        configuration_list.append({name: configuration[name] for name in name_list})
+    return configuration_list
+
+
+def successive_halving(
+    evaluate: Callable[[list[dict[str, Any]], int], list[float]],
+    configuration_list: list[dict[str, Any]],
+    min_steps: int,
+    max_steps: int,
+    eta: int = 2,
+) -> list[dict[str, Any]]:
+    """Search for the best configuration by successive halving.
+
+    Every round evaluates the remaining configurations over a horizon eta times as long
+    as the previous one, starting at min_steps, and keeps the best 1 / eta of them for
+    the next round, until a single configuration is left or max_steps has been reached.
+
+    Args:
+        evaluate: Function of the configurations and a horizon in simulation steps,
+            returning the score of every configuration, lower being better.
+        configuration_list: Configurations to search, as values of tunables by name.
+        min_steps: Horizon of the first round in simulation steps.
+        max_steps: Longest horizon in simulation steps.
+        eta (optional): Factor by which horizons grow and configurations are cut each round. Defaults to 2.
+
+    Returns:
+        Trials as dictionaries of configuration, steps and score, best first, i.e. sorted
+        by descending horizon and then ascending score.
+    """
+    try:
+        assert eta >= 2, f"Successive halving needs eta >= 2, got {eta}"
+        assert 0 < min_steps <= max_steps, f"Invalid horizons {min_steps} to {max_steps}"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    trial_list = []
+    steps = min_steps
+    while configuration_list:
+        score_list = evaluate(configuration_list, steps)
+        round_trial_list = sorted(
+            (
+                {"configuration": configuration, "steps": steps, "score": score}
+                for configuration, score in zip(configuration_list, score_list)
+            ),
+            key=lambda trial: trial["score"],
+        )
+        trial_list.extend(round_trial_list)
+        logger.info(
+            "Evaluated %d configurations over %d steps, best score=%s",
+            len(round_trial_list),
+            steps,
+            round_trial_list[0]["score"],
+        )
+        if len(configuration_list) == 1 or steps >= max_steps:
+            break
+        configuration_list = [
+            trial["configuration"]
+            for trial in round_trial_list[: max(1, len(round_trial_list) // eta)]
+        ]
+        steps = min(steps * eta, max_steps)
+
+    return sorted(trial_list, key=lambda trial: (-trial["steps"], trial["score"]))
+
+
+def simulate(
+    configuration: dict[str, Any],
+    steps: int,
+    objective: str,
+    main_argument_list: list[str],
+    main_path: str,
+) -> float:
+    """Score a configuration by running the simulation headless in its own process.
+
+    Every simulation runs in a subprocess of main.py, since simulation state lives in
+    class attributes, and in its own temporary directory for its overrides, log and metrics.
+
+    Args:
+        configuration: Values of tunables by name.
+        steps: Horizon in simulation steps.
+        objective: Name of the objective, one of OBJECTIVE_DICT.
+        main_argument_list: Further command line arguments of main.py, e.g. the demand.
+        main_path: Path of main.py.
+
+    Returns:
+        Score of the configuration, or infinity if the simulation failed.
+    """
+    with tempfile.TemporaryDirectory(prefix="drone_cab_tuning_") as run_dir:
+        tunables_path = os.path.join(run_dir, "tunables.json")
+        metrics_path = os.path.join(run_dir, "deliveries.npz")
+        with open(tunables_path, "w") as tunables_file:
+            json.dump(configuration, tunables_file)
+
+        result = subprocess.run(
+            [
+                sys.executable,
+                main_path,
+                "--no-gui",
+                "--no-highlight",
+                "--steps",
+                str(steps),
+                "--tunables",
+                tunables_path,
+                "--metrics",
+                metrics_path,
+                "--log-file",
+                os.path.join(run_dir, "drone_cab.log"),
+                "--log-level",
+                "WARNING",
+                *main_argument_list,
+            ],
+            cwd=run_dir,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            logger.error(
+                "Simulation of %s over %d steps failed:\n%s", configuration, steps, result.stderr
+            )
+            return math.inf
+
+        column_dict = load_delivery_metrics(metrics_path)
+
+    score = OBJECTIVE_DICT[objective](column_dict, steps)
+    logger.debug("Scored %s over %d steps: %s=%s", configuration, steps, objective, score)
+    return score
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Search for the tunables optimizing an objective of the simulation by successive halving."
+    )
+    parser.add_argument(
+        "--objective", default="latency", choices=list(OBJECTIVE_DICT), help="objective to minimize"
+    )
+    parser.add_argument(
+        "--search-space",
+        default=None,
+        help="path of a JSON object of candidate values of tunables by name; defaults to SEARCH_SPACE_DICT",
+    )
+    parser.add_argument(
+        "--configurations", type=int, default=16, help="number of configurations to sample"
+    )
+    parser.add_argument(
+        "--min-steps",
+        type=int,
+        default=400,
+        help="horizon of the first round, long enough for the first packages to be delivered",
+    )
+    parser.add_argument("--max-steps", type=int, default=1600, help="longest horizon")
+    parser.add_argument(
+        "--eta", type=int, default=2, help="factor by which horizons grow and configurations are cut"
+    )
+    parser.add_argument("--jobs", type=int, default=1, help="number of simulations run at once")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the configuration sampler")
+    parser.add_argument(
+        "-o", "--output", default="tunables.json", help="path of the best configuration as overrides"
+    )
+    parser.add_argument(
+        "--results", default=None, help="path of the JSON list of all trials, best first"
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        metavar="DIR",
+        help="directory of cached delivery metrics, so that configurations simulated before are not rerun",
+    )
+    parser.add_argument(
+        "--main",
+        default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py"),
+        help="path of main.py",
+    )
+    parser.add_argument(
+        "main_argument_list",
+        nargs=argparse.REMAINDER,
+        help="further arguments of main.py after --, e.g. -- --demand-rate 3000 --demand-seed 1",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    search_space_dict = SEARCH_SPACE_DICT
+    if args.search_space is not None:
+        with open(args.search_space) as search_space_file:
+            search_space_dict = json.load(search_space_file)
+    try:
+        unknown_name_list = sorted(set(search_space_dict) - set(TUNABLE_DICT))
+        assert not unknown_name_list, f"Unknown tunables {unknown_name_list}"
+    except AssertionError as e:
+        logger.error("AssertionError", exc_info=True)
+        raise e
+
+    main_argument_list = [argument for argument in args.main_argument_list if argument != "--"]
+    if args.cache is not None:
+        # Simulations run in temporary directories
+        main_argument_list += ["--cache", os.path.abspath(args.cache)]
+
+    def evaluate(configuration_list: list[dict[str, Any]], steps: int) -> list[float]:
+        with ThreadPoolExecutor(args.jobs) as executor:
+            return list(
+                executor.map(
+                    lambda configuration: simulate(
+                        configuration, steps, args.objective, main_argument_list, args.main
+                    ),
+                    configuration_list,
+                )
+            )
+
+    trial_list = successive_halving(
+        evaluate,
+        sample_configurations(search_space_dict, args.configurations, args.seed),
+        args.min_steps,
+        args.max_steps,
+        args.eta,
+    )
+    best_trial = trial_list[0]
+    if args.results is not None:
+        with open(args.results, "w") as results_file:
+            json.dump(trial_list, results_file, indent=2)
+    if not math.isfinite(best_trial["score"]):
+        logger.error(
+            "No configuration scored a finite %s over %d steps, e.g. as none delivered any package; "
+            "not writing %s",
+            args.objective,
+            best_trial["steps"],
+            args.output,
+        )
+        sys.exit(1)
+    with open(args.output, "w") as output_file:
+        json.dump(best_trial["configuration"], output_file, indent=2)
+    print(
+        f"Best {args.objective}={best_trial['score']} over {best_trial['steps']} steps with "
+        f"{best_trial['configuration']}, written to {args.output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,26 @@ def shape2centroid(shape: list[tuple[float, float]]) -> tuple[float, float]:
     return centroid
 
 
+def shape2area(shape: list[tuple[float, float]]) -> float:
+    """Calculate the area of given polygon shape with the shoelace formula.
+
+    Args:
+        shape: List of 2-D coordinates of vertices of given polygon.
+
+    Returns:
+        Area of given polygon shape.
+    """
+    return (
+        abs(
+            sum(
+                x_a * y_b - x_b * y_a
+                for (x_a, y_a), (x_b, y_b) in zip(shape, shape[1:] + shape[:1])
+            )
+        )
+        / 2
+    )
+
+
 def euclidean_distance(
     point_a: tuple[float, float], point_b: tuple[float, float]
 ) -> float:
@@ -91,7 +111,7 @@ def get_nearest_edge_id(polygon_id: str) -> str:
 
     nearest_edge_id = traci.lane.getEdgeID(nearest_lane_id)
 
-    logger.debug(f"Found {nearest_edge_id=} of {polygon_id=}")
+    logger.debug("Found nearest_edge_id=%r of polygon_id=%r", nearest_edge_id, polygon_id)
     return nearest_edge_id
 
 
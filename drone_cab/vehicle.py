@@ -10,13 +10,16 @@ from __future__ import annotations
 import logging
 from typing import TYPE_CHECKING
 
+from drone_cab.events import log_event
 from drone_cab.tunables import VEHICLE_CAPACITY
+from drone_cab.writebuffer import WriteBuffer
 
 if TYPE_CHECKING:
     from drone_cab.package import Package
     from drone_cab.warehouse import Warehouse
 
 import traci
+import traci.constants as tc
 
 logger = logging.getLogger(__name__)
 
@@ -32,19 +35,21 @@ class Vehicle(traci.StepListener):
         id: SUMO ID of vehicle
         capacity: Maximum number of packages that this vehicle can carry
         carrying_package_set: Set of packages being carried by this vehicle
+        route_index: Index in its route of the edge that vehicle was last checked on, or None to force a check.
     """
 
     vehicle_list: list[Vehicle] = []  #: List of all vehicle objects.
 
     def __init__(
-        self, vehicle_id: str, vehicle_capacity: int = VEHICLE_CAPACITY()
+        self, vehicle_id: str, vehicle_capacity: int | None = None
     ) -> None:
         self.id: str = vehicle_id
-        self.capacity: int = vehicle_capacity
+        self.capacity: int = VEHICLE_CAPACITY() if vehicle_capacity is None else vehicle_capacity
         self.carrying_package_set: set[Package] = set()
+        self.route_index: int | None = None
         if self not in Vehicle.vehicle_list:
             Vehicle.vehicle_list.append(self)
-            logger.debug(f"Created {self}")
+            logger.debug("Created %s", self)
 
     def __repr__(self) -> str:
         return f"Vehicle({self.id}, {self.capacity})"
@@ -66,7 +71,36 @@ class Vehicle(traci.StepListener):
         Returns:
             List of SUMO IDs of edges that comrpise vehcile's route.
         """
-        return traci.route.getEdges(traci.vehicle.getRouteID(self.id))
+        return traci.vehicle.getRoute(self.id)
+
+    def get_route_index(self) -> int:
+        """Get index in vehicle's route of the edge that vehicle is currently on.
+
+        Note:
+            The route index is subscribed to on first use, so that afterwards it
+            arrives with every simulation step instead of costing a TraCI round trip.
+
+        Returns:
+            Index in vehicle's route of the edge that vehicle is currently on.
+        """
+        route_index = traci.vehicle.getSubscriptionResults(self.id).get(tc.VAR_ROUTE_INDEX)
+        if route_index is None:
+            traci.vehicle.subscribe(self.id, [tc.VAR_ROUTE_INDEX])
+            route_index = traci.vehicle.getSubscriptionResults(self.id)[tc.VAR_ROUTE_INDEX]
+        return route_index
+
+    def set_route(self, edge_id_list: list[str]) -> None:
+        """Replace vehicle's route, starting from the edge that vehicle is currently on.
+
+        Args:
+            edge_id_list: List of SUMO IDs of edges that comprise vehicle's new route.
+
+        Raises:
+            traci.TraCIException: If the new route is not valid for vehicle.
+        """
+        traci.vehicle.setRoute(self.id, edge_id_list)
+        self.route_index = None
+        logger.debug("Rerouted %s along %d edges", self, len(edge_id_list))
 
     def is_visiting_warehouse(self, warehouse: Warehouse) -> bool:
         """Whether vehicle is yet to reach warehouse.
@@ -98,11 +132,12 @@ class Vehicle(traci.StepListener):
             isDriving=True,
         )
 
-    def add_package(self, package: Package) -> None:
+    def add_package(self, package: Package, drop_route_index: int | None = None) -> None:
         """Add a package to the vehicle for transporting to a pickup point.
 
         Args:
             package: Package object to be added to vehicle.
+            drop_route_index (optional): Index in vehicle's route of the edge to drop package off at. Defaults to the next occurrence of the edge closest to package's pickup point.
 
         Raises:
             AssertionError: If addition of package would exceed capacity of vehicle.
@@ -123,9 +158,28 @@ class Vehicle(traci.StepListener):
             logger.error("AssertionError", exc_info=True)
             raise e
 
+        if drop_route_index is not None:
+            package.drop_route_index = drop_route_index
+        else:
+            route_edge_id_list = self.get_route_edge_id_list()
+            route_index = self.get_route_index()
+            try:
+                package.drop_route_index = route_edge_id_list.index(
+                    package.assigned_pickup.nearest_edge_id, route_index
+                )
+            except ValueError:
+                logger.warning("Route of %s does not pass by pickup of %s", self, package)
+                package.drop_route_index = -1
+
         self.carrying_package_set.add(package)
-        traci.vehicle.setColor(self.id, (0, 255, 0))
-        logger.debug(f"Assigned vehicle of {package} to {self}")
+        self.route_index = None
+        WriteBuffer.write("vehicle", "setColor", self.id, (0, 255, 0))
+        logger.debug(
+            "Assigned vehicle of %s to %s with drop_route_index=%d",
+            package,
+            self,
+            package.drop_route_index,
+        )
 
     def drop_package(self, package: Package) -> None:
         """Drop a package off onto its assigned pickup point.
@@ -145,26 +199,29 @@ class Vehicle(traci.StepListener):
             raise e
 
         self.carrying_package_set.remove(package)
-        traci.vehicle.setColor(self.id, (255, 255, 0))
-        logger.debug(f"Dropped {package} by {self}")
+        WriteBuffer.write("vehicle", "setColor", self.id, (255, 255, 0))
+        logger.debug("Dropped %s by %s", package, self)
+        log_event(
+            "drop",
+            package=package.destination_id,
+            vehicle=self.id,
+            pickup=package.assigned_pickup.id,
+        )
 
         package.assigned_pickup.add_package(package)
-        package.reached_pickup = True
+        package.mark_reached_pickup()
 
     def check_reached_pickup(self):
-        packages_to_drop: list[Package] = []
-
-        for package in self.carrying_package_set:
-            try:
-                assert (
-                    package.assigned_pickup is not None
-                ), f"Attempted to query vehicle on {package} with no assigned pickup"
-            except AssertionError as e:
-                logger.error("AssertionError", exc_info=True)
-                raise e
+        route_index = self.get_route_index()
+        if route_index == self.route_index:
+            return
+        self.route_index = route_index
 
-            if self.get_road_id() == package.assigned_pickup.nearest_edge_id:
-                packages_to_drop.append(package)
+        packages_to_drop: list[Package] = [
+            package
+            for package in self.carrying_package_set
+            if 0 <= package.drop_route_index <= route_index
+        ]
 
         for package in packages_to_drop:
             self.drop_package(package)
@@ -187,7 +244,7 @@ class Vehicle(traci.StepListener):
         for vehicle in Vehicle.vehicle_list.copy():
             if vehicle.id not in traci_vehicle_list:
                 Vehicle.vehicle_list.remove(vehicle)
-                logger.debug(f"Removed {vehicle} since not in traci")
+                logger.debug("Removed %s since not in traci", vehicle)
 
     @staticmethod
     def get_vehicle_list() -> list[Vehicle]:
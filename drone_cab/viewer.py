@@ -0,0 +1,266 @@
+"""ViewerRelay class.
+
+This class implements the second TraCI client of a headless simulation,
+which relays snapshots of vehicles and drones to viewers that attach on
+demand, so that the compute client never waits on rendering.
+
+Run as ``python -m drone_cab.viewer --port PORT`` to attach a viewer
+to a simulation started with ``main.py --viewer-port PORT``.
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import queue
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any
+
+import numpy as np
+import traci
+import traci.constants as tc
+
+logger = logging.getLogger(__name__)
+
+#: Authentication key of connections between relay and viewers, which only listen on localhost.
+VIEWER_AUTHKEY: bytes = b"drone_cab.viewer"
+
+#: Prefix of the SUMO IDs of pickup point polygons, which are relayed once on attaching, as they never change shape.
+PICKUP_POLYGON_PREFIX: str = "pickup#"
+
+#: Prefix of the SUMO IDs of drone polygons, whose shapes are relayed with every snapshot.
+DRONE_POLYGON_PREFIX: str = "drone#"
+
+
+class ViewerRelay(threading.Thread):
+    """TraCI client of order 2 that steps along with drone_cab and publishes snapshots to viewers.
+
+    SUMO is started with two clients: drone_cab as client 1 and this relay as client 2,
+    which holds the second slot from the start, so that viewers can attach to it and
+    detach from it at any time. The relay only steps while no viewer is attached. Once
+    one is, it subscribes to the positions and colors of all vehicles and to the shapes
+    of all drones, so that every snapshot arrives with the simulation step itself instead
+    of costing round trips, and hands the snapshot of every interval-th step to a sender
+    thread per viewer, which keeps only the latest snapshot if its viewer falls behind.
+
+    Args:
+        traci_port: Port of the SUMO TraCI server.
+        viewer_port: Port on localhost on which viewers attach.
+        warehouse_id: SUMO ID of the warehouse polygon, relayed once on attaching along with the pickup points.
+        interval (optional): Number of simulation steps between snapshots. Defaults to 1.
+
+    Attributes:
+        traci_port: Port of the SUMO TraCI server.
+        viewer_port: Port on localhost on which viewers attach.
+        warehouse_id: SUMO ID of the warehouse polygon.
+        interval: Number of simulation steps between snapshots.
+        stop_event: Event set to make the relay close its TraCI connection after the current step.
+        viewer_queue_list: Snapshot queue of every attached viewer.
+    """
+
+    def __init__(self, traci_port: int, viewer_port: int, warehouse_id: str, interval: int = 1) -> None:
+        super().__init__(name="ViewerRelay", daemon=True)
+        self.traci_port: int = traci_port
+        self.viewer_port: int = viewer_port
+        self.warehouse_id: str = warehouse_id
+        self.interval: int = interval
+        self.stop_event: threading.Event = threading.Event()
+        self.viewer_queue_list: list[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._listener = Listener(("localhost", self.viewer_port), authkey=VIEWER_AUTHKEY)
+        self._attached_list: list[Connection] = []
+
+    def __repr__(self) -> str:
+        return f"ViewerRelay({self.traci_port}, {self.viewer_port}, {len(self.viewer_queue_list)} viewers)"
+
+    def _accept(self) -> None:
+        while True:
+            try:
+                viewer_connection = self._listener.accept()
+            except OSError:
+                return
+            logger.info("Viewer attached to %s", self)
+            with self._lock:
+                self._attached_list.append(viewer_connection)
+
+    def _send(self, viewer_connection: Connection, viewer_queue: queue.Queue) -> None:
+        try:
+            while True:
+                snapshot = viewer_queue.get()
+                if snapshot is None:
+                    break
+                viewer_connection.send(snapshot)
+        except OSError:
+            logger.info("Viewer detached from %s", self)
+        finally:
+            with self._lock:
+                self.viewer_queue_list.remove(viewer_queue)
+            viewer_connection.close()
+
+    def _publish(self, snapshot: dict[str, Any]) -> None:
+        with self._lock:
+            viewer_queue_list = list(self.viewer_queue_list)
+        for viewer_queue in viewer_queue_list:
+            # Dropping the previous snapshot if the viewer has not caught up with it yet
+            try:
+                viewer_queue.get_nowait()
+            except queue.Empty:
+                pass
+            viewer_queue.put_nowait(snapshot)
+
+    def run(self) -> None:
+        connection = traci.connect(self.traci_port)
+        connection.setOrder(2)
+        connection.simulation.subscribe([tc.VAR_DEPARTED_VEHICLES_IDS])
+        threading.Thread(target=self._accept, name="ViewerRelayAccept", daemon=True).start()
+        logger.info("Started %s", self)
+
+        subscribed = False
+        step = 0
+        while not self.stop_event.is_set():
+            connection.simulationStep()
+            step += 1
+            departed_id_list = connection.simulation.getSubscriptionResults().get(
+                tc.VAR_DEPARTED_VEHICLES_IDS, ()
+            )
+
+            with self._lock:
+                attached_list, self._attached_list = self._attached_list, []
+            polygon_id_list = connection.polygon.getIDList() if attached_list else []
+            if attached_list and not subscribed:
+                for vehicle_id in connection.vehicle.getIDList():
+                    connection.vehicle.subscribe(vehicle_id, [tc.VAR_POSITION, tc.VAR_COLOR])
+                # Selecting by ID rather than by type, which would cost a round trip per polygon of the map
+                for polygon_id in polygon_id_list:
+                    if polygon_id.startswith(DRONE_POLYGON_PREFIX):
+                        connection.polygon.subscribe(polygon_id, [tc.VAR_SHAPE])
+                subscribed = True
+            elif subscribed:
+                for vehicle_id in departed_id_list:
+                    connection.vehicle.subscribe(vehicle_id, [tc.VAR_POSITION, tc.VAR_COLOR])
+            for viewer_connection in attached_list:
+                static_polygon_dict = {
+                    polygon_id: (connection.polygon.getShape(polygon_id), connection.polygon.getColor(polygon_id))
+                    for polygon_id in polygon_id_list
+                    if polygon_id.startswith(PICKUP_POLYGON_PREFIX) or polygon_id == self.warehouse_id
+                }
+                viewer_queue: queue.Queue = queue.Queue(maxsize=1)
+                viewer_queue.put_nowait({"static_polygon_dict": static_polygon_dict})
+                with self._lock:
+                    self.viewer_queue_list.append(viewer_queue)
+                threading.Thread(
+                    target=self._send, args=(viewer_connection, viewer_queue), daemon=True
+                ).start()
+
+            if self.viewer_queue_list and step % self.interval == 0:
+                self._publish(
+                    {
+                        "step": step,
+                        "time": connection.simulation.getTime(),
+                        "vehicle_dict": {
+                            vehicle_id: (result[tc.VAR_POSITION], result[tc.VAR_COLOR])
+                            for vehicle_id, result in connection.vehicle.getAllSubscriptionResults().items()
+                        },
+                        "drone_dict": {
+                            polygon_id: result[tc.VAR_SHAPE]
+                            for polygon_id, result in connection.polygon.getAllSubscriptionResults().items()
+                        },
+                    }
+                )
+
+        connection.close()
+        self._listener.close()
+        with self._lock:
+            viewer_queue_list = list(self.viewer_queue_list)
+        for viewer_queue in viewer_queue_list:
+            try:
+                viewer_queue.get_nowait()
+            except queue.Empty:
+                pass
+            viewer_queue.put_nowait(None)
+        logger.info("Stopped %s", self)
+
+
+def draw_map(axes, net_file: str, poly_file: str) -> None:
+    """Draw the lanes and buildings of a map onto matplotlib axes, read from SUMO files without TraCI.
+
+    Args:
+        axes: Matplotlib axes to draw onto.
+        net_file: Path of the SUMO network file.
+        poly_file: Path of the SUMO polygon file.
+    """
+    from matplotlib.collections import LineCollection, PolyCollection
+
+    from drone_cab.mapdata import NetworkTable, load_polygons
+
+    lane_table = NetworkTable.from_net_file(net_file).lane_table
+    axes.add_collection(
+        LineCollection(
+            np.split(lane_table.coordinate_array, lane_table.offset_array[1:-1]), colors="0.6", linewidths=0.8
+        )
+    )
+    building_table = load_polygons(poly_file, {"building"}).get("building")
+    if building_table is not None:
+        axes.add_collection(
+            PolyCollection(
+                np.split(building_table.coordinate_array, building_table.offset_array[1:-1]),
+                facecolors="0.9",
+                edgecolors="0.75",
+                linewidths=0.3,
+            )
+        )
+
+
+def main() -> None:
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import PolyCollection
+
+    data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+    parser = argparse.ArgumentParser(description="Attach a viewer to a running headless simulation.")
+    parser.add_argument("--port", type=int, required=True, help="viewer port of the simulation, as in main.py --viewer-port")
+    parser.add_argument("--net-file", default=os.path.join(data_dir, "map.net.xml"), help="SUMO network file")
+    parser.add_argument("--poly-file", default=os.path.join(data_dir, "map.poly.xml"), help="SUMO polygon file")
+    args = parser.parse_args()
+
+    figure, axes = plt.subplots(figsize=(10, 10))
+    axes.set_aspect("equal")
+    draw_map(axes, args.net_file, args.poly_file)
+    axes.autoscale_view()
+    static_collection = axes.add_collection(PolyCollection([], zorder=2))
+    drone_collection = axes.add_collection(PolyCollection([], facecolors=(0, 0, 0.5), zorder=4))
+    vehicle_scatter = axes.scatter([], [], s=12, zorder=3)
+
+    connection = Client(("localhost", args.port), authkey=VIEWER_AUTHKEY)
+    plt.ion()
+    plt.show()
+    try:
+        while plt.fignum_exists(figure.number):
+            snapshot = None
+            # Rendering only the latest of the snapshots received since the last frame
+            while connection.poll(0.05 if snapshot is None else 0):
+                message = connection.recv()
+                if "static_polygon_dict" in message:
+                    static_collection.set_verts([shape for shape, _ in message["static_polygon_dict"].values()])
+                    static_collection.set_facecolors(
+                        [np.array(color) / 255 for _, color in message["static_polygon_dict"].values()]
+                    )
+                else:
+                    snapshot = message
+            if snapshot is not None:
+                vehicle_list = list(snapshot["vehicle_dict"].values())
+                vehicle_scatter.set_offsets(np.array([position for position, _ in vehicle_list]).reshape(-1, 2))
+                vehicle_scatter.set_facecolors([np.array(color) / 255 for _, color in vehicle_list])
+                drone_collection.set_verts(list(snapshot["drone_dict"].values()))
+                axes.set_title(f"Step {snapshot['step']}, time {snapshot['time']:.0f} s")
+            plt.pause(0.001)
+    except EOFError:
+        print("Simulation has ended")
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
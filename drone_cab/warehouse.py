@@ -11,6 +11,7 @@ import traci
 
 from drone_cab.tunables import WAREHOUSE_ID
 from drone_cab.utils import get_nearest_edge_id, shape2centroid
+from drone_cab.writebuffer import WriteBuffer
 
 logger = logging.getLogger(__name__)
 
@@ -27,14 +28,18 @@ class Warehouse:
         nearest_edge_id: SUMO ID of road edge that is closest to this warehouse.
     """
 
-    def __init__(self, warehouse_id: str = WAREHOUSE_ID()) -> None:
-        self.id: str = warehouse_id
-        traci.polygon.setColor(self.id, (0, 0, 255))
+    def __init__(self, warehouse_id: str | None = None) -> None:
+        self.id: str = WAREHOUSE_ID() if warehouse_id is None else warehouse_id
+        self.highlight()
         self.center: tuple[float, float] = shape2centroid(
             traci.polygon.getShape(self.id)
         )
         self.nearest_edge_id = get_nearest_edge_id(self.id)
-        logger.debug(f"Created {self}")
+        logger.debug("Created %s", self)
 
     def __repr__(self) -> str:
         return f"Warehouse({self.id})"
+
+    def highlight(self) -> None:
+        """Color this warehouse's polygon in the simulation."""
+        WriteBuffer.write("polygon", "setColor", self.id, (0, 0, 255))
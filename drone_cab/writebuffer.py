@@ -0,0 +1,81 @@
+"""WriteBuffer class.
+
+This class implements the per-step buffer of fire-and-forget visual
+TraCI writes, such as colors and shapes, which coalesces repeated writes
+to the same object and drops writes that would change nothing.
+
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+import traci
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBuffer:
+    """Buffer of visual TraCI writes, flushed once per step just before the simulation step.
+
+    Every write is identified by its TraCI domain, setter method and object ID. Only the
+    last value written to each is kept until the next flush, and writes of the value last
+    flushed to SUMO are dropped, so e.g. a parked drone does not resend its unchanged shape.
+
+    Note:
+        Only writes that no TraCI read depends on within the same step may be buffered,
+        since SUMO only sees them at the next flush.
+    """
+
+    pending_dict: dict[tuple[str, str, str], Any] = {}  #: Values to be written at the next flush, by domain, method and object ID.
+    applied_dict: dict[tuple[str, str, str], Any] = {}  #: Values last written to SUMO, by domain, method and object ID.
+    write_count: int = 0  #: Number of writes requested so far.
+    flush_count: int = 0  #: Number of writes sent to SUMO so far.
+
+    def __repr__(self) -> str:
+        return f"WriteBuffer({len(WriteBuffer.pending_dict)} pending, {WriteBuffer.flush_count}/{WriteBuffer.write_count} sent)"
+
+    @staticmethod
+    def write(domain_name: str, method_name: str, object_id: str, value: Any) -> None:
+        """Buffer a write of a value to an object, replacing any pending write of it.
+
+        Args:
+            domain_name: Name of the traci domain, e.g. "vehicle".
+            method_name: Name of the setter method of the domain, e.g. "setColor".
+            object_id: SUMO ID of the object to write to.
+            value: Value to write.
+        """
+        WriteBuffer.write_count += 1
+        key = (domain_name, method_name, object_id)
+        if key in WriteBuffer.applied_dict and WriteBuffer.applied_dict[key] == value:
+            WriteBuffer.pending_dict.pop(key, None)
+        else:
+            WriteBuffer.pending_dict[key] = value
+
+    @staticmethod
+    def flush() -> int:
+        """Send all pending writes to SUMO.
+
+        Returns:
+            Number of writes sent.
+        """
+        flushed_count = 0
+        for key, value in WriteBuffer.pending_dict.items():
+            domain_name, method_name, object_id = key
+            try:
+                getattr(getattr(traci, domain_name), method_name)(object_id, value)
+            except traci.TraCIException:
+                logger.warning("Failed to write %s.%s of %s", domain_name, method_name, object_id)
+                continue
+            WriteBuffer.applied_dict[key] = value
+            flushed_count += 1
+        WriteBuffer.pending_dict.clear()
+        WriteBuffer.flush_count += flushed_count
+        return flushed_count
+
+    @staticmethod
+    def reset() -> None:
+        """Forget all pending and applied writes, e.g. after SUMO has been (re)loaded."""
+        WriteBuffer.pending_dict.clear()
+        WriteBuffer.applied_dict.clear()
@@ -0,0 +1,87 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from anim_engine import (
+    DRONE_RANGE,
+    DRONE_SPEED,
+    animate,
+    christofides_path,
+    parse_args,
+    plan_trajectories,
+    setup_axes,
+)
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drone_cab.building import BuildingTable
+from drone_cab.viewer import draw_map
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--drones", type=int, default=2000, help="number of drones")
+parser.add_argument("--residences", type=int, default=6, help="number of residences delivered to per drone")
+parser.add_argument("--trail", type=int, default=20, help="number of steps of drone trails")
+parser.add_argument("--seed", type=int, default=0, help="seed of the drone placement")
+args = parse_args("Animate many drones, each delivering to its nearest residences, over the whole city.", parser)
+
+#
+# Constants for experiment setup
+#
+
+RESIDENCE_CENTERS = BuildingTable.from_poly_file(os.path.join(DATA_DIR, "map.poly.xml")).center_array
+rng = np.random.default_rng(args.seed)
+DRONE_CENTERS = RESIDENCE_CENTERS[
+    rng.choice(len(RESIDENCE_CENTERS), args.drones, replace=args.drones > len(RESIDENCE_CENTERS))
+]
+
+#
+# Matplotlib plot setup
+#
+
+(xmin, ymin), (xmax, ymax) = RESIDENCE_CENTERS.min(axis=0), RESIDENCE_CENTERS.max(axis=0)
+fig, ax, time_text, distance_text = setup_axes(
+    xlim=(xmin - DRONE_RANGE // 2, xmax + DRONE_RANGE // 2),
+    ylim=(ymin - DRONE_RANGE // 2, ymax + DRONE_RANGE // 2),
+)
+draw_map(ax, os.path.join(DATA_DIR, "map.net.xml"), os.path.join(DATA_DIR, "map.poly.xml"))
+
+#
+# Drone path (visit order) setup
+#
+
+start = time.perf_counter()
+# Nearest residences within half the range of every drone, besides the one it sits on
+distance_array, index_array = cKDTree(RESIDENCE_CENTERS).query(
+    DRONE_CENTERS, k=args.residences + 1, distance_upper_bound=DRONE_RANGE / 2
+)
+path_list = [
+    christofides_path(
+        tuple(center),
+        [tuple(RESIDENCE_CENTERS[index]) for index in indices[1:][distances[1:] < np.inf]],
+    )
+    for center, distances, indices in zip(DRONE_CENTERS.tolist(), distance_array, index_array)
+]
+position_array, distance_array = plan_trajectories(path_list, DRONE_SPEED)
+print(
+    f"Planned {position_array.shape[0]} steps of {position_array.shape[1]} drones "
+    f"in {time.perf_counter() - start:.2f}s"
+)
+
+anim = animate(
+    fig,
+    ax,
+    time_text,
+    distance_text,
+    position_array,
+    distance_array,
+    trail=args.trail,
+    drone_style={"marker": "o", "color": "navy", "s": 4},
+    output=args.output,
+    fps=args.fps,
+    frame_step=args.frame_step,
+)
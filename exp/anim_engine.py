@@ -0,0 +1,330 @@
+"""Shared animation engine of the drone experiments.
+
+Trajectories of all drones are precomputed as arrays up front, so that
+every frame only slices them into blitted collections instead of
+stepping global state and recreating artists, and animations are either
+shown or streamed frame by frame to an mp4 or gif writer.
+
+"""
+
+import argparse
+import os
+
+import matplotlib.animation as animation
+import matplotlib.pyplot as plt
+import networkx as nx
+import numpy as np
+from matplotlib import image
+from matplotlib.collections import LineCollection
+from matplotlib.offsetbox import AnnotationBbox, OffsetImage
+
+DRONE_IMAGE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "drone.png"
+)
+
+
+def euclidean_distance(a, b):
+    return ((a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2) ** 0.5
+
+
+#
+# Constants for experiment setup
+#
+
+DRONE_CENTER = (908.783925, 987.6503665714287)
+DRONE_SPEED = 2
+DRONE_RANGE = 200
+DT = 0.01  # seconds between frames
+RESIDENCE_CENTERS = [
+    (910.3206866, 982.6598806),
+    (897.7645155999999, 983.6238812000001),
+    (922.8360150000001, 979.0601842),
+    (885.4288334, 986.713737),
+    (916.4433986, 1009.9812502000001),
+    (903.5212868000001, 1012.4543188),
+    (935.511288, 976.1618116),
+    (929.5470677999999, 1008.9670884),
+    (904.1988334, 955.896592),
+    (891.9186599999999, 1016.1003201999999),
+    (892.1095095999999, 958.160534),
+    (874.1442128000001, 989.7869800000001),
+    (917.0004632, 953.3382267999999),
+    (940.6113167999999, 1004.4080469999999),
+    (879.0596686000001, 959.5672158000001),
+    (929.4756416, 951.8087621999999),
+    (879.8345105999999, 1019.1261244),
+    (949.6702131428572, 972.3344204285713),
+    (954.6100411428572, 999.501606),
+    (867.1061235999999, 962.9131648),
+    (859.8642066, 990.7989104000001),
+    (922.2138957999999, 1035.8376819999999),
+    (909.2441746000001, 1038.7797787999998),
+    (944.9507005714286, 949.1998157142858),
+    (934.6688631999999, 1033.8296896),
+    (866.4968436000001, 1022.0492722000001),
+    (897.2342978, 1041.781912),
+    (947.5591926000001, 1030.3686554),
+    (854.0374629999999, 966.0913326),
+    (899.3839294000002, 928.804644),
+    (888.0411787999999, 931.4964256),
+    (911.1884278, 926.650951),
+    (883.9453622000001, 1043.6868098),
+    (874.6398735999999, 934.1820111999999),
+    (960.4853264, 1026.6023628),
+    (924.1934728, 923.4633688),
+    (862.8532508000001, 937.0556304000002),
+    (970.3773014000001, 956.4991302000001),
+    (871.5755000000001, 1045.8307352),
+    (841.7862394, 969.6005736000001),
+    (966.6869708, 942.0474138),
+    (938.6003447142857, 919.1150458571428),
+    (849.2660953999999, 938.5192589999999),
+    (858.0868281999999, 1047.1114752),
+    (963.5278920000001, 927.9594903999999),
+    (924.7884723999999, 1067.5589888),
+    (827.5495724, 970.8122552000001),
+    (909.3331226, 1070.6436312),
+    (940.8595832000001, 1064.3849696000002),
+    (894.0721143999999, 904.8858782000001),
+    (883.0663814, 907.1689496000001),
+    (836.6484234000002, 942.5011658),
+    (906.2434393999999, 902.2196631999999),
+    (821.5524691999999, 999.2944396),
+    (959.0346302, 1059.899954),
+    (892.8427866, 1074.6552433999998),
+    (868.5190344, 908.6057537999999),
+    (961.4259366, 916.0363445999999),
+    (844.0037944, 1049.2635616000002),
+    (918.0183374000001, 897.1136936),
+    (856.6796019999999, 911.8420657999999),
+    (827.554931, 1031.296192),
+    (932.008994, 896.6970000000001),
+    (822.8893118, 945.4026488),
+    (877.1089652000001, 1078.0473178),
+    (996.7316752, 949.3832497999999),
+    (813.6211413999999, 972.7023057999999),
+    (844.6615038, 915.2693621999999),
+    (959.8089497999999, 905.2383588),
+]
+
+
+#
+# Command line setup
+#
+
+
+def parse_args(description: str, parser: argparse.ArgumentParser | None = None):
+    """Parse the rendering arguments shared by all experiments, plus those already added to parser."""
+    if parser is None:
+        parser = argparse.ArgumentParser()
+    parser.description = description
+    parser.add_argument(
+        "-o", "--output", default=None, help="path of the .mp4 or .gif file to render to, instead of showing"
+    )
+    parser.add_argument("--fps", type=int, default=30, help="frames per second of the rendered file")
+    parser.add_argument(
+        "--frame-step", type=int, default=1, help="number of simulated steps between animated frames"
+    )
+    return parser.parse_args()
+
+
+#
+# Matplotlib plot setup
+#
+
+
+def setup_axes(xlim: tuple[float, float], ylim: tuple[float, float], figsize=(10, 10)):
+    """Create the figure, its fixed-limit axes, and the time and distance texts."""
+    fig = plt.figure(figsize=figsize)
+    ax = fig.add_subplot(autoscale_on=False, xlim=xlim, ylim=ylim)
+    ax.set_aspect("equal")
+    ax.grid()
+
+    time_text = ax.text(x=0.01, y=0.97, s="", transform=ax.transAxes)
+    distance_text = ax.text(x=0.01, y=0.94, s="", transform=ax.transAxes)
+    return fig, ax, time_text, distance_text
+
+
+#
+# Drone path (visit order) setup
+#
+
+
+def christofides_path(center: tuple[float, float], residence_list: list[tuple[float, float]]):
+    """Visit order of residences, from and back to center, as per Christofides approximation of TSP."""
+    if not residence_list:
+        return [center]
+
+    G = nx.Graph()
+    G.add_node(center)
+    for residence in residence_list:
+        G.add_node(residence)
+    G.add_weighted_edges_from(
+        [
+            (node_i, node_j, euclidean_distance(node_i, node_j))
+            for node_i in G.nodes
+            for node_j in G.nodes
+            if node_i != node_j
+        ]
+    )
+    path = nx.algorithms.approximation.christofides(G)
+    assert (
+        path[0] == center
+    ), f"Drone attempted to take off from {path[0]} instead of {center=}"
+    return path
+
+
+#
+# Drone trajectory setup
+#
+
+
+def plan_trajectory(path: list[tuple[float, float]], speed: float) -> np.ndarray:
+    """Position of a drone flying along path in every step, of shape (n_steps, 2).
+
+    Every step covers speed along the current leg, or the rest of it on arriving
+    at its target, which is the next step's point of departure.
+    """
+    point_array = np.asarray(path, dtype=float).reshape(-1, 2)
+    leg_array = np.diff(point_array, axis=0)
+    length_array = np.hypot(leg_array[:, 0], leg_array[:, 1])
+    step_count_array = np.ceil(length_array / speed).astype(int)
+
+    leg_index_array = np.repeat(np.arange(len(leg_array)), step_count_array)
+    first_step_array = np.repeat(np.cumsum(step_count_array) - step_count_array, step_count_array)
+    step_index_array = np.arange(len(leg_index_array)) - first_step_array + 1
+    distance_array = np.minimum(step_index_array * speed, length_array[leg_index_array])
+    fraction_array = distance_array / length_array[leg_index_array]
+    position_array = (
+        point_array[leg_index_array] + fraction_array[:, np.newaxis] * leg_array[leg_index_array]
+    )
+    return np.vstack([point_array[:1], position_array])
+
+
+def plan_trajectories(path_list: list[list[tuple[float, float]]], speed: float):
+    """Positions of drones flying along paths, and their distances travelled, in every step.
+
+    Drones that finish early hover at their last point.
+
+    Returns:
+        Positions of shape (n_steps, n_drones, 2), and distances travelled of shape (n_steps, n_drones).
+    """
+    trajectory_list = [plan_trajectory(path, speed) for path in path_list]
+    step_count = max(len(trajectory) for trajectory in trajectory_list)
+    position_array = np.stack(
+        [
+            np.pad(trajectory, ((0, step_count - len(trajectory)), (0, 0)), mode="edge")
+            for trajectory in trajectory_list
+        ],
+        axis=1,
+    )
+    step_distance_array = np.linalg.norm(np.diff(position_array, axis=0), axis=2)
+    distance_array = np.vstack(
+        [np.zeros((1, len(trajectory_list))), np.cumsum(step_distance_array, axis=0)]
+    )
+    return position_array, distance_array
+
+
+#
+# Drone animation
+#
+
+
+def animate(
+    fig,
+    ax,
+    time_text,
+    distance_text,
+    position_array: np.ndarray,
+    distance_array: np.ndarray,
+    dt: float = DT,
+    trail: int | None = None,
+    drone_image: bool = False,
+    drone_style: dict | None = None,
+    output: str | None = None,
+    fps: int = 30,
+    frame_step: int = 1,
+):
+    """Animate precomputed drone trajectories, showing the animation or rendering it to output.
+
+    All drones are one scatter collection and all trails one line collection, which are
+    updated in place and blitted, so that the cost of a frame barely grows with the number
+    of drones. Drone images are only meant for a handful of drones; they are created once
+    and moved every frame.
+
+    Args:
+        fig, ax, time_text, distance_text: Figure, axes and texts, as created by setup_axes().
+        position_array: Positions of drones in every step, of shape (n_steps, n_drones, 2).
+        distance_array: Distances travelled by drones in every step, of shape (n_steps, n_drones).
+        dt: Simulated seconds per step.
+        trail: Number of steps of trails, or None for whole trajectories.
+        drone_image: Whether to depict drones by the drone image instead of markers.
+        drone_style: Keyword arguments of the scatter of drone markers.
+        output: Path of the .mp4 or .gif file to render to, or None to show the animation.
+        fps: Frames per second of the rendered file.
+        frame_step: Number of steps between frames.
+    """
+    step_count, drone_count = distance_array.shape
+
+    trace_collection = ax.add_collection(LineCollection([], lw=1, color="black"))
+    if drone_image:
+        drone_img = image.imread(DRONE_IMAGE_PATH)
+        drone_artist_list = [
+            ax.add_artist(
+                AnnotationBbox(OffsetImage(drone_img, zoom=0.20), tuple(position), frameon=False)
+            )
+            for position in position_array[0]
+        ]
+    else:
+        drone_artist_list = [
+            ax.scatter(
+                position_array[0, :, 0],
+                position_array[0, :, 1],
+                zorder=3,
+                **({"marker": "x", "color": "red", "s": 100} if drone_style is None else drone_style),
+            )
+        ]
+
+    def update(i):
+        first = 0 if trail is None else max(i - trail, 0)
+        trace_collection.set_segments(position_array[first : i + 1].transpose(1, 0, 2))
+        if drone_image:
+            for drone_box, position in zip(drone_artist_list, position_array[i]):
+                drone_box.xyann = drone_box.xy = tuple(position)
+        else:
+            drone_artist_list[0].set_offsets(position_array[i])
+
+        time_text.set_text(f"time = {i * dt:.2f}s")
+        distance_text.set_text(f"distance = {distance_array[i].sum():.2f}")
+
+        return (trace_collection, *drone_artist_list, time_text, distance_text)
+
+    frame_list = list(range(0, step_count, frame_step))
+    if frame_list[-1] != step_count - 1:
+        frame_list.append(step_count - 1)
+    anim = animation.FuncAnimation(
+        fig,
+        update,
+        frames=frame_list,
+        interval=dt * frame_step * 1000,
+        blit=True,
+        cache_frame_data=False,
+    )
+
+    if output is None:
+        plt.show()
+        return anim
+
+    if os.path.splitext(output)[1].lower() == ".gif":
+        writer = animation.PillowWriter(fps=fps)
+    else:
+        writer = animation.FFMpegWriter(fps=fps)
+    anim.save(
+        output,
+        writer=writer,
+        progress_callback=lambda frame, frame_count: print(
+            f"Rendered frame {frame + 1}/{frame_count}", end="\r"
+        ),
+    )
+    print(f"\nRendered {len(frame_list)} frames of {drone_count} drones to {output}")
+    return anim
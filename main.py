@@ -1,81 +1,365 @@
+import argparse
 import logging
 import os
+import shutil
 import sys
-from collections import deque
-from logging.handlers import RotatingFileHandler
+from typing import Iterator
 
 from drone_cab import Package, Pickup, Vehicle, Warehouse
-from drone_cab.assign import assign_package_pickup, assign_package_vehicle
+from drone_cab.building import BuildingTable
+from drone_cab.cache import (
+    ResultCache,
+    get_code_path_list,
+    get_sumo_version,
+    get_sumocfg_path_list,
+    scenario_key,
+)
+from drone_cab.checkpoint import load_checkpoint, save_checkpoint
+from drone_cab.clock import Clock
+from drone_cab.demand import hotspot_weights, hourly_rate, poisson_demand
+from drone_cab.events import start_logging
+from drone_cab.metrics import DeliveryMetrics, LatencyReport
+from drone_cab.profiling import TraciProfiler
+from drone_cab.scheduler import OrderScheduler
+from drone_cab.trace import TraceRecorder
+from drone_cab.tunables import TUNABLE_DICT, WAREHOUSE_ID, load_tunable_overrides
+from drone_cab.viewer import ViewerRelay
+from drone_cab.writebuffer import WriteBuffer
 
 if "SUMO_HOME" in os.environ:
     sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import sumolib
 import traci
 
 logger = logging.getLogger(__name__)
 
 
-def main():
-    logging.basicConfig(
-        handlers=[
-            RotatingFileHandler(
-                "drone_cab.log", mode="w", maxBytes=1024 * 1024 * 256, backupCount=1
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the drone-cab parcel delivery simulation.")
+    parser.add_argument(
+        "--steps", type=int, default=400, help="number of simulation steps to run"
+    )
+    parser.add_argument(
+        "--demand-rate",
+        type=float,
+        nargs="+",
+        default=None,
+        help="Poisson demand rate in orders per simulated hour, or a repeating profile of hourly rates; "
+        "defaults to three fixed orders",
+    )
+    parser.add_argument(
+        "--demand-start",
+        type=int,
+        default=30,
+        help="simulation step at which demand starts, after vehicles have warmed up",
+    )
+    parser.add_argument(
+        "--demand-seed", type=int, default=None, help="seed of the demand generator"
+    )
+    parser.add_argument(
+        "--hotspot",
+        type=float,
+        nargs=4,
+        action="append",
+        default=[],
+        metavar=("X", "Y", "SIGMA", "WEIGHT"),
+        help="Gaussian demand hotspot around (X, Y); may be given multiple times",
+    )
+    parser.add_argument(
+        "--pickup-layout",
+        default=None,
+        help="path of the pickup layout file, as computed by python -m drone_cab.placement; "
+        "defaults to the preset pickup points",
+    )
+    parser.add_argument(
+        "--detour",
+        action="store_true",
+        help="reroute vehicles to the warehouse and pickup points with the least detour, "
+        "instead of only assigning vehicles already passing by both",
+    )
+    parser.add_argument(
+        "--tunables",
+        default=None,
+        help="path of the JSON file of overridden tunables, as found by python -m drone_cab.tuning",
+    )
+    parser.add_argument(
+        "--no-gui",
+        action="store_true",
+        help="run SUMO without its GUI and without step delay, e.g. for batch runs",
+    )
+    parser.add_argument(
+        "--viewer-port",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="run SUMO headless with a second TraCI client relaying snapshots to viewers attaching on PORT "
+        "with python -m drone_cab.viewer, so that rendering never slows down the simulation",
+    )
+    parser.add_argument(
+        "--no-highlight",
+        action="store_true",
+        help="do not color destination residences of orders in the GUI, saving a TraCI call per order; "
+        "implied by --no-gui and --viewer-port",
+    )
+    parser.add_argument(
+        "--save-checkpoint",
+        nargs=2,
+        default=None,
+        metavar=("STEP", "DIR"),
+        help="save a checkpoint of the simulation to DIR at simulation step STEP",
+    )
+    parser.add_argument(
+        "--load-checkpoint",
+        default=None,
+        metavar="DIR",
+        help="resume the simulation from the checkpoint in DIR, e.g. to branch scenarios off a warmed-up one",
+    )
+    parser.add_argument(
+        "--log-file", default="drone_cab.log", help="path of the rotating text log file"
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="level of the text log; DEBUG is very verbose and slows down long runs",
+    )
+    parser.add_argument(
+        "--event-log",
+        default=None,
+        help="path of the JSON lines log of deliveries, assignments, dispatches and drops",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="path of the .csv, .npz or .parquet file to record delivered packages to, followed by those "
+        "undelivered at the end with a delivered step of -1",
+    )
+    parser.add_argument(
+        "--cache",
+        default=None,
+        metavar="DIR",
+        help="directory of cached delivery metrics of scenarios, from which identical scenarios are "
+        "served without simulating; requires --metrics and a --demand-seed for Poisson demand",
+    )
+    parser.add_argument(
+        "--trace",
+        default=None,
+        metavar="DIR",
+        help="record drone and vehicle positions and package status transitions of every step to a "
+        "binary trace in DIR, to be replayed with python -m drone_cab.trace DIR",
+    )
+    parser.add_argument(
+        "--latency-report",
+        action="store_true",
+        help="report percentiles of package latencies per pickup point and per stage",
+    )
+    parser.add_argument(
+        "--profile-traci",
+        action="store_true",
+        help="count TraCI calls and their latency, and report the top offenders",
+    )
+    return parser.parse_args()
+
+
+def get_scenario_key(args: argparse.Namespace, sumocfg_path: str, sumo_binary: str) -> str:
+    """Compute the key of the scenario of a run, as per the command line arguments.
+
+    Args:
+        args: Parsed command line arguments, after overriding tunables.
+        sumocfg_path: Path of the SUMO configuration file.
+        sumo_binary: Name of the SUMO binary that runs the scenario.
+
+    Returns:
+        Key of the scenario in a result cache.
+    """
+    path_list = get_sumocfg_path_list(sumocfg_path) + get_code_path_list() + [os.path.abspath(__file__)]
+    if args.pickup_layout is not None:
+        path_list.append(args.pickup_layout)
+    if args.load_checkpoint is not None:
+        path_list.extend(
+            sorted(
+                entry.path for entry in os.scandir(args.load_checkpoint) if entry.is_file()
             )
-        ],
-        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-        level=logging.DEBUG,
-    )
-
-    traci.start(
-        [
-            "sumo-gui",
-            "-c",
-            os.path.join(
-                os.path.dirname(os.path.abspath(__file__)),
-                "data",
-                "config.sumocfg",
-            ),
-            "-d",
-            "150",
-        ]
+        )
+    return scenario_key(
+        path_list,
+        {
+            "steps": args.steps,
+            "demand_rate": args.demand_rate,
+            "demand_start": args.demand_start,
+            "demand_seed": args.demand_seed,
+            "hotspot": args.hotspot,
+            "detour": args.detour,
+            "tunables": {name: function() for name, function in TUNABLE_DICT.items()},
+            "sumo_version": get_sumo_version(sumo_binary),
+            "metrics_format": os.path.splitext(args.metrics)[1].lower(),
+        },
+    )
+
+
+def create_demand(args: argparse.Namespace) -> Iterator[list[Package]]:
+    """Create the Poisson demand generator as per the command line arguments.
+
+    Args:
+        args: Parsed command line arguments.
+
+    Returns:
+        Generator of packages ordered in each simulation step.
+    """
+    weight_list = None
+    if args.hotspot:
+        weight_list = hotspot_weights(Package.building_table.center_array, args.hotspot)
+    return poisson_demand(
+        Package.building_table.id_list,
+        args.demand_rate[0] if len(args.demand_rate) == 1 else hourly_rate(args.demand_rate),
+        step_length=Clock.step_length,
+        start_time=Clock.current_time,
+        weight_list=weight_list,
+        seed=args.demand_seed,
+        highlight=args.highlight,
+    )
+
+
+def main():
+    args = parse_args()
+    # Colors only show in the GUI
+    args.highlight = not (args.no_gui or args.viewer_port is not None or args.no_highlight)
+
+    log_listener = start_logging(
+        args.log_file, level=getattr(logging, args.log_level), event_log_file=args.event_log
     )
+
+    if args.tunables is not None:
+        load_tunable_overrides(args.tunables)
+    sumocfg_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "config.sumocfg")
+    sumo_binary = "sumo" if args.no_gui or args.viewer_port is not None else "sumo-gui"
+
+    cache = None
+    if args.cache is not None:
+        if args.metrics is None or (args.demand_rate is not None and args.demand_seed is None):
+            logger.warning("Not using result cache without --metrics, or with unseeded demand")
+        elif (
+            args.event_log
+            or args.latency_report
+            or args.save_checkpoint
+            or args.profile_traci
+            or args.trace
+        ):
+            logger.warning("Not using result cache, which only stores delivery metrics")
+        elif os.path.exists(args.metrics):
+            logger.warning("Not using result cache, as %s would be appended to", args.metrics)
+        else:
+            cache = ResultCache(args.cache)
+            cache_key = get_scenario_key(args, sumocfg_path, sumo_binary)
+            cached_path = cache.get(cache_key, os.path.splitext(args.metrics)[1].lower())
+            if cached_path is not None:
+                shutil.copyfile(cached_path, args.metrics)
+                logger.info("Served delivery metrics of scenario %s from %s", cache_key, cache)
+                log_listener.stop()
+                return
+
+    relay = None
+    if args.viewer_port is None:
+        traci.start(
+            [
+                sumo_binary,
+                "-c",
+                sumocfg_path,
+            ]
+            + ([] if args.no_gui else ["-d", "150"])
+        )
+    else:
+        # SUMO waits for all clients to connect before serving any of them
+        traci_port = sumolib.miscutils.getFreeSocketPort()
+        relay = ViewerRelay(traci_port, args.viewer_port, WAREHOUSE_ID())
+        relay.start()
+        traci.start([sumo_binary, "-c", sumocfg_path, "--num-clients", "2"], port=traci_port)
+        traci.setOrder(1)
     logger.info("traci.start()")
 
-    warehouse = Warehouse()
-    pickup_list = Pickup.create_pickup_list()
-    for pickup in pickup_list:
+    profiler = None
+    if args.profile_traci:
+        profiler = TraciProfiler()
+        profiler.install()
+
+    traci.addStepListener(Clock())
+    Package.building_table = BuildingTable.from_poly_file(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "map.poly.xml")
+    )
+    if args.metrics is not None:
+        Package.delivery_metrics = DeliveryMetrics(args.metrics)
+    if args.latency_report:
+        Package.latency_report = LatencyReport()
+
+    if args.load_checkpoint is None:
+        scheduler = OrderScheduler(
+            Pickup.create_pickup_list(args.pickup_layout), Warehouse(), detour=args.detour
+        )
+    else:
+        scheduler = load_checkpoint(args.load_checkpoint, highlight=args.highlight)
+        scheduler.detour = args.detour
+    for pickup in scheduler.pickup_list:
         traci.addStepListener(pickup.drone)
         traci.addStepListener(pickup)
+    if args.trace is not None:
+        Package.trace_recorder = TraceRecorder(args.trace, scheduler.pickup_list)
 
-    package_queue: deque[Package] = deque()
+    demand = None
 
-    for step in range(400):
-        logger.info(f"Simulation {step=}")
+    for step in range(Clock.current_step, args.steps):
+        if args.save_checkpoint is not None and step == int(args.save_checkpoint[0]):
+            save_checkpoint(args.save_checkpoint[1], scheduler)
+
+        logger.info("Simulation step=%d", step)
 
         for vehicle in Vehicle.get_vehicle_list():
             vehicle.step()
 
-        if step == 30:
-            for destination_id in ["234807099", "239713538", "359039090"]:
-                package_queue.append(Package(destination_id))
-
-        while package_queue:
-            package = package_queue.popleft()
-            try:
-                pickup = assign_package_pickup(package, pickup_list)
-                assert pickup is not None, f"Failed to assign {package} to any pickup"
-                vehicle = assign_package_vehicle(
-                    package, Vehicle.get_vehicle_list(), warehouse
-                )
-                assert vehicle is not None, f"Failed to assign {package} to any vehicle"
-            except AssertionError:
-                package_queue.appendleft(package)
-                logger.debug("AssertionError", exc_info=True)
+        if step == args.demand_start and args.demand_rate is None:
+            scheduler.submit(
+                Package(destination_id, highlight=args.highlight)
+                for destination_id in ["234807099", "239713538", "359039090"]
+            )
+        if demand is None and args.demand_rate is not None and step >= args.demand_start:
+            demand = create_demand(args)
+
+        if demand is not None:
+            scheduler.submit(next(demand))
 
+        scheduler.schedule()
+
+        if Package.trace_recorder is not None:
+            Package.trace_recorder.record_step()
+        WriteBuffer.flush()
         traci.simulationStep()
         logger.info("traci.simulationStep()")
 
+    if Package.delivery_metrics is not None:
+        # Recording the packages still undelivered at the end too, with a delivered step of -1
+        for package in Package.store.find():
+            if not package.reached_destination:
+                Package.delivery_metrics.record(package)
+        Package.delivery_metrics.close()
+        if cache is not None:
+            cache.put(cache_key, args.metrics)
+    if Package.latency_report is not None:
+        print(Package.latency_report.format())
+    if Package.trace_recorder is not None:
+        Package.trace_recorder.close()
+
+    if profiler is not None:
+        profiler.uninstall()
+        print(profiler.report())
+
+    WriteBuffer.flush()
+    logger.info("Sent %d of %d visual writes", WriteBuffer.flush_count, WriteBuffer.write_count)
+    if relay is not None:
+        relay.stop_event.set()
     traci.close()
     logger.info("traci.close()")
+    if relay is not None:
+        relay.join()
+    log_listener.stop()
 
 
 if __name__ == "__main__":
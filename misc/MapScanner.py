@@ -1,8 +1,22 @@
+import math
 import traci
 import sumolib
 import numpy as np
-import pulp as pl
+try:
+    import pulp as pl
+except ImportError: # The offline scanner falls back to heuristics without PuLP
+    pl = None
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix
+from scipy.spatial import cKDTree
+import argparse
+import json
+import os
 import sys
+import time
+import xml.etree.ElementTree as ET
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
 from Utility import *
 from typing import List, Tuple
 import random
@@ -143,6 +157,7 @@ def addWarehouse(net: sumolib.net.Net, middle = False):
     ymid = (boundary[1] + boundary[3]) / 2 if middle else random.uniform(boundary[1], boundary[3])
     midPoint = Point(xmid, ymid)
     # traci.polygon.add("warehouse", [ (xmid-2, ymid-2), (xmid+2, ymid-2), (xmid+2, ymid+2), (xmid-2, ymid+2)], (0, 0, 255), True, "Warehouse",1)
+    # The offline counterpart is locateWarehouse, which snaps with a RoadIndex instead of SUMO
     road = traci.simulation.convertRoad(xmid, ymid, False, "passenger")
     doPrint(road)
     edge = net.getEdge(road[0])
@@ -177,24 +192,163 @@ def addWarehouse(net: sumolib.net.Net, middle = False):
     #             links.append(nlnk)
     
 
-def InitializeAllPossibleStations(roads : list[Road]) -> list[Station]:
+def readPolygonsOffline(polyFile, polygonTypes) -> list[Polygon]:
+    doPrint("Reading polygons of types {} from {}...".format(polygonTypes, polyFile))
+    polygons = []
+    for _, element in ET.iterparse(polyFile):
+        if element.tag == "poly":
+            if element.get("type") in polygonTypes:
+                shape = [tuple(map(float, pt.split(","))) for pt in element.get("shape").split()]
+                polygons.append(Polygon(element.get("id"), shape))
+            element.clear()
+    doPrint("{} polygons are read!".format(len(polygons)))
+    return polygons
+
+def locateWarehouse(net: sumolib.net.Net, roadIndex: RoadIndex, middle = True):
+    # Same placement as addWarehouse, beside the road nearest to the chosen point, without SUMO
+    boundary = net.getBoundary()
+    xmid = (boundary[0] + boundary[2]) / 2 if middle else random.uniform(boundary[0], boundary[2])
+    ymid = (boundary[1] + boundary[3]) / 2 if middle else random.uniform(boundary[1], boundary[3])
+    midPoint = Point(xmid, ymid)
+    road, projPoint = roadIndex.snap(xmid, ymid)
+    distance = projPoint.getDistanceFrom(midPoint)
+    width = 4 + road.width # for warehouse width
+    if distance == 0:
+        location = projPoint
+    else:
+        location = Point(projPoint.x + (midPoint.x - projPoint.x) * width / distance, projPoint.y + (midPoint.y - projPoint.y) * width / distance)
+    doPrint("Warehouse is located at ({}, {}) beside road {}.".format(location.x, location.y, road.id))
+    return location, road
+
+def InitializeAllPossibleStations(roads : list[Road], asArrays=False):
     doPrint("Initializing all possbile stations at {} meters apart!".format(Constant.INITIAL_STATION_PLACEMENT_DISTANCE))
-    stations = []
-    for road in roads:
-        locations = road.getAllPossibleStationLocation()
-        for location in locations:
-            station = Station(location, road)
-            stations.append(station)
-            doPrint("Station {} is added at ({}, {})".format(station.id, station.location.x, station.location.y))
-    return stations
-
-def calculateCoverageByPossibleStations(stations: list[Station], points: list[CornerPoint]):
-    for station in stations:
-        # print("\r Calculating Coverage by stations {} out of {}...".format(station.id, len(stations)),end="")
-        doPrint("\r Calculating Coverage by stations {} out of {}...".format(station.id, len(stations)),end="", inLogFile=False)
-        station.findAllPointsInRange(points)
-        station.determineCoveredPolygon()
-    doPrint("Calculating coverage by all stations...Done!")
+    locations, roadIndices = sampleStationLocations(roads, Constant.INITIAL_STATION_PLACEMENT_DISTANCE)
+    doPrint("{} possible stations are sampled along {} roads!".format(len(locations), len(roads)))
+    if asArrays:
+        return locations, roadIndices
+    return [Station(Point(x, y), roads[i]) for (x, y), i in zip(locations.tolist(), roadIndices.tolist())]
+
+def getPolygonCornerArrays(polygons: list[Polygon]):
+    cornerCounts = np.array([len(polygon.corner_points) for polygon in polygons], dtype=np.int64)
+    cornerOffsets = np.concatenate(([0], np.cumsum(cornerCounts))).astype(np.int64)
+    corners = np.array([(point.x, point.y) for polygon in polygons for point in polygon.corner_points], dtype=float).reshape(-1, 2)
+    return corners, cornerOffsets, cornerCounts
+
+coverageWorkerState = {}
+
+def setCoverageWorkerArrays(corners, cornerOffsets, locations, radius):
+    cornerCounts = np.diff(cornerOffsets)
+    centroids = np.add.reduceat(corners, cornerOffsets[:-1], axis=0) / cornerCounts[:, np.newaxis]
+    coverageWorkerState.update(corners=corners, cornerOffsets=cornerOffsets, cornerCounts=cornerCounts, locations=locations, radius=radius, centroidTree=cKDTree(centroids))
+
+def initCoverageWorker(sharedArraySpecs, radius):
+    arrays = {}
+    for name, (sharedMemoryName, shape, dtype) in sharedArraySpecs.items():
+        sharedMemory = SharedMemory(name=sharedMemoryName)
+        coverageWorkerState["sharedMemory_" + name] = sharedMemory # Keeps the segment attached
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=sharedMemory.buf)
+    setCoverageWorkerArrays(arrays["corners"], arrays["cornerOffsets"], arrays["locations"], radius)
+
+def calculateTileCoverage(tileStations, pairsPerChunk=1_000_000):
+    corners = coverageWorkerState["corners"]
+    cornerOffsets = coverageWorkerState["cornerOffsets"]
+    cornerCounts = coverageWorkerState["cornerCounts"]
+    locations = coverageWorkerState["locations"]
+    radius = coverageWorkerState["radius"] # Passed on, as spawned workers would not see Constant set by the CLI
+
+    # A station covering all corners of a polygon covers their mean too, so only stations in range of the centroid are candidates
+    candidates = coverageWorkerState["centroidTree"].sparse_distance_matrix(cKDTree(locations[tileStations]), radius, output_type="ndarray")
+    polygonIndices = candidates["i"].astype(np.int64)
+    stationIndices = tileStations[candidates["j"]]
+
+    # A polygon is fully covered by a station if all of its corners are in range, i.e. its count of corners in range is its count of corners
+    covered = np.zeros(len(candidates), dtype=bool)
+    for start in range(0, len(candidates), pairsPerChunk):
+        chunkPolygons = polygonIndices[start:start + pairsPerChunk]
+        chunkStations = stationIndices[start:start + pairsPerChunk]
+        chunkCounts = cornerCounts[chunkPolygons]
+        chunkOffsets = np.concatenate(([0], np.cumsum(chunkCounts)[:-1]))
+        cornerIndices = np.repeat(cornerOffsets[chunkPolygons] - chunkOffsets, chunkCounts) + np.arange(chunkCounts.sum())
+        difference = corners[cornerIndices] - locations[np.repeat(chunkStations, chunkCounts)]
+        inRange = np.einsum("ij,ij->i", difference, difference) <= radius ** 2
+        covered[start:start + pairsPerChunk] = np.add.reduceat(inRange, chunkOffsets) == chunkCounts
+    return stationIndices[covered], polygonIndices[covered]
+
+def getStationTiles(locations, tileSize):
+    cells = np.floor(locations / tileSize).astype(np.int64)
+    _, tileIds = np.unique(cells, axis=0, return_inverse=True)
+    order = np.argsort(tileIds.ravel(), kind="stable")
+    boundaries = np.flatnonzero(np.diff(tileIds.ravel()[order])) + 1
+    return np.split(order, boundaries) if len(order) else []
+
+def shareArrays(arrays):
+    sharedMemories = []
+    sharedArraySpecs = {}
+    for name, array in arrays.items():
+        sharedMemory = SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=sharedMemory.buf)[...] = array
+        sharedMemories.append(sharedMemory)
+        sharedArraySpecs[name] = (sharedMemory.name, array.shape, array.dtype.str)
+    return sharedMemories, sharedArraySpecs
+
+def calculateCoverageByPossibleStations(stations, polygons: list[Polygon], processes=None, tileSize=Constant.COVERAGE_TILE_SIZE, stationSubset=None) -> csr_matrix:
+    # Stations are either Station objects, or an array of their locations as per InitializeAllPossibleStations(roads, asArrays=True)
+    # Only the stations in stationSubset get rows of coverage if given, which is how changed tiles are rescanned
+    doPrint("Calculating coverage by all stations...")
+    corners, cornerOffsets, _ = getPolygonCornerArrays(polygons)
+    if isinstance(stations, np.ndarray):
+        locations = stations.astype(float).reshape(-1, 2)
+    else:
+        locations = np.array([(station.location.x, station.location.y) for station in stations], dtype=float).reshape(-1, 2)
+    if stationSubset is None:
+        tiles = getStationTiles(locations, tileSize)
+    else:
+        tiles = [stationSubset[tile] for tile in getStationTiles(locations[stationSubset], tileSize)]
+    processes = min(processes or os.cpu_count() or 1, len(tiles))
+    doPrint("Splitting {} stations into {} tiles over {} processes...".format(sum(map(len, tiles)), len(tiles), processes))
+
+    results = []
+    lastReport = time.monotonic()
+    def reportProgress():
+        nonlocal lastReport
+        if time.monotonic() - lastReport >= Constant.PROGRESS_INTERVAL or len(results) == len(tiles):
+            lastReport = time.monotonic()
+            doPrint("\r Calculating coverage of tiles {} out of {}...".format(len(results), len(tiles)), end="", inLogFile=False)
+
+    if processes <= 1:
+        setCoverageWorkerArrays(corners, cornerOffsets, locations, Constant.MAX_UAV_DISTANCE)
+        for tileStations in tiles:
+            results.append(calculateTileCoverage(tileStations))
+            reportProgress()
+        coverageWorkerState.clear()
+    else:
+        sharedMemories, sharedArraySpecs = shareArrays({"corners": corners, "cornerOffsets": cornerOffsets, "locations": locations})
+        try:
+            with Pool(processes, initializer=initCoverageWorker, initargs=(sharedArraySpecs, Constant.MAX_UAV_DISTANCE)) as pool:
+                # Largest tiles first, so that no process is left with a big tile at the end
+                tiles.sort(key=len, reverse=True)
+                for result in pool.imap_unordered(calculateTileCoverage, tiles):
+                    results.append(result)
+                    reportProgress()
+        finally:
+            for sharedMemory in sharedMemories:
+                sharedMemory.close()
+                sharedMemory.unlink()
+
+    stationIndices = np.concatenate([result[0] for result in results]) if results else np.empty(0, dtype=np.int64)
+    polygonIndices = np.concatenate([result[1] for result in results]) if results else np.empty(0, dtype=np.int64)
+    coverageMatrix = csr_matrix((np.ones(len(stationIndices), dtype=bool), (stationIndices, polygonIndices)), shape=(len(locations), len(polygons)))
+    if not isinstance(stations, np.ndarray):
+        assignCoverage(stations, polygons, coverageMatrix)
+    doPrint("Calculating coverage by all stations...Done! {} station-polygon pairs covered.".format(coverageMatrix.nnz))
+    return coverageMatrix
+
+def assignCoverage(stations: list[Station], polygons: list[Polygon], coverageMatrix: csr_matrix):
+    for i in range(len(stations)):
+        stations[i].coveredPolygon = [polygons[j] for j in coverageMatrix.indices[coverageMatrix.indptr[i]:coverageMatrix.indptr[i + 1]].tolist()]
+    coverageByPolygon = coverageMatrix.tocsc()
+    for j in range(len(polygons)):
+        polygons[j].fully_covered_by = [stations[i] for i in coverageByPolygon.indices[coverageByPolygon.indptr[j]:coverageByPolygon.indptr[j + 1]].tolist()]
 
 def showStations(stations : list[Station]):
     for station in stations:
@@ -204,9 +358,10 @@ def showStations(stations : list[Station]):
 
 def reportUncoveredPolygon(polygons: list[Polygon]) :
     uncovered_count = 0
-    for polygon in polygons:
-        # print("\r Checking polygon coverage {} out of {}...".format(polygons.index(polygon)+1, len(polygons)),end="")
-        doPrint("\r Checking polygon coverage {} out of {}...".format(polygons.index(polygon)+1, len(polygons)),end="", inLogFile=False)
+    for i, polygon in enumerate(polygons):
+        # print("\r Checking polygon coverage {} out of {}...".format(i+1, len(polygons)),end="")
+        if (i + 1) % 10000 == 0 or i + 1 == len(polygons):
+            doPrint("\r Checking polygon coverage {} out of {}...".format(i+1, len(polygons)),end="", inLogFile=False)
         if not polygon.isFullyCovered():
             # print(polygon.id, polygon.corner_points)
             doPrint("Polygon {} of shape {} is not covered!".format(polygon.id, polygon.shape_string))
@@ -217,22 +372,150 @@ def reportUncoveredPolygon(polygons: list[Polygon]) :
         doPrint("\n {} out of {} Polygons are not covered!".format(uncovered_count, len(polygons)))
     return uncovered_count
 
-def getCoverageMatrix(polygons: list[Polygon], stations: list[Station]):
-    cov = np.zeros((len(stations), len(polygons)))
-    for i in range(len(polygons)):
-        for station in polygons[i].fully_covered_by:
-            cov[station.id-1, i] = 1
-    return cov
+def getCoverageMatrix(polygons: list[Polygon], stations: list[Station]) -> csr_matrix:
+    stationIndices = [station.id-1 for polygon in polygons for station in polygon.fully_covered_by]
+    polygonIndices = [i for i in range(len(polygons)) for _ in polygons[i].fully_covered_by]
+    return csr_matrix((np.ones(len(stationIndices), dtype=bool), (stationIndices, polygonIndices)), shape=(len(stations), len(polygons)))
 
-def formulateProblem(stationCount, polygonCount, coverageMatrix):
+def formulateProblem(stationCount, polygonCount, coverageMatrix: csr_matrix):
     doPrint("Formulating problem in PuLP!")
+    coverageByPolygon = coverageMatrix.tocsc()
     problem = pl.LpProblem("Minimum_Coverage", pl.LpMinimize)
     x = pl.LpVariable.dicts("x", [i for i in range(stationCount)], lowBound=0.0, cat=pl.LpBinary)
     problem += pl.lpSum([x[i] for i in range(stationCount)])
     for j in range(polygonCount):
-        problem += pl.lpSum([x[i] * coverageMatrix[i, j] for i in range(stationCount)]) >= 1.0
+        coveringStations = coverageByPolygon.indices[coverageByPolygon.indptr[j]:coverageByPolygon.indptr[j + 1]].tolist()
+        if coveringStations:
+            problem += pl.lpSum([x[i] for i in coveringStations]) >= 1.0
+    doPrint("Formulated {} constraints with {} terms.".format(len(problem.constraints), coverageByPolygon.nnz))
     return problem, x
 
+def getCoverablePolygons(coverageMatrix: csr_matrix):
+    return np.diff(coverageMatrix.tocsc().indptr) > 0
+
+def greedySetCover(coverageMatrix: csr_matrix, initial=None) -> list[int]:
+    # Completes the initial selection if given, e.g. a previous solution repaired after map changes
+    coverageMatrix = coverageMatrix.tocsr()
+    coverageByPolygon = coverageMatrix.T.tocsr()
+    uncovered = getCoverablePolygons(coverageMatrix)
+    selected = list(initial or [])
+    if selected:
+        uncovered[coverageMatrix[selected].indices] = False
+    gains = coverageMatrix.astype(np.int64) @ uncovered.astype(np.int64)
+    while len(gains) and gains.max() > 0:
+        i = int(np.argmax(gains))
+        selected.append(i)
+        newlyCovered = coverageMatrix.indices[coverageMatrix.indptr[i]:coverageMatrix.indptr[i + 1]]
+        newlyCovered = newlyCovered[uncovered[newlyCovered]]
+        uncovered[newlyCovered] = False
+        gains -= np.bincount(coverageByPolygon[newlyCovered].indices, minlength=len(gains))
+    return selected
+
+def removeRedundantStations(coverageMatrix: csr_matrix, selected: list[int]) -> list[int]:
+    coverCounts = np.asarray(coverageMatrix[selected].sum(axis=0)).ravel()
+    kept = []
+    for i in reversed(selected):
+        polygons = coverageMatrix.indices[coverageMatrix.indptr[i]:coverageMatrix.indptr[i + 1]]
+        if np.all(coverCounts[polygons] > 1):
+            coverCounts[polygons] -= 1
+        else:
+            kept.append(i)
+    return kept[::-1]
+
+def solveRelaxation(coverageMatrix: csr_matrix, timeLimit=Constant.LP_TIME_LIMIT):
+    coverable = getCoverablePolygons(coverageMatrix)
+    result = linprog(
+        np.ones(coverageMatrix.shape[0]),
+        A_ub=-coverageMatrix.T.tocsr()[coverable].astype(float),
+        b_ub=-np.ones(coverable.sum()),
+        bounds=(0, 1),
+        method="highs",
+        options={"time_limit": timeLimit},
+    )
+    if not result.success:
+        doPrint("LP relaxation not solved : {}".format(result.message))
+        return None, 0.0
+    return result.x, result.fun
+
+def getDualLowerBound(coverageMatrix: csr_matrix):
+    # Giving every polygon 1 / (most polygons covered by any of its stations) is dual feasible, so its sum bounds the optimum
+    coverageByPolygon = coverageMatrix.tocsc()
+    coverable = np.diff(coverageByPolygon.indptr) > 0
+    stationDegrees = np.diff(coverageMatrix.tocsr().indptr)
+    maxDegrees = np.maximum.reduceat(stationDegrees[coverageByPolygon.indices], coverageByPolygon.indptr[:-1][coverable]) if coverable.any() else np.ones(0)
+    return float(np.sum(1.0 / maxDegrees))
+
+def lpRoundingSetCover(coverageMatrix: csr_matrix, relaxation) -> list[int]:
+    # Adding stations in decreasing order of their LP value until all are covered, then pruning the redundant ones
+    coverageMatrix = coverageMatrix.tocsr()
+    uncovered = getCoverablePolygons(coverageMatrix)
+    remaining = uncovered.sum()
+    selected = []
+    for i in np.argsort(-relaxation, kind="stable").tolist():
+        if remaining == 0:
+            break
+        polygons = coverageMatrix.indices[coverageMatrix.indptr[i]:coverageMatrix.indptr[i + 1]]
+        newlyCovered = polygons[uncovered[polygons]]
+        if len(newlyCovered):
+            uncovered[newlyCovered] = False
+            remaining -= len(newlyCovered)
+            selected.append(i)
+    return removeRedundantStations(coverageMatrix, selected)
+
+def solveSetCover(coverageMatrix: csr_matrix, timeLimit=Constant.ILP_TIME_LIMIT, maxIlpTerms=Constant.MAX_ILP_TERMS, initial=None):
+    # A previous selection given as initial is completed to a feasible solution and used to warm start the solvers
+    stationCount, polygonCount = coverageMatrix.shape
+    warmStart = None
+    incumbent = None
+    if initial is not None:
+        warmStart = removeRedundantStations(coverageMatrix, greedySetCover(coverageMatrix, initial))
+        doPrint("Warm starting from {} previous stations, repaired to {} stations.".format(len(initial), len(warmStart)))
+    if pl is None:
+        doPrint("PuLP is not installed, falling back to heuristics!")
+    elif coverageMatrix.nnz <= maxIlpTerms:
+        problem, x = formulateProblem(stationCount, polygonCount, coverageMatrix)
+        if warmStart is not None:
+            warmStartSet = set(warmStart)
+            for i in range(stationCount):
+                x[i].setInitialValue(1 if i in warmStartSet else 0)
+        doPrint("Solving Problem using PuLP within {} seconds!".format(timeLimit))
+        problem.solve(pl.PULP_CBC_CMD(msg=False, timeLimit=timeLimit, warmStart=warmStart is not None))
+        if problem.sol_status == pl.LpSolutionOptimal:
+            selected = [i for i in range(stationCount) if x[i].value() > 0.5]
+            doPrint("PuLP has solved optimally with objective value {}.".format(len(selected)))
+            return selected, len(selected), 0.0
+        if problem.sol_status == pl.LpSolutionIntegerFeasible:
+            # A time-limited incumbent is usually the best cover available, so it competes with the heuristics
+            incumbent = [i for i in range(stationCount) if x[i].value() > 0.5]
+            doPrint("PuLP has stopped at the time limit with {} stations, comparing with heuristics!".format(len(incumbent)))
+        else:
+            doPrint("PuLP has not solved optimally ({}), falling back to heuristics!".format(pl.LpStatus[problem.status]))
+    else:
+        doPrint("Problem has {} terms, more than {}, falling back to heuristics!".format(coverageMatrix.nnz, maxIlpTerms))
+
+    if warmStart is not None and len(warmStart) <= math.ceil(getDualLowerBound(coverageMatrix) - 1e-6):
+        doPrint("Warm start with {} stations meets the lower bound, so it is optimal!".format(len(warmStart)))
+        return warmStart, len(warmStart), 0.0
+    doPrint("Solving LP relaxation using HiGHS within {} seconds!".format(Constant.LP_TIME_LIMIT))
+    relaxation, lowerBound = solveRelaxation(coverageMatrix, Constant.LP_TIME_LIMIT)
+    lowerBound = max(lowerBound, getDualLowerBound(coverageMatrix))
+    candidates = [("greedy", removeRedundantStations(coverageMatrix, greedySetCover(coverageMatrix)))]
+    if warmStart is not None:
+        candidates.insert(0, ("warm start", warmStart))
+    if incumbent is not None:
+        candidates.insert(0, ("CBC", incumbent))
+    if relaxation is not None:
+        candidates.append(("LP rounding", lpRoundingSetCover(coverageMatrix, relaxation)))
+    for name, selected in candidates:
+        doPrint("{} set cover selected {} stations.".format(name, len(selected)))
+    name, selected = min(candidates, key=lambda candidate: len(candidate[1]))
+
+    # Any integer solution needs at least as many stations as the lower bound, rounded up
+    lowerBound = math.ceil(lowerBound - 1e-6)
+    gap = (len(selected) - lowerBound) / len(selected) if selected else 0.0
+    doPrint("Using {} set cover with {} stations, lower bound {}, optimality gap at most {:.2%}.".format(name, len(selected), lowerBound, gap))
+    return selected, lowerBound, gap
+
 def removeStation(allStations : list[Station], index: int):
     station = allStations[index]
     station.prepareForRemoval()
@@ -247,7 +530,7 @@ def reportPolygonCoverage(polygons : list[Polygon]):
 def doPrint(msg, inSUMO = True, inConsole = True, end="\n", inLogFile = True ):
     if inConsole:
         print(msg, end=end)
-    if inSUMO:
+    if inSUMO and traci.isLoaded():
         traci.simulation.writeMessage(msg)
     if inLogFile:
         Logger.Write(str(msg))
@@ -269,34 +552,26 @@ def runMapScanner(config_file_path, gui=False, logFile="log.txt"):
     # # residential_polygon_types = selectPolygonTypesAsResedentials(polygon_types)
     # residential_polygon_types = ['building']
     # residential_polygons, all_points = ExtractRequiredPolygons(residential_polygon_types)
-    # sortAllPoints(all_points)
     # # vehicleTypes = selectVehicleTypesForParcelCarry()     
     # vehicleTypes = ['taxi']
     # roads = getAllowedRoad(net, vehicleTypes)
     # possible_stations = InitializeAllPossibleStations(roads)
     # showStations(possible_stations)
-    # calculateCoverageByPossibleStations(possible_stations, all_points)
+    # coverage_matrix = calculateCoverageByPossibleStations(possible_stations, residential_polygons)
     # if reportUncoveredPolygon(residential_polygons) == 0:
-    #     coverage_matrix = getCoverageMatrix(residential_polygons, possible_stations)
-    #     problem, x = formulateProblem(len(possible_stations), len(residential_polygons), coverage_matrix)    
-    #     solver = pl.PULP_CBC_CMD()
-    #     doPrint("Solving Problem using PuLP!")
-    #     if(problem.solve(solver) == 1):
-    #         doPrint("PuLP has solve with objective value {}. ".format(problem.objective.value()))
-    #         doPrint("Removing unselected stations...")
-    #         for i in range(len(x)-1, -1, -1):
-    #             # print(x[i].value())
-    #             if x[i].value() == 0:
-    #                 removeStation(possible_stations, i)
-    #         doPrint("Optimal number of Stations after removal : {}".format(Station.count), True)                
-    #         for station in possible_stations:
-    #             # station.printStation()
-    #             doPrint("Station id : {}, location = ({}, {}), road = {}".format(station.id, station.location.x, station.location.y, station.at_road.id))
-    #         doPrint("Cross-verifying coverage..")            
-    #         reportUncoveredPolygon(residential_polygons)
-    #         reportPolygonCoverage(residential_polygons)
-    #     else:
-    #         doPrint(pl.LpStatus[problem.status])
+    #     selected, lower_bound, gap = solveSetCover(coverage_matrix)
+    #     doPrint("Removing unselected stations...")
+    #     selected = set(selected)
+    #     for i in range(len(possible_stations)-1, -1, -1):
+    #         if i not in selected:
+    #             removeStation(possible_stations, i)
+    #     doPrint("Number of Stations after removal : {} (optimality gap at most {:.2%})".format(Station.count, gap), True)
+    #     for station in possible_stations:
+    #         # station.printStation()
+    #         doPrint("Station id : {}, location = ({}, {}), road = {}".format(station.id, station.location.x, station.location.y, station.at_road.id))
+    #     doPrint("Cross-verifying coverage..")            
+    #     reportUncoveredPolygon(residential_polygons)
+    #     reportPolygonCoverage(residential_polygons)
         
     # nodes = net.getNodes()
     # for node in nodes:
@@ -313,4 +588,196 @@ def runMapScanner(config_file_path, gui=False, logFile="log.txt"):
     Logger.Close()
     traci.close()
 
-runMapScanner("test.sumocfg.xml", True)
+def getScanSettings(args):
+    # A previous scan state is only reused if it was made with the same settings
+    return {
+        "placementDistance": Constant.INITIAL_STATION_PLACEMENT_DISTANCE,
+        "uavDistance": Constant.MAX_UAV_DISTANCE,
+        "tileSize": Constant.COVERAGE_TILE_SIZE,
+        "polygonTypes": sorted(args.polygon_types),
+        "vehicleClasses": sorted(args.vehicle_classes),
+    }
+
+def saveScanState(stateFile, settings, polygons: list[Polygon], locations, stationRoadIds, coverageMatrix: csr_matrix, selected):
+    corners, cornerOffsets, _ = getPolygonCornerArrays(polygons)
+    coverageMatrix = coverageMatrix.tocsr()
+    with open(stateFile, "wb") as file:
+        np.savez_compressed(
+            file,
+            settings=np.array(json.dumps(settings, sort_keys=True)),
+            polygonIds=np.array([polygon.id for polygon in polygons], dtype=str),
+            corners=corners,
+            cornerOffsets=cornerOffsets,
+            locations=locations,
+            stationRoadIds=np.array(stationRoadIds, dtype=str),
+            coverageIndptr=coverageMatrix.indptr,
+            coverageIndices=coverageMatrix.indices,
+            selected=np.array(selected, dtype=np.int64),
+        )
+    doPrint("Saved scan state of {} stations and {} polygons to {}.".format(len(locations), len(polygons), stateFile))
+
+def loadScanState(stateFile, settings):
+    if not os.path.exists(stateFile):
+        doPrint("No previous scan state at {}, scanning from scratch!".format(stateFile))
+        return None
+    with np.load(stateFile, allow_pickle=False) as state:
+        state = dict(state)
+    if json.loads(str(state["settings"])) != settings:
+        doPrint("Previous scan state at {} has other settings, scanning from scratch!".format(stateFile))
+        return None
+    state["coverageMatrix"] = csr_matrix(
+        (np.ones(len(state["coverageIndices"]), dtype=bool), state["coverageIndices"], state["coverageIndptr"]),
+        shape=(len(state["locations"]), len(state["polygonIds"])),
+    )
+    return state
+
+def matchPolygons(state, polygons: list[Polygon]):
+    # Index of every polygon in the previous scan, or -1 if it is new or its shape has changed
+    corners, cornerOffsets, cornerCounts = getPolygonCornerArrays(polygons)
+    previousIndex = {polygonId: k for k, polygonId in enumerate(state["polygonIds"].tolist())}
+    matches = np.array([previousIndex.get(polygon.id, -1) for polygon in polygons], dtype=np.int64)
+    previousCounts = np.diff(state["cornerOffsets"])
+    candidates = np.flatnonzero((matches >= 0) & (previousCounts[np.maximum(matches, 0)] == cornerCounts))
+    candidateCounts = cornerCounts[candidates]
+    if candidateCounts.sum():
+        chunkOffsets = np.concatenate(([0], np.cumsum(candidateCounts)[:-1]))
+        positions = np.arange(candidateCounts.sum()) - np.repeat(chunkOffsets, candidateCounts)
+        sameCorners = np.all(
+            corners[np.repeat(cornerOffsets[candidates], candidateCounts) + positions]
+            == state["corners"][np.repeat(state["cornerOffsets"][matches[candidates]], candidateCounts) + positions],
+            axis=1,
+        )
+        unchanged = np.zeros(len(polygons), dtype=bool)
+        unchanged[candidates] = np.logical_and.reduceat(sameCorners, chunkOffsets)
+    else:
+        unchanged = np.zeros(len(polygons), dtype=bool)
+        unchanged[candidates] = True # Only polygons without corners
+    matches[~unchanged] = -1
+    return matches
+
+def matchStations(state, locations, stationRoadIds):
+    # Stations are sampled deterministically along each road, so unchanged roads give the very same stations
+    previousIndex = {key: k for k, key in enumerate(zip(state["stationRoadIds"].tolist(), map(tuple, state["locations"].tolist())))}
+    return np.array([previousIndex.get(key, -1) for key in zip(stationRoadIds, map(tuple, locations.tolist()))], dtype=np.int64)
+
+def calculateCoverageIncrementally(state, locations, stationRoadIds, polygons: list[Polygon], processes=None, tileSize=Constant.COVERAGE_TILE_SIZE):
+    polygonMatches = matchPolygons(state, polygons)
+    stationMatches = matchStations(state, locations, stationRoadIds)
+    changedPolygons = np.flatnonzero(polygonMatches < 0)
+    doPrint("Map changes : {} polygons new or changed, {} previous polygons removed or changed, {} stations new, {} previous stations removed.".format(
+        len(changedPolygons), len(state["polygonIds"]) - np.count_nonzero(polygonMatches >= 0),
+        np.count_nonzero(stationMatches < 0), len(state["locations"]) - np.count_nonzero(stationMatches >= 0)))
+
+    # A tile is rescanned if it has new stations, or if any new or changed polygon has its centroid in range of its stations
+    corners, cornerOffsets, cornerCounts = getPolygonCornerArrays(polygons)
+    changedTree = None
+    if len(changedPolygons):
+        changedCentroids = np.add.reduceat(corners, cornerOffsets[:-1], axis=0)[changedPolygons] / cornerCounts[changedPolygons, np.newaxis]
+        changedTree = cKDTree(changedCentroids)
+    tiles = getStationTiles(locations, tileSize)
+    dirtyTiles = [
+        tile for tile in tiles
+        if np.any(stationMatches[tile] < 0) or (changedTree is not None and cKDTree(locations[tile]).count_neighbors(changedTree, Constant.MAX_UAV_DISTANCE) > 0)
+    ]
+    dirtyStations = np.concatenate(dirtyTiles) if dirtyTiles else np.empty(0, dtype=np.int64)
+    doPrint("Rescanning {} out of {} tiles with {} stations...".format(len(dirtyTiles), len(tiles), len(dirtyStations)))
+    dirtyCoverage = calculateCoverageByPossibleStations(locations, polygons, processes, tileSize, stationSubset=dirtyStations).tocoo()
+
+    # Coverage of every other station is carried over, for the polygons that are unchanged
+    newStationOf = np.full(len(state["locations"]), -1, dtype=np.int64)
+    newStationOf[stationMatches[stationMatches >= 0]] = np.flatnonzero(stationMatches >= 0)
+    newPolygonOf = np.full(len(state["polygonIds"]), -1, dtype=np.int64)
+    newPolygonOf[polygonMatches[polygonMatches >= 0]] = np.flatnonzero(polygonMatches >= 0)
+    isDirty = np.zeros(len(locations), dtype=bool)
+    isDirty[dirtyStations] = True
+    previousCoverage = state["coverageMatrix"].tocoo()
+    stationIndices = newStationOf[previousCoverage.row]
+    polygonIndices = newPolygonOf[previousCoverage.col]
+    kept = (stationIndices >= 0) & (polygonIndices >= 0)
+    kept[kept] = ~isDirty[stationIndices[kept]]
+    coverageMatrix = csr_matrix(
+        (np.ones(kept.sum() + dirtyCoverage.nnz, dtype=bool),
+         (np.concatenate((stationIndices[kept], dirtyCoverage.row)), np.concatenate((polygonIndices[kept], dirtyCoverage.col)))),
+        shape=(len(locations), len(polygons)),
+    )
+    doPrint("Carried over {} and rescanned {} station-polygon pairs.".format(kept.sum(), dirtyCoverage.nnz))
+
+    previousSelected = newStationOf[state["selected"]]
+    return coverageMatrix, previousSelected[previousSelected >= 0].tolist()
+
+def scanMapOffline(args):
+    # Same pipeline as runMapScanner, on the network and polygon files directly, without starting SUMO
+    Logger.Initialize(args.log_file)
+    Constant.INITIAL_STATION_PLACEMENT_DISTANCE = args.placement_distance
+    Constant.MAX_UAV_DISTANCE = args.uav_distance
+    Constant.LP_TIME_LIMIT = args.time_limit
+    Constant.COVERAGE_TILE_SIZE = args.tile_size
+    startTime = time.monotonic()
+
+    doPrint("Reading network from {}...".format(args.net))
+    net = sumolib.net.readNet(args.net)
+    residential_polygons = readPolygonsOffline(args.poly, args.polygon_types)
+    roads = getAllowedRoad(net, args.vehicle_classes)
+    doPrint("{} roads allow vehicle classes {}.".format(len(roads), args.vehicle_classes))
+    roadIndex = RoadIndex(roads)
+    warehouse, warehouseRoad = locateWarehouse(net, roadIndex, not args.random_warehouse)
+
+    locations, roadIndices = InitializeAllPossibleStations(roads, asArrays=True)
+    station_road_ids = [roads[i].id for i in roadIndices.tolist()]
+    settings = getScanSettings(args)
+    state = loadScanState(args.state, settings) if args.state else None
+    initial = None
+    if state is None:
+        coverage_matrix = calculateCoverageByPossibleStations(locations, residential_polygons, args.processes, Constant.COVERAGE_TILE_SIZE)
+    else:
+        coverage_matrix, initial = calculateCoverageIncrementally(state, locations, station_road_ids, residential_polygons, args.processes, Constant.COVERAGE_TILE_SIZE)
+    coverable = getCoverablePolygons(coverage_matrix)
+    uncovered = [residential_polygons[j].id for j in np.flatnonzero(~coverable).tolist()]
+    for polygonId in uncovered:
+        doPrint("Polygon {} is not covered by any station!".format(polygonId))
+    doPrint("{} out of {} polygons are not covered!".format(len(uncovered), len(residential_polygons)))
+
+    selected, lower_bound, gap = solveSetCover(coverage_matrix, timeLimit=args.time_limit, initial=initial)
+    if args.state:
+        saveScanState(args.state, settings, residential_polygons, locations, station_road_ids, coverage_matrix, selected)
+    # Same layout format as drone_cab.placement, so that the simulation can load it with --pickup-layout
+    layout = {
+        "version": 1,
+        "drone_range": 2 * Constant.MAX_UAV_DISTANCE,
+        "spacing": Constant.INITIAL_STATION_PLACEMENT_DISTANCE,
+        "vehicle_class": " ".join(args.vehicle_classes),
+        "method": "mapscanner",
+        "lower_bound": lower_bound,
+        "gap": gap,
+        "warehouse": {"center": [warehouse.x, warehouse.y], "edge_id": warehouseRoad.id},
+        "pickup_list": [
+            {"center": locations[i].tolist(), "edge_id": station_road_ids[i]} for i in selected
+        ],
+        "uncovered_building_id_list": uncovered,
+    }
+    with open(args.output, "w") as file:
+        json.dump(layout, file, indent=2)
+    doPrint("Saved {} stations to {} in {:.1f} seconds (optimality gap at most {:.2%}).".format(len(selected), args.output, time.monotonic() - startTime, gap))
+    Logger.Close()
+    return layout
+
+def parseArguments(argv=None):
+    parser = argparse.ArgumentParser(description="Scan a map for drone stations covering all residentials, without SUMO.")
+    parser.add_argument("--net", required=True, help="SUMO network file")
+    parser.add_argument("--poly", required=True, help="SUMO polygon file")
+    parser.add_argument("-o", "--output", default="layout.json", help="station layout file to write")
+    parser.add_argument("--polygon-types", nargs="+", default=["building"], help="polygon types treated as residentials")
+    parser.add_argument("--vehicle-classes", nargs="+", default=["taxi", "passenger"], help="vehicle classes carrying parcels")
+    parser.add_argument("--placement-distance", type=float, default=Constant.INITIAL_STATION_PLACEMENT_DISTANCE, help="meters between possible stations")
+    parser.add_argument("--uav-distance", type=float, default=Constant.MAX_UAV_DISTANCE, help="meters a UAV can fly from its station")
+    parser.add_argument("--processes", type=int, default=None, help="processes for coverage, defaults to all CPUs")
+    parser.add_argument("--tile-size", type=float, default=Constant.COVERAGE_TILE_SIZE, help="meters of side of the tiles of stations scanned together")
+    parser.add_argument("--time-limit", type=float, default=Constant.ILP_TIME_LIMIT, help="seconds for the solver")
+    parser.add_argument("--random-warehouse", action="store_true", help="place the warehouse at random instead of the middle")
+    parser.add_argument("--state", default=None, help="scan state file to rescan incrementally from, and to update")
+    parser.add_argument("--log-file", default="log.txt", help="log file to write")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    # runMapScanner("test.sumocfg.xml", True) # Interactive scan within SUMO
+    scanMapOffline(parseArguments())
@@ -1,10 +1,17 @@
 from __future__ import annotations
 import math
+import numpy as np
+from scipy.spatial import cKDTree
 # from typing import overload
 
 class Constant:
     INITIAL_STATION_PLACEMENT_DISTANCE =  20# meters
     MAX_UAV_DISTANCE = 200 # meters
+    ILP_TIME_LIMIT = 60 # seconds
+    LP_TIME_LIMIT = 30 # seconds
+    COVERAGE_TILE_SIZE = 1000 # meters, side of the square tiles of stations evaluated per task
+    PROGRESS_INTERVAL = 1.0 # seconds between progress lines
+    MAX_ILP_TERMS = 2_000_000 # coverage pairs, above which CBC is not attempted
 
 class Point:
     def __init__(self, x, y) -> None:
@@ -82,30 +89,70 @@ class Road:
         return ["({}, {})".format(pt.x, pt.y) for pt in self.centerLine]
 
     def getAllPossibleStationLocation(self):
-        locations = []
-        placement_distance = Constant.INITIAL_STATION_PLACEMENT_DISTANCE
-        Logger.Write("Road : {}, Direction {}{}, Gradient : {}, Angle : {}".format(self.id, '\u2192' if self.centerLine[0].x < self.centerLine[1].x else '\u2190' if self.centerLine[0].x > self.centerLine[1].x else '\u2194', '\u2191' if self.centerLine[0].y < self.centerLine[1].y else '\u2193' if self.centerLine[0].y > self.centerLine[1].y else '\u2195', self.centerLine[0].getGradient(self.centerLine[1]), self.centerLine[0].getAngleOfGradient(self.centerLine[1])))
-        for i in range(len(self.centerLine) - 1):
-            distance = self.centerLine[i].getDistanceFrom(self.centerLine[i+1])
-            if distance < placement_distance:
-                placement_distance -= distance
-                continue
-            else:
-                angle = self.centerLine[i].getAngleOfGradient(self.centerLine[i+1])
-                x = self.centerLine[i].x
-                y = self.centerLine[i].y
-                while placement_distance < distance:
-                    x = (placement_distance * self.centerLine[i+1].x + (distance - placement_distance) * x) / distance
-                    y = (placement_distance * self.centerLine[i+1].y + (distance - placement_distance) * y) / distance
-                    # To do : 
-                    xPlacement = x - self.width * math.sin(angle)
-                    yPlacement = y - self.width * math.cos(angle)
-                    locations.append(Point(xPlacement, yPlacement))
-                    distance = self.centerLine[i+1].getDistanceFrom(Point(x, y))
-                    placement_distance = Constant.INITIAL_STATION_PLACEMENT_DISTANCE
-                placement_distance -= distance
-        return locations
+        locations, _ = sampleStationLocations([self])
+        return [Point(x, y) for x, y in locations.tolist()]
     
+def getRoadSegmentArrays(roads : list[Road]):
+    pointCounts = np.array([len(road.centerLine) for road in roads], dtype=np.int64)
+    points = np.array([(pt.x, pt.y) for road in roads for pt in road.centerLine], dtype=float).reshape(-1, 2)
+    pointOffsets = np.concatenate(([0], np.cumsum(pointCounts)))
+
+    # Segments join consecutive points of the same road only
+    isSegmentStart = np.ones(len(points), dtype=bool)
+    isSegmentStart[pointOffsets[1:][pointCounts > 0] - 1] = False
+    segmentStarts = np.flatnonzero(isSegmentStart)
+    segmentRoads = np.repeat(np.arange(len(roads)), np.maximum(pointCounts - 1, 0))
+    segmentVectors = points[segmentStarts + 1] - points[segmentStarts]
+    segmentLengths = np.hypot(segmentVectors[:, 0], segmentVectors[:, 1])
+    segmentOffsets = np.concatenate(([0], np.cumsum(np.maximum(pointCounts - 1, 0))))
+    return points[segmentStarts], segmentRoads, segmentVectors, segmentLengths, segmentOffsets
+
+def sampleStationLocations(roads : list[Road], placementDistance=Constant.INITIAL_STATION_PLACEMENT_DISTANCE):
+    # Every placementDistance meters of arc length along each road's center line, continuing across its vertices
+    widths = np.array([road.width for road in roads], dtype=float)
+    segmentPoints, segmentRoads, segmentVectors, segmentLengths, segmentOffsets = getRoadSegmentArrays(roads)
+    segmentEnds = np.cumsum(segmentLengths)
+    arcOffsets = np.concatenate(([0.0], segmentEnds))[segmentOffsets]
+    roadStarts = arcOffsets[:-1]
+    roadLengths = np.diff(arcOffsets)
+
+    # Stations strictly before the end of each road, as in walking its center line
+    sampleCounts = np.maximum(np.ceil(roadLengths / placementDistance).astype(np.int64) - 1, 0)
+    sampleRoads = np.repeat(np.arange(len(roads)), sampleCounts)
+    sampleFirsts = np.cumsum(sampleCounts) - sampleCounts
+    sampleArcs = (np.arange(sampleCounts.sum()) - np.repeat(sampleFirsts, sampleCounts) + 1) * placementDistance
+    sampleSegments = np.searchsorted(segmentEnds, roadStarts[sampleRoads] + sampleArcs, side="right")
+    sampleSegments = np.minimum(sampleSegments, segmentOffsets[sampleRoads + 1] - 1)
+    fractions = (roadStarts[sampleRoads] + sampleArcs - (segmentEnds[sampleSegments] - segmentLengths[sampleSegments])) / segmentLengths[sampleSegments]
+    centers = segmentPoints[sampleSegments] + fractions[:, np.newaxis] * segmentVectors[sampleSegments]
+
+    # Stations are offset by the road width to the right of the direction of travel, perpendicular to its segment
+    directions = segmentVectors[sampleSegments] / segmentLengths[sampleSegments, np.newaxis]
+    normals = np.column_stack((directions[:, 1], -directions[:, 0]))
+    locations = centers + widths[sampleRoads, np.newaxis] * normals
+    return locations, sampleRoads
+
+class RoadIndex:
+    # Snaps points onto the nearest road, via a KD-tree over points sampled densely along all center lines
+    def __init__(self, roads : list[Road], sampleDistance=5.0) -> None:
+        self.roads = roads
+        self.segmentPoints, self.segmentRoads, self.segmentVectors, self.segmentLengths, _ = getRoadSegmentArrays(roads)
+        sampleCounts = np.ceil(self.segmentLengths / sampleDistance).astype(np.int64) + 1
+        sampleSegments = np.repeat(np.arange(len(self.segmentLengths)), sampleCounts)
+        sampleFirsts = np.cumsum(sampleCounts) - sampleCounts
+        fractions = (np.arange(sampleCounts.sum()) - np.repeat(sampleFirsts, sampleCounts)) / np.maximum(sampleCounts[sampleSegments] - 1, 1)
+        self.sampleSegments = sampleSegments
+        self.tree = cKDTree(self.segmentPoints[sampleSegments] + fractions[:, np.newaxis] * self.segmentVectors[sampleSegments])
+
+    def snap(self, x, y, candidates=16):
+        _, sampleIndices = self.tree.query((x, y), k=min(candidates, self.tree.n))
+        segments = np.unique(self.sampleSegments[np.atleast_1d(sampleIndices)])
+        squaredLengths = np.maximum(self.segmentLengths[segments] ** 2, 1e-12)
+        fractions = np.clip(((np.array([x, y]) - self.segmentPoints[segments]) * self.segmentVectors[segments]).sum(axis=1) / squaredLengths, 0.0, 1.0)
+        projections = self.segmentPoints[segments] + fractions[:, np.newaxis] * self.segmentVectors[segments]
+        nearest = int(np.argmin(np.hypot(projections[:, 0] - x, projections[:, 1] - y)))
+        return self.roads[self.segmentRoads[segments[nearest]]], Point(projections[nearest, 0], projections[nearest, 1])
+
 class Station:
     count = 0
     def __init__(self, location: Point, road: Road) -> None:
@@ -125,32 +172,22 @@ class Station:
     def getYaxisRange(self):
         return self.location.y - Constant.MAX_UAV_DISTANCE, self.location.y + Constant.MAX_UAV_DISTANCE
     
-    def findAllPointsInRange(self, allPointsSorted : list[CornerPoint]):
-        xmin, xmax = self.getXaxisRange()
-        # ymin, ymax = self.getYaxisRange()
-        index = binarySearchStartingPoint(allPointsSorted, xmin)
-        while index < len(allPointsSorted) and allPointsSorted[index].x <= xmax:
-            if self.location.getDistanceFrom(allPointsSorted[index]) <= Constant.MAX_UAV_DISTANCE:
-                self.points_in_range.append(allPointsSorted[index])
-            index += 1
+    def findAllPointsInRange(self, pointTree : cKDTree, allPoints : list[CornerPoint]):
+        for index in pointTree.query_ball_point((self.location.x, self.location.y), Constant.MAX_UAV_DISTANCE):
+            self.points_in_range.append(allPoints[index])
         return self.points_in_range
     
     def determineCoveredPolygon(self):
-        checked = [False for i in range(len(self.points_in_range))]
-        for i in range(len(self.points_in_range)):
-            if checked[i]:
-                continue
-            for polygon in self.points_in_range[i].polygons:
-                isCovered = True
-                for point in polygon.corner_points:
-                    if self.points_in_range.count(point) > 0:
-                        checked[self.points_in_range.index(point)] = True
-                    else:
-                        isCovered = False
-                if isCovered:
+        pointsInRange = set(map(id, self.points_in_range))
+        checkedPolygons = set()
+        for point in self.points_in_range:
+            for polygon in point.polygons:
+                if id(polygon) in checkedPolygons:
+                    continue
+                checkedPolygons.add(id(polygon))
+                if all(id(corner) in pointsInRange for corner in polygon.corner_points):
                     self.coveredPolygon.append(polygon)
                     polygon.fully_covered_by.append(self)
-            checked[i] = True
     
     def prepareForRemoval(self):
         for point in self.points_in_range:
@@ -173,20 +210,3 @@ class Logger:
     @staticmethod
     def Close():
         Logger.file.close()
-
-def binarySearchStartingPoint(allSortedPoints: list[CornerPoint], xmin):
-    start = 0
-    end = len(allSortedPoints) - 1
-    while start <= end:
-        mid = (start + end) // 2
-        if allSortedPoints[mid].x == xmin:
-            return mid
-        elif allSortedPoints[mid].x < xmin:
-            start = mid + 1
-        else:
-            end = mid - 1
-    if start >= len(allSortedPoints) or allSortedPoints[start].x > xmin:
-        return start
-    else:
-        return start+1
-    
@@ -0,0 +1,48 @@
+import math
+import os
+import sys
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+def test_assign_package_vehicle_detour() -> None:
+    from drone_cab import Package, Pickup, Vehicle, Warehouse
+    from drone_cab.assign import assign_package_pickup, assign_package_vehicle_detour
+
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+            "-d",
+            "150",
+        ]
+    )
+
+    try:
+        for _ in range(30):
+            traci.simulationStep()
+        warehouse = Warehouse()
+        package = Package("359039090")
+        pickup = assign_package_pickup(package, Pickup.create_pickup_list())
+        vehicle_list = Vehicle.get_vehicle_list()
+
+        assert assign_package_vehicle_detour(package, vehicle_list, warehouse, -math.inf) is None
+        assert package.assigned_vehicle is None
+
+        vehicle = assign_package_vehicle_detour(package, vehicle_list, warehouse, math.inf)
+        assert vehicle is not None
+        assert package.assigned_vehicle is vehicle
+        assert package in vehicle.carrying_package_set
+        assert package.distance_vehicle > 0
+
+        route_edge_id_list = vehicle.get_route_edge_id_list()
+        assert route_edge_id_list[package.drop_route_index] == pickup.nearest_edge_id
+        assert warehouse.nearest_edge_id in route_edge_id_list[: package.drop_route_index + 1]
+    finally:
+        traci.close()
+        Vehicle.vehicle_list.clear()
@@ -0,0 +1,60 @@
+import os
+import sys
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+def test_building_table() -> None:
+    from drone_cab import Package
+    from drone_cab.building import BuildingTable
+    from drone_cab.store import PackageStore
+
+    building_count = 100_000
+    building_table = BuildingTable(
+        [str(i) for i in range(building_count)],
+        [(float(i), 2.0 * i) for i in range(building_count)],
+    )
+    assert len(building_table) == building_count
+    assert "42" in building_table and "-1" not in building_table
+    assert building_table.get_center("42") == (42.0, 84.0)
+
+    Package.building_table = building_table
+    Package.store = PackageStore()
+    try:
+        package_list = [
+            Package(str(i), highlight=False) for i in range(building_count)
+        ]
+        assert len(Package.store) == building_count
+        assert package_list[7].center == (7.0, 14.0)
+    finally:
+        Package.building_table = None
+        Package.store = PackageStore()
+
+
+def test_building_table_from_traci() -> None:
+    from drone_cab.building import BuildingTable
+    from drone_cab.utils import get_building_id_list, shape2area, shape2centroid
+
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+            "-d",
+            "150",
+        ]
+    )
+
+    try:
+        building_table = BuildingTable.from_traci(with_area=True)
+        assert building_table.id_list == get_building_id_list()
+        for building_id in building_table.id_list[::50]:
+            shape = traci.polygon.getShape(building_id)
+            assert building_table.get_center(building_id) == shape2centroid(shape)
+            assert building_table.get_area(building_id) == shape2area(shape)
+    finally:
+        traci.close()
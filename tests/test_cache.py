@@ -0,0 +1,54 @@
+import os
+import sys
+
+sys.path.append("..")
+
+
+def test_scenario_key(tmp_path) -> None:
+    from drone_cab.cache import get_sumocfg_path_list, scenario_key
+
+    sumocfg_path_list = get_sumocfg_path_list(os.path.join("..", "data", "config.sumocfg"))
+    assert [os.path.basename(path) for path in sumocfg_path_list] == [
+        "config.sumocfg",
+        "map.net.xml",
+        "trips.rou.xml",
+        "map.poly.xml",
+    ]
+
+    first_path, second_path = tmp_path / "a.txt", tmp_path / "b.txt"
+    first_path.write_text("ab")
+    second_path.write_text("c")
+    key = scenario_key([str(first_path), str(second_path)], {"steps": 100, "seed": 1})
+    assert key == scenario_key([str(first_path), str(second_path)], {"seed": 1, "steps": 100})
+    assert key != scenario_key([str(first_path), str(second_path)], {"steps": 200, "seed": 1})
+
+    # Moving content between files changes the key
+    first_path.write_text("a")
+    second_path.write_text("bc")
+    assert key != scenario_key([str(first_path), str(second_path)], {"steps": 100, "seed": 1})
+
+
+def test_result_cache(tmp_path) -> None:
+    from drone_cab.cache import ResultCache
+
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=25)
+    assert cache.get("a", ".csv") is None
+    assert cache.miss_count == 1
+
+    result_path = tmp_path / "deliveries.CSV"
+    for i, key in enumerate(["a", "b"]):
+        result_path.write_text(f"{key}" * 10)
+        cache.put(key, str(result_path))
+        os.utime(os.path.join(cache.cache_dir, f"{key}.csv"), (i, i))
+    assert len(cache) == 2
+
+    # Using "a" makes "b" the least recently used, and thus evicted by "c"
+    cached_path = cache.get("a", ".csv")
+    assert cached_path is not None and open(cached_path).read() == "a" * 10
+    assert cache.hit_count == 1
+    result_path.write_text("c" * 10)
+    cache.put("c", str(result_path))
+    assert len(cache) == 2
+    assert cache.get("b", ".csv") is None
+    assert cache.get("a", ".csv") is not None
+    assert cache.get("c", ".csv") is not None
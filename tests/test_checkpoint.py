@@ -0,0 +1,58 @@
+import os
+import sys
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+def test_save_load_checkpoint(tmp_path) -> None:
+    from drone_cab import Package, Pickup, Vehicle, Warehouse
+    from drone_cab.assign import assign_package_pickup
+    from drone_cab.checkpoint import load_checkpoint, save_checkpoint
+    from drone_cab.clock import Clock
+    from drone_cab.scheduler import OrderScheduler
+
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+            "-d",
+            "150",
+        ]
+    )
+
+    try:
+        traci.addStepListener(Clock())
+        scheduler = OrderScheduler(Pickup.create_pickup_list(), Warehouse())
+        for _ in range(5):
+            traci.simulationStep()
+
+        package = Package("234807099")
+        pickup = assign_package_pickup(package, scheduler.pickup_list)
+        scheduler.submit([Package("239713538")])
+        vehicle_count = len(Vehicle.get_vehicle_list())
+        polygon_count = len(traci.polygon.getIDList())
+
+        save_checkpoint(str(tmp_path), scheduler)
+        for _ in range(10):
+            traci.simulationStep()
+        assert Clock.current_step == 15
+
+        scheduler = load_checkpoint(str(tmp_path))
+        assert Clock.current_step == 5
+        assert traci.simulation.getTime() == Clock.current_time
+        assert len(traci.polygon.getIDList()) == polygon_count
+        assert len(Vehicle.get_vehicle_list()) == vehicle_count
+        assert [package.destination_id for package in scheduler.ready_queue] == ["239713538"]
+
+        restored_pickup = next(p for p in scheduler.pickup_list if p.id == pickup.id)
+        (restored_package,) = restored_pickup.assigned_package_set
+        assert restored_package.destination_id == "234807099"
+        assert restored_package.assigned_pickup is restored_pickup
+    finally:
+        traci.close()
+        Vehicle.vehicle_list.clear()
@@ -0,0 +1,53 @@
+import itertools
+import sys
+
+sys.path.append("..")
+
+
+def test_hourly_rate() -> None:
+    from drone_cab.demand import hourly_rate
+
+    rate = hourly_rate([10.0, 20.0, 30.0])
+    assert rate(0.0) == 10.0
+    assert rate(3599.0) == 10.0
+    assert rate(3600.0) == 20.0
+    assert rate(3 * 3600.0 + 7200.0) == 30.0
+
+
+def test_hotspot_weights() -> None:
+    from drone_cab.demand import hotspot_weights
+
+    weight_array = hotspot_weights(
+        [(0.0, 0.0), (10.0, 0.0), (1000.0, 0.0)], [(0.0, 0.0, 10.0, 4.0)]
+    )
+    assert weight_array[0] == 5.0
+    assert 1.0 < weight_array[1] < 5.0
+    assert weight_array[2] == 1.0
+
+
+def test_poisson_destinations() -> None:
+    from drone_cab.demand import poisson_destinations
+
+    building_id_list = [str(i) for i in range(100)]
+
+    def take(seed: int, steps: int, **kwargs) -> list[list[str]]:
+        return list(
+            itertools.islice(
+                poisson_destinations(building_id_list, seed=seed, **kwargs), steps
+            )
+        )
+
+    assert take(1, 50, rate=3600.0) == take(1, 50, rate=3600.0)
+    assert take(1, 50, rate=3600.0) != take(2, 50, rate=3600.0)
+    assert not any(take(1, 50, rate=0.0))
+
+    order_count = sum(map(len, take(1, 3600, rate=7200.0)))
+    assert 6800 < order_count < 7600
+
+    order_count = sum(map(len, take(1, 3600, rate=lambda time: 7200.0 if time < 1800 else 0.0)))
+    assert 3400 < order_count < 3800
+
+    weight_list = [0.0] * 100
+    weight_list[42] = 1.0
+    destination_id_list = sum(take(1, 100, rate=36000.0, weight_list=weight_list), [])
+    assert destination_id_list and set(destination_id_list) == {"42"}
@@ -0,0 +1,46 @@
+import json
+import logging
+import sys
+
+sys.path.append("..")
+
+
+def test_event_log(tmp_path) -> None:
+    from drone_cab.events import is_event_logging_enabled, log_event, start_logging
+
+    log_file = tmp_path / "drone_cab.log"
+    event_log_file = tmp_path / "events.jsonl"
+
+    listener = start_logging(
+        str(log_file), level=logging.WARNING, event_log_file=str(event_log_file)
+    )
+    try:
+        logging.getLogger("drone_cab.test").info("not logged")
+        logging.getLogger("drone_cab.test").warning("logged %s", "text")
+        assert is_event_logging_enabled()
+        log_event("delivery", package="234807099", distance_drone=102.5)
+        log_event("drop", package="239713538", vehicle="25")
+    finally:
+        listener.stop()
+        logging.getLogger().handlers.clear()
+        logging.getLogger("drone_cab.events").setLevel(logging.NOTSET)
+
+    event_list = [json.loads(line) for line in event_log_file.read_text().splitlines()]
+    assert [event["event"] for event in event_list] == ["delivery", "drop"]
+    assert event_list[0]["package"] == "234807099"
+    assert event_list[0]["distance_drone"] == 102.5
+    assert event_list[1]["vehicle"] == "25"
+
+    log_text = log_file.read_text()
+    assert "logged text" in log_text
+    assert "not logged" not in log_text
+    assert "delivery" not in log_text
+
+    # Without an event log, events are not even built
+    listener = start_logging(str(log_file), level=logging.WARNING)
+    try:
+        assert not is_event_logging_enabled()
+    finally:
+        listener.stop()
+        logging.getLogger().handlers.clear()
+        logging.getLogger("drone_cab.events").setLevel(logging.NOTSET)
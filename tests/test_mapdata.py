@@ -0,0 +1,62 @@
+import gzip
+import json
+import os
+import sys
+
+sys.path.append("..")
+
+
+def test_load_polygons(tmp_path) -> None:
+    from drone_cab.mapdata import load_polygons
+
+    poly_path = tmp_path / "map.poly.xml"
+    poly_path.write_text(
+        "<additional>"
+        '<poly id="a" type="building" shape="0,0 2,0 2,3 0,3"/>'
+        '<poly id="b" type="water" shape="0,0 1,0 1,1"/>'
+        '<poly id="empty" type="building" shape=""/>'
+        '<poly id="line" type="building" shape="5,5 6,6"/>'
+        '<poly id="c" type="building" shape="10,10 14,10 14,12 10,12 10,10">'
+        '<param key="k" value="v"/>'
+        "</poly>"
+        "</additional>"
+    )
+
+    shape_table_dict = load_polygons(str(poly_path))
+    assert sorted(shape_table_dict) == ["building", "water"]
+    building_table = shape_table_dict["building"]
+    assert building_table.id_list == ["a", "c"]
+    assert building_table.get_shape("c").tolist()[1] == [14.0, 10.0]
+    assert building_table.centroid_array().tolist() == [[1.0, 1.5], [11.6, 10.8]]
+    assert building_table.area_array().tolist() == [6.0, 8.0]
+
+    assert list(load_polygons(str(poly_path), {"water"})) == ["water"]
+
+
+def test_building_table_from_poly_file() -> None:
+    from drone_cab.building import BuildingTable
+
+    building_table = BuildingTable.from_poly_file(os.path.join("data", "map.poly.xml"))
+
+    with gzip.open(os.path.join("data", "building_id_list.json.gz"), "rt") as building_id_list_zipfile:
+        expected_building_id_list = json.load(building_id_list_zipfile)
+        assert not set(building_table.id_list) ^ set(expected_building_id_list)
+
+
+def test_network_table_from_net_file() -> None:
+    from drone_cab.mapdata import NetworkTable
+
+    network_table = NetworkTable.from_net_file(os.path.join("data", "map.net.xml"))
+
+    with gzip.open(os.path.join("data", "lane_list.json.gz"), "rt") as lane_list_zipfile:
+        expected_lane_list = json.load(lane_list_zipfile)
+        assert not set(network_table.lane_table.id_list) ^ set(expected_lane_list)
+
+    assert network_table.get_lane_edge_id("-1019946382_0") == "-1019946382"
+    assert len(network_table.lane_length_array) == len(network_table.lane_table)
+    assert (network_table.edge_length_array > 0).all()
+    assert len(network_table.successor_index_array) == network_table.successor_offset_array[-1]
+    assert any(
+        network_table.get_successor_edge_id_list(edge_id) for edge_id in network_table.edge_id_list
+    )
+    assert not any(edge_id.startswith(":") for edge_id in network_table.edge_id_list)
@@ -0,0 +1,77 @@
+import math
+import sys
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append("..")
+
+
+def make_package(i: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        destination_id=str(1000 + i),
+        assigned_pickup=SimpleNamespace(id=f"pickup#{i % 2}"),
+        assigned_vehicle=SimpleNamespace(id=str(i % 3)) if i else None,
+        created_step=i,
+        pickup_step=i + 10,
+        delivered_step=i + 20,
+        distance_vehicle=100.0 + i,
+        distance_drone=0.5 * i,
+        created_time=float(i),
+        assigned_time=i + 1.0,
+        pickup_time=i + 10.0,
+        departed_time=i + 10.0 + 2 * i,
+        delivered_time=i + 20.0 + 2 * i,
+    )
+
+
+def test_delivery_metrics(tmp_path) -> None:
+    from drone_cab.metrics import DeliveryMetrics, load_delivery_metrics
+
+    for extension in ["csv", "npz"]:
+        path = str(tmp_path / f"deliveries.{extension}")
+
+        with DeliveryMetrics(path, batch_size=3) as metrics:
+            for i in range(7):
+                metrics.record(make_package(i))
+            assert metrics.batch_count == 2
+
+        assert metrics.batch_count == 3
+        assert metrics.record_count == 7
+
+        column_dict = load_delivery_metrics(path)
+        assert column_dict["destination_id"].tolist() == [str(1000 + i) for i in range(7)]
+        assert column_dict["pickup_id"].tolist() == [f"pickup#{i % 2}" for i in range(7)]
+        assert column_dict["vehicle_id"].tolist() == [""] + [str(i % 3) for i in range(1, 7)]
+        assert column_dict["delivered_step"].tolist() == [i + 20 for i in range(7)]
+        assert column_dict["distance_drone"].tolist() == [0.5 * i for i in range(7)]
+        assert column_dict["departed_time"].tolist() == [i + 10.0 + 2 * i for i in range(7)]
+
+        # Runs without deliveries still write their columns
+        empty_path = str(tmp_path / f"empty.{extension}")
+        DeliveryMetrics(empty_path).close()
+        column_dict = load_delivery_metrics(empty_path)
+        assert column_dict["destination_id"].tolist() == []
+        assert column_dict["delivered_step"].dtype == np.int64
+
+
+def test_latency_report() -> None:
+    from drone_cab.metrics import LatencyReport
+
+    latency_report = LatencyReport(percentile_list=[50.0, 100.0])
+    for i in range(7):
+        latency_report.record(make_package(i))
+
+    summary_dict = latency_report.summary()
+    assert list(summary_dict) == ["pickup#0", "pickup#1", "all"]
+    assert summary_dict["all"]["queue"] == {"count": 7.0, "mean": 1.0, "p50": 1.0, "p100": 1.0}
+    assert summary_dict["all"]["pickup"]["p100"] == 12.0
+    assert summary_dict["pickup#0"]["pickup"]["count"] == 4.0
+    assert summary_dict["pickup#0"]["pickup"]["p50"] == 6.0
+    assert summary_dict["pickup#1"]["total"]["mean"] == 26.0
+    assert "pickup#1" in latency_report.format()
+
+    undelivered_package = make_package(7)
+    undelivered_package.delivered_time = math.nan
+    latency_report.record(undelivered_package)
+    assert latency_report.summary()["pickup#1"]["total"]["count"] == 3.0
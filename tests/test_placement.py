@@ -0,0 +1,64 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append("..")
+
+
+def test_greedy_set_cover() -> None:
+    from drone_cab.placement import get_coverage_matrix, greedy_set_cover
+
+    site_array = np.array([[0.0, 0.0], [10.0, 0.0], [5.0, 0.0], [100.0, 100.0]])
+    center_array = np.array([[0.5, 0.0], [4.0, 0.0], [6.0, 0.0], [9.5, 0.0], [500.0, 500.0]])
+
+    coverage_matrix = get_coverage_matrix(site_array, center_array, 3.0)
+    assert coverage_matrix.shape == (5, 4)
+    assert coverage_matrix[4].nnz == 0
+
+    # The middle site covers the most buildings, then each end site one more
+    site_index_list = greedy_set_cover(coverage_matrix)
+    assert site_index_list[0] == 2
+    assert sorted(site_index_list) == [0, 1, 2]
+    assert np.all(coverage_matrix[:4][:, site_index_list].sum(axis=1) > 0)
+
+
+def test_place_pickups(tmp_path) -> None:
+    from drone_cab.building import BuildingTable
+    from drone_cab.mapdata import NetworkTable
+    from drone_cab.placement import load_layout, place_pickups, save_layout
+
+    network_table = NetworkTable.from_net_file(os.path.join("data", "map.net.xml"))
+    building_table = BuildingTable.from_poly_file(os.path.join("data", "map.poly.xml"))
+
+    layout = place_pickups(network_table, building_table, drone_range=500.0)
+    assert not layout["uncovered_building_id_list"]
+    center_array = np.array([pickup["center"] for pickup in layout["pickup_list"]])
+    distance_array = np.hypot(
+        *(building_table.center_array[:, np.newaxis, :] - center_array[np.newaxis, :, :]).T
+    )
+    assert np.all(distance_array.min(axis=0) <= 250.0)
+
+    passenger_edge_id_set = {
+        network_table.get_lane_edge_id(lane_id)
+        for lane_id in network_table.lane_table.id_list
+        if network_table.lane_allows(lane_id, "passenger")
+    }
+    assert all(pickup["edge_id"] in passenger_edge_id_set for pickup in layout["pickup_list"])
+
+    layout_path = str(tmp_path / "layout.json")
+    save_layout(layout_path, layout)
+    assert load_layout(layout_path) == [
+        (tuple(pickup["center"]), pickup["edge_id"]) for pickup in layout["pickup_list"]
+    ]
+
+    # Overridden tunables reach the defaults of placement
+    from drone_cab.tunables import set_tunable_overrides
+
+    set_tunable_overrides({"DRONE_RANGE": 800.0})
+    try:
+        assert place_pickups(network_table, building_table) == place_pickups(
+            network_table, building_table, drone_range=800.0
+        )
+    finally:
+        set_tunable_overrides({})
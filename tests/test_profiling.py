@@ -0,0 +1,45 @@
+import os
+import sys
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+def test_traci_profiler() -> None:
+    from drone_cab.profiling import TraciProfiler
+    from drone_cab.utils import get_building_id_list
+
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+            "-d",
+            "150",
+        ]
+    )
+
+    try:
+        original_polygon = traci.polygon
+        with TraciProfiler(log_steps=False) as profiler:
+            assert traci.polygon is not original_polygon
+            polygon_count = len(traci.polygon.getIDList())
+            get_building_id_list()
+            traci.simulationStep()
+            traci.simulationStep()
+
+        assert traci.polygon is original_polygon
+        assert profiler.step_count == 2
+        assert profiler.method_stats["polygon.getType"][0] == polygon_count
+        assert profiler.method_stats["polygon.getIDList"][0] == 2
+        assert profiler.method_stats["simulationStep"][0] == 2
+        assert (
+            profiler.caller_stats["drone_cab.utils.get_building_id_list.<locals>.<lambda>"][0]
+            == polygon_count
+        )
+        assert "polygon.getType" in profiler.report()
+    finally:
+        traci.close()
@@ -0,0 +1,130 @@
+import os
+import sys
+from types import SimpleNamespace
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+def make_pickup(i: int, capacity: int) -> SimpleNamespace:
+    pickup = SimpleNamespace(
+        id=f"pickup#{i}",
+        center=(100.0 * i, 0.0),
+        capacity=capacity,
+        assigned_package_set=set(),
+        received_package_set=set(),
+    )
+    pickup.assign_package = pickup.assigned_package_set.add
+    return pickup
+
+
+def test_order_scheduler(monkeypatch) -> None:
+    import drone_cab.scheduler
+    from drone_cab import Package, Vehicle
+    from drone_cab.building import BuildingTable
+    from drone_cab.scheduler import OrderScheduler
+    from drone_cab.store import PackageStore
+
+    departed_id_list = []
+    vehicle_capacity = {"count": 0}
+    attempt_list = []
+
+    def assign_package_vehicle(package, vehicle_list, warehouse):
+        attempt_list.append(package)
+        if vehicle_capacity["count"] > 0:
+            vehicle_capacity["count"] -= 1
+            return SimpleNamespace(id="vehicle")
+        return None
+
+    monkeypatch.setattr(traci.simulation, "getDepartedIDList", lambda: departed_id_list)
+    monkeypatch.setattr(Vehicle, "get_vehicle_list", staticmethod(lambda: []))
+    monkeypatch.setattr(drone_cab.scheduler, "assign_package_vehicle", assign_package_vehicle)
+
+    Package.building_table = BuildingTable(
+        [str(i) for i in range(10)], [(10.0 * i, 0.0) for i in range(10)]
+    )
+    Package.store = PackageStore()
+    try:
+        pickup_list = [make_pickup(0, 2), make_pickup(1, 2)]
+        scheduler = OrderScheduler(pickup_list, SimpleNamespace(), assignment_budget=3)
+        package_list = [Package(str(i), highlight=False) for i in range(6)]
+        scheduler.submit(package_list)
+
+        assert scheduler.schedule() == 0
+        assert len(attempt_list) == 2
+        assert list(scheduler.waitlist_dict["no_vehicle"]) == package_list[:4]
+        assert list(scheduler.waitlist_dict["no_pickup"]) == package_list[4:]
+        assert len(scheduler) == 6
+
+        assert scheduler.schedule() == 0
+        assert len(attempt_list) == 2
+
+        vehicle_capacity["count"] = 10
+        departed_id_list.append("vehicle")
+        assert scheduler.schedule() == 3
+        assert len(attempt_list) == 5
+        assert list(scheduler.ready_queue) == package_list[3:4]
+
+        departed_id_list.clear()
+        assert scheduler.schedule() == 1
+        assert not scheduler.ready_queue
+
+        pickup_list[0].assigned_package_set.pop()
+        assert scheduler.schedule() == 1
+        assert list(scheduler.waitlist_dict["no_pickup"]) == package_list[5:]
+        assert len(scheduler) == 1
+    finally:
+        Package.building_table = None
+        Package.store = PackageStore()
+
+
+def test_order_scheduler_detour(monkeypatch) -> None:
+    import drone_cab.scheduler
+    from drone_cab import Package, Vehicle
+    from drone_cab.building import BuildingTable
+    from drone_cab.scheduler import OrderScheduler
+    from drone_cab.store import PackageStore
+
+    vehicle = SimpleNamespace(id="vehicle", route_index=0, carrying_package_set=set())
+    vehicle.get_route_index = lambda: vehicle.route_index
+    attempt_list = []
+
+    def assign_package_vehicle_detour(package, vehicle_list, warehouse, route_cache=None):
+        attempt_list.append(package)
+        # Within the maximum detour only once the vehicle has driven closer to the warehouse
+        return vehicle if vehicle.route_index >= 2 else None
+
+    monkeypatch.setattr(traci.simulation, "getDepartedIDList", lambda: [])
+    monkeypatch.setattr(Vehicle, "vehicle_list", [vehicle])
+    monkeypatch.setattr(Vehicle, "get_vehicle_list", staticmethod(lambda: [vehicle]))
+    monkeypatch.setattr(
+        drone_cab.scheduler, "assign_package_vehicle_detour", assign_package_vehicle_detour
+    )
+
+    Package.building_table = BuildingTable(["0"], [(0.0, 0.0)])
+    Package.store = PackageStore()
+    try:
+        scheduler = OrderScheduler([make_pickup(0, 2)], SimpleNamespace(), detour=True)
+        package = Package("0", highlight=False)
+        scheduler.submit([package])
+
+        assert scheduler.schedule() == 0
+        assert list(scheduler.waitlist_dict["no_vehicle"]) == [package]
+
+        # Nothing happened, so nothing is retried
+        assert scheduler.schedule() == 0
+        assert len(attempt_list) == 1
+
+        vehicle.route_index = 1
+        assert scheduler.schedule() == 0
+        assert len(attempt_list) == 2
+
+        vehicle.route_index = 2
+        assert scheduler.schedule() == 1
+        assert len(scheduler) == 0
+    finally:
+        Package.building_table = None
+        Package.store = PackageStore()
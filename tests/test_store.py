@@ -0,0 +1,65 @@
+import math
+import sys
+from types import SimpleNamespace
+
+sys.path.append("..")
+
+
+def test_package_store() -> None:
+    from drone_cab import Package
+    from drone_cab.building import BuildingTable
+    from drone_cab.store import (
+        STATUS_ASSIGNED,
+        STATUS_AT_PICKUP,
+        STATUS_QUEUED,
+        PackageStore,
+    )
+
+    Package.building_table = BuildingTable(
+        [str(i) for i in range(10)], [(float(i), -float(i)) for i in range(10)]
+    )
+    Package.store = PackageStore(capacity=2)
+    try:
+        package_list = [Package(str(i % 10), highlight=False) for i in range(5)]
+        assert not hasattr(package_list[0], "__dict__")
+        assert len(Package.store) == 5
+        assert package_list[3].destination_id == "3"
+        assert package_list[3].center == (3.0, -3.0)
+        assert package_list[3].status == STATUS_QUEUED
+        assert package_list[3].assigned_pickup is None
+        assert math.isnan(package_list[3].assigned_time)
+
+        pickup_a = SimpleNamespace(id="pickup#a")
+        pickup_b = SimpleNamespace(id="pickup#b")
+        vehicle = SimpleNamespace(id="vehicle")
+        for i, package in enumerate(package_list):
+            package.set_pickup(pickup_a if i % 2 else pickup_b)
+            package.set_vehicle(vehicle)
+            package.distance_vehicle += 10.0 * i
+        package_list[1].mark_reached_pickup()
+        package_list[3].mark_reached_pickup()
+        package_list[4].mark_reached_pickup()
+
+        assert package_list[1].assigned_pickup is pickup_a
+        assert package_list[2].assigned_vehicle is vehicle
+        assert package_list[4].distance_vehicle == 40.0
+        assert package_list[3].reached_pickup and not package_list[2].reached_pickup
+        assert Package.store.find(status=STATUS_AT_PICKUP, pickup=pickup_a) == [
+            package_list[1],
+            package_list[3],
+        ]
+        assert Package.store.find(vehicle=SimpleNamespace(id="other")) == []
+        assert Package.store.count_by_status()["assigned"] == 2
+
+        package_list[1].release()
+        assert len(Package.store) == 4
+        recycled_package = Package("7", highlight=False)
+        assert recycled_package.index == package_list[1].index
+        assert recycled_package.status == STATUS_QUEUED
+        assert recycled_package.assigned_pickup is None
+        assert recycled_package.distance_vehicle == 0.0
+        assert Package.store.size == 5
+        assert Package.store.find(status=STATUS_ASSIGNED) == [package_list[0], package_list[2]]
+    finally:
+        Package.building_table = None
+        Package.store = PackageStore()
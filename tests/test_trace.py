@@ -0,0 +1,67 @@
+import sys
+from types import SimpleNamespace
+
+sys.path.append("..")
+
+
+def make_pickup(i: int) -> SimpleNamespace:
+    center = (10.0 * i, 20.0 * i)
+    return SimpleNamespace(
+        id=f"pickup#{i}",
+        drone=SimpleNamespace(center=center, current_position=center, parked=True),
+    )
+
+
+def test_trace(tmp_path) -> None:
+    from drone_cab.clock import Clock
+    from drone_cab.store import STATUS_ASSIGNED, STATUS_DELIVERED, STATUS_FREE, STATUS_QUEUED
+    from drone_cab.trace import KIND_DRONE, KIND_PACKAGE, TraceReader, TraceRecorder
+    from drone_cab.vehicle import Vehicle
+
+    trace_dir = str(tmp_path / "trace")
+    pickup_list = [make_pickup(i) for i in range(2)]
+    first = SimpleNamespace(index=0, status=STATUS_QUEUED, destination_id="1000", center=(1.0, 2.0))
+    # Recycles the row of the first package once it has been delivered
+    second = SimpleNamespace(index=0, status=STATUS_QUEUED, destination_id="1001", center=(3.0, 4.0))
+
+    Clock.reset()
+    Vehicle.vehicle_list.clear()
+    try:
+        with TraceRecorder(trace_dir, pickup_list) as recorder:
+            for step in range(10):
+                Clock.current_step, Clock.current_time = step, float(step)
+                if step == 2:
+                    recorder.record_package(first)
+                elif step == 4:
+                    first.status = STATUS_ASSIGNED
+                    recorder.record_package(first)
+                    pickup_list[1].drone.parked = False
+                elif step == 6:
+                    first.status = STATUS_DELIVERED
+                    recorder.record_package(first)
+                    recorder.record_package(second)
+                pickup_list[1].drone.current_position = (10.0 + step, 20.0)
+                recorder.record_step()
+            Clock.current_step = 10
+        assert recorder.step_count == 11
+    finally:
+        Clock.reset()
+
+    reader = TraceReader(trace_dir)
+    assert len(reader) == 11
+    assert reader.drone_id_list == ["pickup#0", "pickup#1"]
+    assert reader.package_destination_id_list == ["1000", "1001"]
+    assert reader.seek(-1) == 0 and reader.seek(5) == 5 and reader.seek(99) == 10
+
+    assert reader.get_package_status(reader.seek(1)).tolist() == [STATUS_FREE, STATUS_FREE]
+    assert reader.get_package_status(reader.seek(3)).tolist() == [STATUS_QUEUED, STATUS_FREE]
+    assert reader.get_package_status(reader.seek(5)).tolist() == [STATUS_ASSIGNED, STATUS_FREE]
+    assert reader.get_package_status(reader.seek(9)).tolist() == [STATUS_DELIVERED, STATUS_QUEUED]
+
+    block = reader.get_block(reader.seek(6))
+    assert block["kind"].tolist() == [KIND_DRONE, KIND_DRONE, KIND_PACKAGE, KIND_PACKAGE]
+    assert block["status"][:2].tolist() == [0, 1]
+
+    trail_array = reader.get_drone_trail(reader.seek(6), 3)
+    assert trail_array.shape == (3, 2, 2)
+    assert trail_array[:, 1, 0].tolist() == [14.0, 15.0, 16.0]
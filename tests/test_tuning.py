@@ -0,0 +1,75 @@
+import json
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append("..")
+
+
+def test_sample_configurations() -> None:
+    from drone_cab.tuning import sample_configurations
+
+    search_space_dict = {"DRONE_CAPACITY": [1, 2, 4], "DRONE_RANGE": [300.0, 500.0]}
+    assert len(sample_configurations(search_space_dict, 10)) == 6
+
+    configuration_list = sample_configurations(search_space_dict, 4, seed=1)
+    assert len(configuration_list) == 4
+    assert len({tuple(configuration.items()) for configuration in configuration_list}) == 4
+    for configuration in configuration_list:
+        assert list(configuration) == ["DRONE_CAPACITY", "DRONE_RANGE"]
+        assert configuration["DRONE_CAPACITY"] in [1, 2, 4]
+        assert configuration["DRONE_RANGE"] in [300.0, 500.0]
+    assert configuration_list == sample_configurations(search_space_dict, 4, seed=1)
+
+
+def test_objectives() -> None:
+    from drone_cab.tuning import OBJECTIVE_DICT
+
+    # Second package is undelivered at the horizon of 100 steps
+    column_dict = {
+        "created_step": np.array([10, 20]),
+        "delivered_step": np.array([30, -1]),
+        "distance_drone": np.array([50.0, 0.0]),
+    }
+    assert OBJECTIVE_DICT["latency"](column_dict, 100) == (20 + 80) / 2
+    assert OBJECTIVE_DICT["drone_distance"](column_dict, 100) == 50.0
+    assert OBJECTIVE_DICT["deliveries"](column_dict, 100) == -1.0
+
+
+def test_successive_halving() -> None:
+    from drone_cab.tuning import successive_halving
+
+    evaluation_list = []
+
+    def evaluate(configuration_list, steps):
+        evaluation_list.append((steps, len(configuration_list)))
+        # Configurations closer to 5 are better, and longer horizons lower every score
+        return [abs(configuration["x"] - 5) - steps / 1000 for configuration in configuration_list]
+
+    trial_list = successive_halving(
+        evaluate, [{"x": x} for x in range(8)], min_steps=100, max_steps=300
+    )
+    assert evaluation_list == [(100, 8), (200, 4), (300, 2)]
+    assert trial_list[0]["configuration"] == {"x": 5}
+    assert trial_list[0]["steps"] == 300
+    assert [trial["steps"] for trial in trial_list] == [300] * 2 + [200] * 4 + [100] * 8
+
+    with pytest.raises(AssertionError):
+        successive_halving(evaluate, [{"x": 0}], min_steps=100, max_steps=300, eta=1)
+
+
+def test_tunable_overrides(tmp_path) -> None:
+    from drone_cab.tunables import DRONE_RANGE, load_tunable_overrides, set_tunable_overrides
+
+    path = tmp_path / "tunables.json"
+    path.write_text(json.dumps({"DRONE_RANGE": 800.0}))
+    try:
+        assert load_tunable_overrides(str(path)) == {"DRONE_RANGE": 800.0}
+        assert DRONE_RANGE() == 800.0
+
+        with pytest.raises(AssertionError):
+            set_tunable_overrides({"DRONE_WINGSPAN": 1.0})
+    finally:
+        set_tunable_overrides({})
+    assert DRONE_RANGE() == 500.0
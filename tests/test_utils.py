@@ -27,6 +27,14 @@ def test_shape2centroid() -> None:
     assert shape2centroid([(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)]) == (3.0, 4.0)
 
 
+def test_shape2area() -> None:
+    from drone_cab.utils import shape2area
+
+    assert shape2area([(0.0, 0.0), (2.0, 0.0), (2.0, 3.0), (0.0, 3.0)]) == 6.0
+    assert shape2area([(0.0, 0.0), (0.0, 3.0), (2.0, 3.0), (2.0, 0.0), (0.0, 0.0)]) == 6.0
+    assert shape2area([(0.0, 0.0), (1.0, 1.0)]) == 0.0
+
+
 def test_get_lane_list() -> None:
     from drone_cab.utils import get_lane_list
 
@@ -0,0 +1,63 @@
+import os
+import sys
+from types import SimpleNamespace
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+class FakePackage:
+    destination_id = "test"
+    drop_route_index = -1
+
+    def mark_reached_pickup(self) -> None:
+        pass
+
+
+def test_vehicle_route_index_drop() -> None:
+    from drone_cab import Vehicle
+
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+            "-d",
+            "150",
+        ]
+    )
+
+    try:
+        traci.simulationStep()
+        vehicle = Vehicle.get_vehicle_list()[0]
+        route_edge_id_list = vehicle.get_route_edge_id_list()
+        assert route_edge_id_list == traci.route.getEdges(traci.vehicle.getRouteID(vehicle.id))
+
+        dropped_road_id_list = []
+        pickup = SimpleNamespace(
+            id="pickup#test",
+            nearest_edge_id=route_edge_id_list[3],
+            add_package=lambda package: dropped_road_id_list.append(
+                traci.vehicle.getRoadID(vehicle.id)
+            ),
+        )
+        package = FakePackage()
+        package.assigned_pickup = pickup
+
+        vehicle.add_package(package)
+        assert package.drop_route_index == 3
+        while not dropped_road_id_list:
+            traci.simulationStep()
+            vehicle.step()
+            assert vehicle.get_route_index() <= 3
+
+        # The route index advances already on the junction leading onto the next edge
+        (dropped_road_id,) = dropped_road_id_list
+        assert dropped_road_id == route_edge_id_list[3] or dropped_road_id.startswith(":")
+        assert not vehicle.carrying_package_set
+    finally:
+        traci.close()
+        Vehicle.vehicle_list.clear()
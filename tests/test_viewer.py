@@ -0,0 +1,50 @@
+import os
+import sys
+from multiprocessing.connection import Client
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import sumolib
+import traci
+
+sys.path.append("..")
+
+
+def test_viewer_relay() -> None:
+    from drone_cab.tunables import WAREHOUSE_ID
+    from drone_cab.viewer import VIEWER_AUTHKEY, ViewerRelay
+
+    traci_port = sumolib.miscutils.getFreeSocketPort()
+    relay = ViewerRelay(traci_port, sumolib.miscutils.getFreeSocketPort(), WAREHOUSE_ID(), interval=5)
+    relay.start()
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+            "--num-clients",
+            "2",
+        ],
+        port=traci_port,
+    )
+    traci.setOrder(1)
+
+    try:
+        for _ in range(10):
+            traci.simulationStep()
+
+        # Attaching a viewer mid-run, which first receives the static polygons
+        viewer_connection = Client(("localhost", relay.viewer_port), authkey=VIEWER_AUTHKEY)
+        for _ in range(20):
+            traci.simulationStep()
+        assert list(viewer_connection.recv()["static_polygon_dict"]) == [WAREHOUSE_ID()]
+        snapshot = viewer_connection.recv()
+        assert snapshot["step"] % 5 == 0
+        assert snapshot["vehicle_dict"]
+        position, color = next(iter(snapshot["vehicle_dict"].values()))
+        assert len(position) == 2 and len(color) == 4
+        viewer_connection.close()
+    finally:
+        relay.stop_event.set()
+        traci.close()
+        relay.join()
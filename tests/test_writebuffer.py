@@ -0,0 +1,48 @@
+import os
+import sys
+
+if "SUMO_HOME" in os.environ:
+    sys.path.append(os.path.join(os.environ["SUMO_HOME"], "tools"))
+import traci
+
+sys.path.append("..")
+
+
+def test_write_buffer() -> None:
+    from drone_cab.profiling import TraciProfiler
+    from drone_cab.utils import get_building_id_list
+    from drone_cab.writebuffer import WriteBuffer
+
+    traci.start(
+        [
+            "sumo",
+            "-c",
+            os.path.join("data", "config.sumocfg"),
+        ]
+    )
+
+    try:
+        WriteBuffer.reset()
+        first_id, second_id = get_building_id_list()[:2]
+        with TraciProfiler(log_steps=False) as profiler:
+            # Only the last of repeated writes is sent
+            WriteBuffer.write("polygon", "setColor", first_id, (255, 0, 0, 255))
+            WriteBuffer.write("polygon", "setColor", first_id, (0, 255, 0, 255))
+            WriteBuffer.write("polygon", "setColor", second_id, (0, 0, 255, 255))
+            assert traci.polygon.getColor(first_id) != (0, 255, 0, 255)
+            assert WriteBuffer.flush() == 2
+            assert traci.polygon.getColor(first_id) == (0, 255, 0, 255)
+            assert traci.polygon.getColor(second_id) == (0, 0, 255, 255)
+
+            # Writes of the values last sent are dropped, even after other pending writes
+            WriteBuffer.write("polygon", "setColor", first_id, (0, 255, 0, 255))
+            WriteBuffer.write("polygon", "setColor", second_id, (255, 0, 0, 255))
+            WriteBuffer.write("polygon", "setColor", second_id, (0, 0, 255, 255))
+            assert WriteBuffer.flush() == 0
+            traci.simulationStep()
+
+        assert profiler.method_stats["polygon.setColor"][0] == 2
+        assert WriteBuffer.write_count - WriteBuffer.flush_count >= 4
+    finally:
+        WriteBuffer.reset()
+        traci.close()